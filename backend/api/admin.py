@@ -1,5 +1,6 @@
-from django.contrib import admin
-from .models import Category, Product, ProductVariant, Order, OrderItem, CartItem
+from django.contrib import admin, messages
+from .models import Category, Product, ProductVariant, Order, OrderItem, OrderStatusEvent, CartItem, Job
+from .orders import ORDER_TRANSITIONS, transition_orders
 
 class ProductVariantInline(admin.TabularInline):
     model = ProductVariant
@@ -8,9 +9,29 @@ class ProductVariantInline(admin.TabularInline):
 class OrderItemInline(admin.TabularInline):
     model = OrderItem
     extra = 0
-    readonly_fields = ['product', 'variant', 'quantity', 'price']
+    readonly_fields = ['product', 'variant', 'product_title', 'size', 'color', 'quantity', 'price']
     can_delete = False
 
+class OrderStatusEventInline(admin.TabularInline):
+    model = OrderStatusEvent
+    extra = 0
+    readonly_fields = ['from_status', 'to_status', 'changed_by', 'note', 'created_at']
+    can_delete = False
+
+def status_action(to_status, label):
+    # One set-based transition for the whole selection (see api.orders)
+    def action(modeladmin, request, queryset):
+        result = transition_orders(queryset.values_list('pk', flat=True), to_status, changed_by=request.user)
+        modeladmin.message_user(request, f"{len(result['updated'])} orders marked {label}.")
+        if result['skipped']:
+            modeladmin.message_user(
+                request, f"{len(result['skipped'])} orders skipped: they can't move to {label} from their current status.",
+                level=messages.WARNING,
+            )
+    action.__name__ = f'mark_{to_status}'
+    action.short_description = f'Mark selected orders as {label}'
+    return action
+
 @admin.register(Category)
 class CategoryAdmin(admin.ModelAdmin):
     list_display = ['name', 'slug']
@@ -30,10 +51,18 @@ class OrderAdmin(admin.ModelAdmin):
     list_display = ['order_id', 'user', 'email', 'total_amount', 'status', 'created_at']
     list_filter = ['status', 'created_at']
     search_fields = ['order_id', 'email', 'user__username']
-    readonly_fields = ['order_id', 'total_amount', 'created_at']
-    inlines = [OrderItemInline]
+    # Status changes go through the actions so every change is logged as an OrderStatusEvent
+    readonly_fields = ['order_id', 'total_amount', 'status', 'created_at']
+    inlines = [OrderItemInline, OrderStatusEventInline]
+    actions = [status_action(status, label.lower()) for status, label in Order.STATUS_CHOICES if ORDER_TRANSITIONS[status]]
 
 @admin.register(CartItem)
 class CartItemAdmin(admin.ModelAdmin):
     list_display = ['user', 'session_id', 'product', 'variant', 'quantity']
     list_filter = ['created_at']
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = ['id', 'name', 'queue', 'status', 'attempts', 'run_at', 'finished_at']
+    list_filter = ['status', 'queue', 'name']
+    readonly_fields = ['locked_at', 'locked_by', 'last_error', 'created_at', 'finished_at']
@@ -0,0 +1,165 @@
+"""
+Daily sales rollups (DailySalesRollup) and the reports built on them.
+
+Rollups are maintained incrementally by the ``update_sales_rollups`` job,
+which checkout and status transitions enqueue with the affected order ids.
+Each order records the status it is currently counted under
+(``Order.rollup_status``); the job moves it from that status to the current
+one with signed deltas, so applying it twice, late, or out of order is
+harmless; rows whose counters drop back to zero are deleted, so a rollup
+row always means at least one order. ``manage.py rebuild_sales_rollups``
+recomputes everything (or a date range) from the order tables. Both paths
+count orders from Order (orders without lines included) and units/revenue
+from OrderItem.
+"""
+
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import connection, transaction
+from django.db.models import Count, DecimalField, ExpressionWrapper, F, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .models import Category, DailySalesRollup, Order, OrderItem, Product
+
+REPORT_DEFAULT_STATUSES = ['pending', 'processing', 'shipped', 'delivered']
+
+LINE_REVENUE = ExpressionWrapper(F('price') * F('quantity'), output_field=DecimalField(max_digits=14, decimal_places=2))
+
+
+def _order_deltas(orders, sign, deltas, lines_by_order):
+    """Accumulate +/- one order's contribution into ``deltas`` keyed (dimension, day, status, key)."""
+    for order_id, day, status in orders:
+        lines = lines_by_order.get(order_id, [])
+        total = deltas[('total', day, status, 0)]
+        total[0] += sign
+        products, categories = set(), set()
+        for product_id, category_id, units, revenue in lines:
+            total[1] += sign * units
+            total[2] += sign * revenue
+            for dimension, key, seen in (('product', product_id, products), ('category', category_id, categories)):
+                row = deltas[(dimension, day, status, key)]
+                if key not in seen:  # Distinct orders per product/category
+                    seen.add(key)
+                    row[0] += sign
+                row[1] += sign * units
+                row[2] += sign * revenue
+
+
+def _apply_deltas(deltas):
+    rows = [(dimension, key, day, status, orders, units, revenue)
+            for (dimension, day, status, key), (orders, units, revenue) in deltas.items()
+            if orders or units or revenue]
+    if not rows:
+        return
+    if connection.vendor in ('postgresql', 'sqlite'):
+        table = connection.ops.quote_name(DailySalesRollup._meta.db_table)
+        with connection.cursor() as cursor:
+            cursor.executemany(
+                f'INSERT INTO {table} (dimension, "key", day, status, orders, units, revenue) '
+                'VALUES (%s, %s, %s, %s, %s, %s, %s) '
+                'ON CONFLICT (dimension, day, status, "key") DO UPDATE SET '
+                f'orders = {table}.orders + EXCLUDED.orders, '
+                f'units = {table}.units + EXCLUDED.units, '
+                f'revenue = {table}.revenue + EXCLUDED.revenue',
+                [(d, k, day, s, o, u, str(r)) for d, k, day, s, o, u, r in rows],
+            )
+        return
+    for dimension, key, day, status, orders, units, revenue in rows:
+        lookup = {'dimension': dimension, 'key': key, 'day': day, 'status': status}
+        if not DailySalesRollup.objects.filter(**lookup).update(
+                orders=F('orders') + orders, units=F('units') + units, revenue=F('revenue') + revenue):
+            DailySalesRollup.objects.create(orders=orders, units=units, revenue=revenue, **lookup)
+
+
+def apply_order_rollups(order_ids):
+    """Bring the rollups in line with the current status of ``order_ids``. Returns orders moved."""
+    with transaction.atomic():
+        orders = list(
+            Order.objects.filter(pk__in=order_ids).exclude(rollup_status=F('status'))
+            .select_for_update().order_by('pk').values_list('pk', 'created_at', 'status', 'rollup_status')
+        )
+        if not orders:
+            return 0
+
+        lines_by_order = defaultdict(list)
+        for order_id, product_id, category_id, units, revenue in (
+            OrderItem.objects.filter(order__in=[pk for pk, *_ in orders])
+            .values('order_id', 'product_id', 'product__category_id')
+            .annotate(units=Sum('quantity'), revenue=Sum(LINE_REVENUE))
+            .values_list('order_id', 'product_id', 'product__category_id', 'units', 'revenue')
+        ):
+            lines_by_order[order_id].append((product_id, category_id, units, revenue))
+
+        deltas = defaultdict(lambda: [0, 0, Decimal('0')])
+        days = {pk: timezone.localdate(created_at) for pk, created_at, _, _ in orders}
+        _order_deltas([(pk, days[pk], old) for pk, _, _, old in orders if old], -1, deltas, lines_by_order)
+        _order_deltas([(pk, days[pk], new) for pk, _, new, _ in orders], +1, deltas, lines_by_order)
+        _apply_deltas(deltas)
+        # An order that moved away leaves its old rows at zero; drop them so reports never list them
+        DailySalesRollup.objects.filter(
+            day__in={day for _, day, _, _ in deltas}, orders=0, units=0, revenue=0,
+        ).delete()
+
+        for status in {new for _, _, new, _ in orders}:
+            Order.objects.filter(pk__in=[pk for pk, _, new, _ in orders if new == status]).update(rollup_status=status)
+    return len(orders)
+
+
+def rebuild_rollups(since=None):
+    """Recompute rollups from the order tables (for days >= ``since``, or all). Returns rows written."""
+    orders = Order.objects.all()
+    if since is not None:
+        orders = orders.filter(created_at__date__gte=since)
+    items = OrderItem.objects.filter(order__in=orders).annotate(day=TruncDate('order__created_at'))
+
+    with transaction.atomic():
+        # Marking (and so locking) the orders first makes a concurrent incremental
+        # job wait for us and then find nothing left to move.
+        orders.update(rollup_status=F('status'))
+        stale = DailySalesRollup.objects.all()
+        if since is not None:
+            stale = stale.filter(day__gte=since)
+        stale.delete()
+
+        # Order counts come from Order, as in the incremental path, so orders without lines count too
+        lines = {(r['day'], r['order__status']): r for r in items.values('day', 'order__status').annotate(
+            units=Sum('quantity'), revenue=Sum(LINE_REVENUE),
+        )}
+        totals = orders.order_by().annotate(day=TruncDate('created_at')).values('day', 'status').annotate(orders=Count('pk'))
+        rows = [DailySalesRollup(dimension='total', key=0, day=r['day'], status=r['status'], orders=r['orders'],
+                                 units=lines.get((r['day'], r['status']), {}).get('units') or 0,
+                                 revenue=lines.get((r['day'], r['status']), {}).get('revenue') or 0)
+                for r in totals]
+        for dimension, field in (('product', 'product_id'), ('category', 'product__category_id')):
+            grouped = items.values('day', 'order__status', field).annotate(
+                orders=Count('order', distinct=True), units=Sum('quantity'), revenue=Sum(LINE_REVENUE),
+            )
+            rows += [DailySalesRollup(dimension=dimension, key=r[field], day=r['day'], status=r['order__status'],
+                                      orders=r['orders'], units=r['units'], revenue=r['revenue']) for r in grouped]
+        DailySalesRollup.objects.bulk_create(rows, batch_size=1000)
+    return len(rows)
+
+
+def sales_report(start, end, statuses=None, limit=10):
+    """Totals, daily series and top products/categories for ``start``..``end`` from the rollups only."""
+    rollups = DailySalesRollup.objects.filter(day__range=(start, end), status__in=statuses or REPORT_DEFAULT_STATUSES)
+    sums = {'orders': Sum('orders'), 'units': Sum('units'), 'revenue': Sum('revenue')}
+
+    totals = rollups.filter(dimension='total').aggregate(**sums)
+    daily = list(rollups.filter(dimension='total').values('day').annotate(**sums).order_by('day'))
+    top = {}
+    for dimension, model, label in (('product', Product, 'title'), ('category', Category, 'name')):
+        ranked = list(
+            rollups.filter(dimension=dimension, orders__gt=0).values('key').annotate(**sums).order_by('-revenue', 'key')[:limit]
+        )
+        names = dict(model.objects.filter(pk__in=[r['key'] for r in ranked]).values_list('pk', label))
+        top[dimension] = [{'id': r['key'], 'name': names.get(r['key']), **{k: r[k] for k in sums}} for r in ranked]
+
+    return {
+        'totals': {key: value or 0 for key, value in totals.items()},
+        'daily': daily,
+        'top_products': top['product'],
+        'top_categories': top['category'],
+    }
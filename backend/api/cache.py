@@ -0,0 +1,271 @@
+"""
+Read-through response cache for catalog endpoints.
+
+Entries are keyed by view, normalized query params and a catalog version
+number. The Category/Product/ProductVariant signals bump the version on every
+write, so stale entries are never read again and simply age out. A missing
+version (cold start, eviction, Redis restart) is re-seeded from the clock in
+nanoseconds rather than a fixed number, so it never falls back to a version
+whose entries may still be cached.
+
+The storage backend is pluggable via ``settings.RESPONSE_CACHE``:
+
+* ``api.cache.LocMemLRUBackend`` (default) - per-process LRU with an entry cap.
+* ``api.cache.DjangoCacheBackend`` - any Django cache alias, e.g. a
+  ``django.core.cache.backends.redis.RedisCache`` shared by all workers.
+
+The version lives in the backend, so invalidation only reaches the processes
+that share it: with the per-process LRU, a write in one worker leaves the
+others serving their entries until TIMEOUT. Run more than one worker only
+with a shared backend (``manage.py check --deploy`` warns otherwise).
+
+Misses on the same key are coalesced: one caller computes while the others
+wait for its result (a thread lock within a process, plus a short-lived
+``add()`` lease in the backend across processes).
+"""
+
+import hashlib
+import threading
+import time
+from collections import Counter, OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.module_loading import import_string
+
+CATALOG_VERSION_KEY = 'catalog:version'
+
+
+class LocMemLRUBackend:
+    """In-process LRU cache holding at most ``max_entries`` items."""
+
+    def __init__(self, max_entries=1000):
+        self.max_entries = max_entries
+        self._data = OrderedDict()  # key -> (expires_at or None, value)
+        self._lock = threading.Lock()
+
+    def _live(self, key):
+        item = self._data.get(key)
+        if item is None:
+            return None
+        expires_at, _ = item
+        if expires_at is not None and expires_at <= time.monotonic():
+            del self._data[key]
+            return None
+        self._data.move_to_end(key)
+        return item
+
+    def _store(self, key, value, timeout):
+        expires_at = None if timeout is None else time.monotonic() + timeout
+        self._data[key] = (expires_at, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.max_entries:
+            self._data.popitem(last=False)
+
+    def get(self, key, default=None):
+        with self._lock:
+            item = self._live(key)
+            return default if item is None else item[1]
+
+    def set(self, key, value, timeout=None):
+        with self._lock:
+            self._store(key, value, timeout)
+
+    def add(self, key, value, timeout=None):
+        with self._lock:
+            if self._live(key) is not None:
+                return False
+            self._store(key, value, timeout)
+            return True
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def incr(self, key):
+        with self._lock:
+            item = self._live(key)
+            if item is None:
+                raise ValueError(f'Key {key!r} not found')
+            expires_at, value = item
+            self._data[key] = (expires_at, value + 1)
+            return value + 1
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+class DjangoCacheBackend:
+    """Adapter over a Django cache alias (Redis, Memcached, ...)."""
+
+    def __init__(self, alias='default'):
+        self.cache = caches[alias]
+
+    def get(self, key, default=None):
+        return self.cache.get(key, default)
+
+    def set(self, key, value, timeout=None):
+        self.cache.set(key, value, timeout)
+
+    def add(self, key, value, timeout=None):
+        return self.cache.add(key, value, timeout)
+
+    def delete(self, key):
+        self.cache.delete(key)
+
+    def incr(self, key):
+        return self.cache.incr(key)
+
+    def clear(self):
+        self.cache.clear()
+
+
+class ResponseCache:
+    MISSING = object()
+
+    def __init__(self, backend, timeout=300, lock_timeout=10, wait_timeout=5):
+        self.backend = backend
+        self.timeout = timeout
+        self.lock_timeout = lock_timeout  # Lease on a key being recomputed
+        self.wait_timeout = wait_timeout  # How long waiters poll before computing themselves
+        self._locks = {}
+        self._locks_guard = threading.Lock()
+        self._stats = Counter()
+        self._stats_lock = threading.Lock()
+
+    def _count(self, stat):
+        with self._stats_lock:
+            self._stats[stat] += 1
+
+    def stats(self):
+        with self._stats_lock:
+            stats = dict(self._stats)
+        lookups = stats.get('hits', 0) + stats.get('misses', 0)
+        served = stats.get('hits', 0) + stats.get('coalesced', 0)  # Coalesced misses did not recompute
+        stats['hit_ratio'] = round(served / lookups, 4) if lookups else 0.0
+        return stats
+
+    def reset_stats(self):
+        with self._stats_lock:
+            self._stats.clear()
+
+    # Catalog version -------------------------------------------------------
+
+    def _seed_version(self):
+        # Above any version handed out before (increments are one per write, far slower
+        # than the clock), so entries cached under an earlier version stay unreachable
+        seed = time.time_ns()
+        self.backend.add(CATALOG_VERSION_KEY, seed, None)
+        return self.backend.get(CATALOG_VERSION_KEY, seed)
+
+    def get_version(self):
+        version = self.backend.get(CATALOG_VERSION_KEY)
+        if version is None:
+            version = self._seed_version()
+        return version
+
+    def bump_version(self):
+        try:
+            return self.backend.incr(CATALOG_VERSION_KEY)
+        except ValueError:  # Key missing (cold or evicted cache): a fresh seed is already new
+            return self._seed_version()
+
+    # Read-through ----------------------------------------------------------
+
+    def _key_lock(self, key):
+        with self._locks_guard:
+            lock = self._locks.get(key)
+            if lock is None:
+                lock = self._locks[key] = threading.Lock()
+            return lock
+
+    def _release_key_lock(self, key, lock):
+        with self._locks_guard:
+            if self._locks.get(key) is lock and not lock.locked():
+                del self._locks[key]
+
+    def get_or_compute(self, key, compute, should_cache=lambda value: True, timeout=None):
+        """
+        Return ``(value, hit)``. On a miss ``compute()`` runs at most once per
+        key at a time; concurrent callers for the same key wait for it.
+        """
+        value = self.backend.get(key, self.MISSING)
+        if value is not self.MISSING:
+            self._count('hits')
+            return value, True
+        self._count('misses')
+
+        lock = self._key_lock(key)
+        try:
+            with lock:
+                value = self.backend.get(key, self.MISSING)
+                if value is not self.MISSING:
+                    self._count('coalesced')
+                    return value, True
+                return self._compute_with_lease(key, compute, should_cache, timeout), False
+        finally:
+            self._release_key_lock(key, lock)
+
+    def _compute_with_lease(self, key, compute, should_cache, timeout):
+        lease_key = f'{key}:lease'
+        if not self.backend.add(lease_key, 1, self.lock_timeout):
+            # Another process is computing this key; give it a moment.
+            deadline = time.monotonic() + self.wait_timeout
+            while time.monotonic() < deadline:
+                time.sleep(0.05)
+                value = self.backend.get(key, self.MISSING)
+                if value is not self.MISSING:
+                    self._count('coalesced')
+                    return value
+            self._count('lease_timeouts')
+            lease_key = None
+        try:
+            self._count('computes')
+            value = compute()
+            if should_cache(value):
+                self.backend.set(key, value, self.timeout if timeout is None else timeout)
+            return value
+        finally:
+            if lease_key is not None:
+                self.backend.delete(lease_key)
+
+
+_response_cache = None
+_response_cache_lock = threading.Lock()
+
+
+def get_response_cache():
+    global _response_cache
+    if _response_cache is None:
+        with _response_cache_lock:
+            if _response_cache is None:
+                config = getattr(settings, 'RESPONSE_CACHE', {})
+                backend_class = import_string(config.get('BACKEND', 'api.cache.LocMemLRUBackend'))
+                backend = backend_class(**config.get('OPTIONS', {}))
+                _response_cache = ResponseCache(backend, timeout=config.get('TIMEOUT', 300))
+    return _response_cache
+
+
+def reset_response_cache():
+    global _response_cache
+    with _response_cache_lock:
+        _response_cache = None
+
+
+def get_catalog_version():
+    return get_response_cache().get_version()
+
+
+def bump_catalog_version():
+    return get_response_cache().bump_version()
+
+
+def params_signature(params, keys=None):
+    """Stable digest of query parameters (``keys`` only, if given); order and blanks are ignored."""
+    parts = []
+    for key in sorted(params.keys() if keys is None else keys):
+        values = sorted(value for value in params.getlist(key) if value != '')
+        if values:
+            parts.append(f'{key}={",".join(values)}')
+    return hashlib.sha1('&'.join(parts).encode()).hexdigest()
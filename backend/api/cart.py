@@ -0,0 +1,288 @@
+"""
+Cart persistence helpers.
+
+``merge_guest_cart`` folds a guest cart into a user's cart on login with a
+fixed number of set-based statements.
+
+``annotate_line_totals`` / ``cart_summary`` price a cart in SQL with exact
+decimals (effective_price is discount_price when set, else price).
+
+``apply_cart_operations`` applies a batch of add/set/remove operations with
+bulk statements in one transaction (POST /api/cart/batch/).
+
+``upsert_cart_item`` adds to a cart line in one statement:
+``INSERT ... ON CONFLICT (owner, product, COALESCE(variant, 0)) DO UPDATE
+SET quantity = quantity + EXCLUDED.quantity RETURNING ...`` against the
+partial unique constraints on CartItem. It works on PostgreSQL and SQLite
+>= 3.35; other backends (or older SQLite) fall back to an equivalent
+get-or-create inside a transaction.
+"""
+
+from decimal import Decimal
+
+from django.db import IntegrityError, connection, transaction
+from django.db.models import (
+    Case, Count, DecimalField, Exists, ExpressionWrapper, F, IntegerField, OuterRef, Q, Subquery, Sum, Value, When,
+)
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .models import CartItem, Product, ProductVariant
+
+UPSERT_TARGETS = {
+    # owner column -> (conflict target, predicate of the matching partial unique constraint)
+    'user_id': ('("user_id", "product_id", COALESCE("variant_id", 0))', '"user_id" IS NOT NULL'),
+    'session_id': ('("session_id", "product_id", COALESCE("variant_id", 0))',
+                   '("session_id" IS NOT NULL AND "user_id" IS NULL)'),
+}
+
+
+MONEY = DecimalField(max_digits=12, decimal_places=2)
+ZERO = Decimal('0.00')
+
+
+def _line_amount(price_field):
+    return ExpressionWrapper(F(price_field) * F('quantity'), output_field=MONEY)
+
+
+def annotate_line_totals(queryset):
+    """Per-line unit price, total and savings (``line_*``), computed by the database."""
+    return queryset.annotate(
+        line_unit_price=F('product__effective_price'),
+        line_total=_line_amount('product__effective_price'),
+        line_savings=ExpressionWrapper(
+            (F('product__price') - F('product__effective_price')) * F('quantity'), output_field=MONEY,
+        ),
+    )
+
+
+def cart_summary(queryset):
+    """Line/item counts, subtotal, undiscounted subtotal and savings of a cart in one aggregate query."""
+    zero = Value(ZERO, output_field=MONEY)
+    summary = queryset.order_by().aggregate(
+        line_count=Count('pk'),
+        item_count=Coalesce(Sum('quantity'), 0),
+        subtotal=Coalesce(Sum(_line_amount('product__effective_price')), zero),
+        original_subtotal=Coalesce(Sum(_line_amount('product__price')), zero),
+    )
+    summary['savings'] = summary['original_subtotal'] - summary['subtotal']
+    return summary
+
+
+def summarize_lines(lines):
+    """cart_summary for lines already in memory (guest carts from api.guest_cart)."""
+    subtotal = sum((item.product.effective_price * item.quantity for item in lines), ZERO)
+    original_subtotal = sum((item.product.price * item.quantity for item in lines), ZERO)
+    return {
+        'line_count': len(lines),
+        'item_count': sum(item.quantity for item in lines),
+        'subtotal': subtotal,
+        'original_subtotal': original_subtotal,
+        'savings': original_subtotal - subtotal,
+    }
+
+
+def supports_single_statement_upsert():
+    features = connection.features
+    return features.supports_update_conflicts_with_target and features.can_return_columns_from_insert
+
+
+def _upsert_sql(owner_column):
+    target, predicate = UPSERT_TARGETS[owner_column]
+    table = connection.ops.quote_name(CartItem._meta.db_table)
+    return (
+        f'INSERT INTO {table} ("user_id", "session_id", "product_id", "variant_id", "quantity", "created_at") '
+        f'VALUES (%s, %s, %s, %s, %s, %s) '
+        f'ON CONFLICT {target} WHERE {predicate} '
+        f'DO UPDATE SET "quantity" = {table}."quantity" + EXCLUDED."quantity" '
+        f'RETURNING "id", "quantity", "created_at"'
+    )
+
+
+def upsert_cart_item(product, variant, quantity, user=None, session_id=None):
+    """
+    Add ``quantity`` of ``product``/``variant`` to the user's (or guest
+    session's) cart and return the resulting CartItem. ``product`` and
+    ``variant`` are attached to the instance so serializing it needs no
+    further queries.
+    """
+    if user is None and not session_id:
+        raise ValueError('A user or a session_id is required')
+    owner_column = 'user_id' if user is not None else 'session_id'
+    user_id = user.pk if user is not None else None
+    session_id = None if user is not None else session_id
+    variant_id = variant.pk if variant is not None else None
+
+    if supports_single_statement_upsert():
+        with connection.cursor() as cursor:
+            cursor.execute(
+                _upsert_sql(owner_column),
+                [user_id, session_id, product.pk, variant_id, quantity, timezone.now()],
+            )
+            pk, total, created_at = cursor.fetchone()
+        if isinstance(created_at, str):  # SQLite returns raw column text
+            created_at = CartItem._meta.get_field('created_at').to_python(created_at)
+    else:
+        pk, total, created_at = _get_or_create_and_add(user_id, session_id, product, variant_id, quantity)
+
+    item = CartItem(
+        pk=pk, user_id=user_id, session_id=session_id, product=product, variant=variant,
+        quantity=total, created_at=created_at,
+    )
+    item._state.adding = False
+    return item
+
+
+def _get_or_create_and_add(user_id, session_id, product, variant_id, quantity):
+    lookup = {'user_id': user_id, 'session_id': session_id, 'product': product, 'variant_id': variant_id}
+    for _ in range(2):
+        try:
+            with transaction.atomic():
+                item, created = CartItem.objects.select_for_update().get_or_create(
+                    **lookup, defaults={'quantity': quantity}
+                )
+                if not created:
+                    CartItem.objects.filter(pk=item.pk).update(quantity=F('quantity') + quantity)
+                    item.quantity += quantity
+                return item.pk, item.quantity, item.created_at
+        except IntegrityError:  # Lost an insert race; the row exists now
+            continue
+    raise IntegrityError('Could not add cart line')
+
+
+class CartBatchError(Exception):
+    def __init__(self, errors):
+        super().__init__('Invalid cart operations')
+        self.errors = errors  # {operation index: message}
+
+
+def _owner_filter(user, session_id):
+    if user is not None:
+        return {'user': user}
+    return {'user__isnull': True, 'session_id': session_id}
+
+
+def load_cart_catalog(operations):
+    """Active product ids and {variant id: product id} for every referenced row, in one query."""
+    product_ids = {op['product'] for op in operations if op.get('product') is not None}
+    variant_ids = {op['variant'] for op in operations if op.get('variant') is not None}
+    products = (
+        Product.objects.filter(pk__in=product_ids, is_active=True)
+        .annotate(kind=Value('p'), owner=F('pk')).values_list('kind', 'pk', 'owner').order_by()
+    )
+    variants = (
+        ProductVariant.objects.filter(pk__in=variant_ids, product__is_active=True)
+        .annotate(kind=Value('v'), owner=F('product_id')).values_list('kind', 'pk', 'owner').order_by()
+    )
+    active_products, variant_products = set(), {}
+    for kind, pk, owner in products.union(variants, all=True):
+        if kind == 'p':
+            active_products.add(pk)
+        else:
+            variant_products[pk] = owner
+    return active_products, variant_products
+
+
+def apply_cart_operations(operations, user=None, session_id=None):
+    """
+    Apply a list of ``add`` / ``set`` / ``remove`` operations to one cart in a
+    single transaction with a constant number of statements: one lookup for
+    the referenced products/variants, one locked read of the cart, then at
+    most one DELETE, one UPDATE and one INSERT. Operations address a line by
+    cart item ``id`` or by ``product``/``variant``. Raises CartBatchError with
+    per-operation messages and writes nothing if any operation is invalid.
+    """
+    if user is None and not session_id:
+        raise ValueError('A user or a session_id is required')
+    owner = _owner_filter(user, session_id)
+    errors = {}
+
+    with transaction.atomic():
+        lines = {
+            (product_id, variant_id): [pk, quantity]
+            for pk, product_id, variant_id, quantity in CartItem.objects.filter(**owner)
+            .select_for_update().order_by('pk').values_list('pk', 'product_id', 'variant_id', 'quantity')
+        }
+        line_by_pk = {pk: key for key, (pk, _) in lines.items()}
+        active_products, variant_products = load_cart_catalog(operations)
+
+        desired = {key: quantity for key, (_, quantity) in lines.items()}
+        for index, op in enumerate(operations):
+            if op.get('id') is not None:
+                key = line_by_pk.get(int(op['id'])) if str(op['id']).isdigit() else None
+                if key is None:
+                    errors[index] = 'Cart item not found.'
+                    continue
+            else:
+                product_id, variant_id = op.get('product'), op.get('variant')
+                if product_id not in active_products:
+                    errors[index] = 'Product not found.'
+                    continue
+                if variant_id is not None and variant_products.get(variant_id) != product_id:
+                    errors[index] = 'Variant not found for this product.'
+                    continue
+                key = (product_id, variant_id)
+
+            if op['op'] == 'add':
+                desired[key] = desired.get(key, 0) + op['quantity']
+            elif op['op'] == 'set':
+                desired[key] = op['quantity']
+            else:  # remove
+                desired[key] = 0
+
+        if errors:
+            raise CartBatchError(errors)
+
+        to_delete = [lines[key][0] for key, quantity in desired.items() if quantity <= 0 and key in lines]
+        to_update = {lines[key][0]: quantity for key, quantity in desired.items()
+                     if quantity > 0 and key in lines and lines[key][1] != quantity}
+        now = timezone.now()
+        to_create = [
+            CartItem(user=user, session_id=None if user is not None else session_id,
+                     product_id=product_id, variant_id=variant_id, quantity=quantity, created_at=now)
+            for (product_id, variant_id), quantity in desired.items()
+            if quantity > 0 and (product_id, variant_id) not in lines
+        ]
+
+        if to_delete:
+            CartItem.objects.filter(pk__in=to_delete).delete()
+        if to_update:
+            CartItem.objects.filter(pk__in=to_update).update(quantity=Case(
+                *[When(pk=pk, then=Value(quantity)) for pk, quantity in to_update.items()],
+                output_field=IntegerField(),
+            ))
+        if to_create:
+            CartItem.objects.bulk_create(to_create)
+
+    return CartItem.objects.filter(**owner).select_related('product', 'variant').order_by('pk')
+
+
+def merge_guest_cart(user, session_id):
+    """
+    Move the guest cart ``session_id`` into ``user``'s cart, summing quantities
+    of lines present in both. Runs the same four statements whatever the cart
+    sizes: lock both carts, add guest quantities onto matching user lines,
+    delete those guest lines, re-own the remaining guest lines. Returns the
+    merged cart.
+    """
+    guest_lines = CartItem.objects.filter(**_owner_filter(None, session_id))
+    same_line = guest_lines.filter(product_id=OuterRef('product_id')).annotate(
+        variant_key=Coalesce('variant_id', 0),
+    ).filter(variant_key=Coalesce(OuterRef('variant_id'), 0))
+
+    with transaction.atomic():
+        list(CartItem.objects.filter(Q(user=user) | Q(**_owner_filter(None, session_id)))
+             .select_for_update().order_by('pk').values_list('pk', flat=True))
+
+        CartItem.objects.filter(user=user).filter(Exists(same_line)).update(
+            quantity=F('quantity') + Subquery(
+                same_line.values('product_id').annotate(total=Sum('quantity')).values('total')[:1]
+            ),
+        )
+        user_lines = CartItem.objects.filter(user=user).annotate(variant_key=Coalesce('variant_id', 0)).filter(
+            product_id=OuterRef('product_id'), variant_key=Coalesce(OuterRef('variant_id'), 0),
+        )
+        guest_lines.filter(Exists(user_lines)).delete()
+        guest_lines.update(user=user, session_id=None)
+
+    return CartItem.objects.filter(user=user).select_related('product', 'variant').order_by('pk')
@@ -0,0 +1,303 @@
+"""
+Incremental catalog sync from a supplier feed (``manage.py sync_catalog``).
+
+Feeds are either JSON shaped like data.json (a ``products`` array with nested
+``variants``, streamed with api.importer) or CSV with one row per variant and
+the product columns repeated::
+
+    slug,title,category,description,price,discount_price,inventory,image_url,
+    is_featured,is_active,materials,sustainability_rating,size,color,stock,variant_image_url
+
+Products are matched on ``slug`` and variants on (product, size, color).
+Every feed row is normalized to the values it would be stored as and hashed;
+the digest is kept in ``content_hash``, so a row whose hash matches is skipped
+without being written. Per batch, the sync reads the stored hashes with one
+query for products and one for variants, then upserts only new and changed
+rows with ``bulk_create(update_conflicts=True)``.
+
+A malformed product entry is skipped; a malformed variant only drops that
+variant (the product still syncs), as in api.importer.
+
+Variants missing from a product's feed entry are set to stock 0, and with
+``prune`` products missing from the whole feed are deactivated. Neither is
+deleted, because order lines reference both with CASCADE. Each batch commits
+on its own, so a long sync holds no long-lived locks. A failed run can simply
+be repeated, because the rows it already applied now match their hashes.
+"""
+
+import csv
+import hashlib
+import json
+from collections import defaultdict
+from decimal import Decimal, InvalidOperation
+from itertools import groupby
+
+from django.db import transaction
+from django.utils import timezone
+from django.utils.text import slugify
+
+from . import search
+from .cache import bump_catalog_version
+from .importer import DEFAULT_BATCH_SIZE, batches, iter_json_section
+from .models import Category, Product, ProductVariant
+
+REMOVED = 'removed'  # content_hash of variants/products the feed dropped; never equals a digest
+
+PRODUCT_FIELDS = ['title', 'category_id', 'description', 'price', 'discount_price', 'inventory', 'image_url',
+                  'is_featured', 'is_active', 'materials', 'sustainability_rating']
+VARIANT_FIELDS = ['stock', 'image_url']
+SIZES = {size for size, _ in ProductVariant.SIZE_CHOICES}
+COLOR_LENGTH = ProductVariant._meta.get_field('color').max_length
+IMAGE_URL_LENGTH = ProductVariant._meta.get_field('image_url').max_length
+CENT = Decimal('0.01')
+
+
+def read_json_feed(path):
+    with open(path, encoding='utf-8') as file:
+        yield from iter_json_section(file, 'products')
+
+
+def read_csv_feed(path):
+    with open(path, encoding='utf-8', newline='') as file:
+        rows = csv.DictReader(file)
+        # Rows of one product must be adjacent; a product split across the file is synced twice (last wins)
+        for _, group in groupby(rows, key=lambda row: row.get('slug') or slugify(row.get('title') or '')):
+            group = list(group)
+            product = dict(group[0])
+            product['variants'] = [
+                {'size': row.get('size'), 'color': row.get('color'), 'stock': row.get('stock'),
+                 'image_url': row.get('variant_image_url')}
+                for row in group if row.get('size') or row.get('color')
+            ]
+            yield product
+
+
+FEED_READERS = {'json': read_json_feed, 'csv': read_csv_feed}
+
+
+def content_hash(values):
+    payload = json.dumps(values, sort_keys=True, separators=(',', ':'), default=str)
+    return hashlib.blake2b(payload.encode(), digest_size=16).hexdigest()
+
+
+def _text(value):
+    return '' if value is None else str(value).strip()
+
+
+def _decimal(value, required=False):
+    if value is None or _text(value) == '':
+        if required:
+            raise ValueError('missing price')
+        return None
+    try:
+        return Decimal(_text(value)).quantize(CENT)
+    except InvalidOperation:
+        raise ValueError(f'bad amount {value!r}')
+
+
+def _int(value, default=0):
+    if value is None or _text(value) == '':
+        return default
+    try:
+        return int(_text(value))
+    except ValueError:
+        raise ValueError(f'bad integer {value!r}')
+
+
+def _bool(value, default):
+    if isinstance(value, bool):
+        return value
+    if value is None or _text(value) == '':
+        return default
+    return _text(value).lower() in ('1', 'true', 'yes', 'y', 't')
+
+
+def _normalize_variant(variant):
+    if not isinstance(variant, dict):
+        raise ValueError('not an object')
+    size, color = _text(variant.get('size')).upper(), _text(variant.get('color'))
+    if size not in SIZES or not color or len(color) > COLOR_LENGTH:
+        raise ValueError(f'bad size/color {size!r}/{color!r}')
+    stock, image_url = _int(variant.get('stock')), _text(variant.get('image_url')) or None
+    if stock < 0:
+        raise ValueError(f'bad stock {stock!r}')
+    if image_url and len(image_url) > IMAGE_URL_LENGTH:
+        raise ValueError('image_url is too long')
+    return (size, color), {'stock': stock, 'image_url': image_url}
+
+
+def normalize_product(data, categories, skip_variant=None):
+    """
+    Feed entry -> (slug, stored product values, {(size, color): variant values});
+    ValueError if the product is unusable. A bad variant only drops that variant,
+    reported as ``skip_variant(slug, variant, reason)`` (as load_sample_data does).
+    """
+    if not isinstance(data, dict):
+        raise ValueError('not an object')
+    title = _text(data.get('title'))
+    if not title:
+        raise ValueError('missing title')
+    category = data.get('category')
+    category_id = categories.get(_int(category, None) if _text(category).isdigit() else _text(category))
+    if category_id is None:
+        raise ValueError(f'category {category!r} not found')
+
+    values = {
+        'title': title,
+        'category_id': category_id,
+        'description': _text(data.get('description')),
+        'price': _decimal(data.get('price'), required=True),
+        'discount_price': _decimal(data.get('discount_price')),
+        'inventory': _int(data.get('inventory')),
+        'image_url': _text(data.get('image_url')),
+        'is_featured': _bool(data.get('is_featured'), False),
+        'is_active': _bool(data.get('is_active'), True),
+        'materials': _text(data.get('materials')),
+        'sustainability_rating': _int(data.get('sustainability_rating')),
+    }
+    slug = _text(data.get('slug')) or slugify(title)
+    variants = {}
+    for variant in data.get('variants') or []:
+        try:
+            key, variant_values = _normalize_variant(variant)
+        except ValueError as e:
+            if skip_variant:
+                skip_variant(slug, variant, e)
+            continue
+        variants[key] = variant_values
+    return slug, values, variants
+
+
+class CatalogSync:
+    """
+    Applies one feed. ``run(entries)`` returns counts per outcome; ``warn(message)``
+    receives skipped entries. ``dry_run`` only counts, ``full`` ignores the stored
+    hashes and rewrites every row, ``prune`` deactivates products not in the feed.
+    """
+
+    def __init__(self, batch_size=DEFAULT_BATCH_SIZE, dry_run=False, full=False, prune=False, warn=None):
+        self.batch_size = batch_size
+        self.dry_run = dry_run
+        self.full = full
+        self.prune = prune
+        self.warn = warn or (lambda message: None)
+        self.stats = defaultdict(int)
+        self.seen = set()  # Product pks in the feed (for prune)
+        self.unreadable = set()  # Slugs of skipped entries; prune leaves those products alone
+
+    def run(self, entries):
+        categories = {}
+        for pk, slug in Category.objects.values_list('pk', 'slug'):
+            categories[pk] = categories[slug] = pk
+
+        for batch in batches(entries, self.batch_size):
+            self._sync_batch(batch, categories)
+        if self.prune:
+            self._prune()
+
+        changed = any(self.stats[key] for key in (
+            'products_inserted', 'products_updated', 'products_deactivated',
+            'variants_inserted', 'variants_updated', 'variants_removed',
+        ))
+        if changed and not self.dry_run:
+            # Bulk writes skip the catalog signals
+            bump_catalog_version()
+            search.reset_fallback_index()
+        return dict(self.stats)
+
+    def _sync_batch(self, batch, categories):
+        feed = {}
+        for data in batch:
+            try:
+                slug, values, variants = normalize_product(data, categories, self._skip_variant)
+            except ValueError as e:
+                self.stats['skipped'] += 1
+                label = (data.get('slug') or data.get('title')) if isinstance(data, dict) else data
+                if isinstance(data, dict) and (data.get('slug') or data.get('title')):
+                    self.unreadable.add(_text(data.get('slug')) or slugify(_text(data.get('title'))))
+                self.warn(f'  Skipped {label!r}: {e}')
+                continue
+            if slug in feed:
+                self.warn(f'  Duplicate slug {slug!r} in one batch; the last entry wins')
+            feed[slug] = (values, content_hash(values), variants)
+
+        existing = {slug: (pk, digest) for slug, pk, digest in
+                    Product.objects.filter(slug__in=feed).values_list('slug', 'pk', 'content_hash')}
+        stored_variants = defaultdict(dict)  # product pk -> {(size, color): (pk, hash)}
+        for product_id, size, color, pk, digest in ProductVariant.objects.filter(
+                product_id__in=[pk for pk, _ in existing.values()]
+        ).values_list('product_id', 'size', 'color', 'pk', 'content_hash'):
+            stored_variants[product_id][(size, color)] = (pk, digest)
+
+        changed = [slug for slug, (_, digest, _) in feed.items()
+                   if self.full or slug not in existing or existing[slug][1] != digest]
+        self.stats['products_inserted'] += sum(slug not in existing for slug in changed)
+        self.stats['products_updated'] += sum(slug in existing for slug in changed)
+        self.stats['products_unchanged'] += len(feed) - len(changed)
+
+        with transaction.atomic():
+            if changed and not self.dry_run:
+                Product.objects.bulk_create(
+                    [Product(slug=slug, content_hash=feed[slug][1], **feed[slug][0]) for slug in changed],
+                    update_conflicts=True, unique_fields=['slug'],
+                    update_fields=[name.removesuffix('_id') for name in PRODUCT_FIELDS] + ['content_hash', 'updated_at'],
+                )
+            product_ids = {slug: pk for slug, (pk, _) in existing.items()}
+            new = [slug for slug in changed if slug not in existing]
+            if new and not self.dry_run:
+                product_ids.update(Product.objects.filter(slug__in=new).values_list('slug', 'pk'))
+
+            upserts, removed, touched = [], [], set()
+            for slug, (_, _, variants) in feed.items():
+                product_id = product_ids.get(slug)  # None only for new products in a dry run
+                stored = stored_variants.get(product_id, {})
+                for (size, color), values in variants.items():
+                    digest = content_hash(values)
+                    if (size, color) not in stored:
+                        self.stats['variants_inserted'] += 1
+                    elif self.full or stored[(size, color)][1] != digest:
+                        self.stats['variants_updated'] += 1
+                    else:
+                        self.stats['variants_unchanged'] += 1
+                        continue
+                    upserts.append(ProductVariant(product_id=product_id, size=size, color=color,
+                                                  content_hash=digest, **values))
+                    touched.add(product_id)
+                for (size, color), (pk, digest) in stored.items():
+                    if (size, color) not in variants and digest != REMOVED:
+                        removed.append(pk)
+                        touched.add(product_id)
+            self.stats['variants_removed'] += len(removed)
+
+            if not self.dry_run:
+                if upserts:
+                    ProductVariant.objects.bulk_create(
+                        upserts, update_conflicts=True, unique_fields=['product', 'size', 'color'],
+                        update_fields=VARIANT_FIELDS + ['content_hash'],
+                    )
+                if removed:
+                    ProductVariant.objects.filter(pk__in=removed).update(stock=0, content_hash=REMOVED)
+                # Variant changes move the product's Last-Modified/ETag, as the variant signals do
+                variant_only = touched - {product_ids[slug] for slug in changed}
+                if variant_only:
+                    Product.objects.filter(pk__in=variant_only).update(updated_at=timezone.now())
+                if changed:
+                    search.update_search_vectors(Product.objects.filter(slug__in=changed))
+        if self.prune:
+            self.seen.update(pk for pk in product_ids.values() if pk is not None)
+
+    def _skip_variant(self, slug, variant, reason):
+        self.stats['variants_skipped'] += 1
+        self.warn(f'  Skipped variant {variant!r} of {slug}: {reason}')
+
+    def _prune(self):
+        if not self.seen:
+            self.warn('  Feed matched no products; not deactivating the whole catalog')
+            return
+        active = Product.objects.filter(is_active=True).exclude(slug__in=self.unreadable).values_list('pk', flat=True).iterator(chunk_size=self.batch_size)
+        stale = [pk for pk in active if pk not in self.seen]  # Read fully before writing to the same table
+        self.stats['products_deactivated'] += len(stale)
+        if self.dry_run:
+            return
+        for chunk in batches(stale, self.batch_size):
+            Product.objects.filter(pk__in=chunk).update(is_active=False, content_hash=REMOVED, updated_at=timezone.now())
@@ -0,0 +1,166 @@
+"""
+Checkout: turn a user's cart into an Order in one transaction.
+
+Follow-up work (confirmation email, cache/stock sync, sales rollups) is
+enqueued as Job rows in the same transaction and handled by
+``manage.py run_jobs``.
+
+Stock is reserved with set-based conditional UPDATEs
+(``SET stock = stock - qty WHERE id IN (...) AND stock >= qty``) - one
+statement for variants and one for product inventory - so concurrent
+checkouts cannot oversell and nothing is read-modified-written in Python.
+A line with a variant takes from ``ProductVariant.stock`` only;
+``Product.inventory`` covers lines without one.
+If any row cannot cover its quantity the whole transaction rolls back and
+the caller gets the per-item shortages.
+"""
+
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Case, F, IntegerField, Value, When
+from django.db.models.functions import Now
+
+from .jobs import enqueue_many
+from .models import CartItem, Order, OrderItem, Product, ProductVariant
+
+
+class CheckoutError(Exception):
+    pass
+
+
+class EmptyCart(CheckoutError):
+    pass
+
+
+class InsufficientStock(CheckoutError):
+    def __init__(self, shortages):
+        super().__init__('Insufficient stock')
+        self.shortages = shortages
+
+
+class _ReservationFailed(Exception):
+    pass
+
+
+def _quantity_case(quantities):
+    return Case(
+        *[When(pk=pk, then=Value(qty)) for pk, qty in quantities.items()],
+        output_field=IntegerField(),
+    )
+
+
+def _reserve(queryset, column, quantities, extra_updates=None):
+    """
+    Decrement ``column`` by ``quantities[pk]`` for every pk, only where enough
+    is left. Returns True when every row was updated.
+    """
+    if not quantities:
+        return True
+    # Lock rows in primary-key order first so concurrent multi-row reservations
+    # cannot deadlock (no-op on SQLite, which serializes writers anyway).
+    list(queryset.select_for_update().filter(pk__in=quantities).order_by('pk').values_list('pk', flat=True))
+    needed = _quantity_case(quantities)
+    updated = queryset.filter(pk__in=quantities, **{f'{column}__gte': needed}).update(
+        **{column: F(column) - needed}, **(extra_updates or {})
+    )
+    return updated == len(quantities)
+
+
+def _shortages(items, variant_qty, product_qty):
+    variant_stock = dict(ProductVariant.objects.filter(pk__in=variant_qty).values_list('pk', 'stock'))
+    product_stock = dict(Product.objects.filter(pk__in=product_qty).values_list('pk', 'inventory'))
+    shortages = []
+    for item in items:
+        if item.variant_id is not None:
+            available, needed = variant_stock.get(item.variant_id, 0), variant_qty[item.variant_id]
+        else:
+            available, needed = product_stock.get(item.product_id, 0), product_qty[item.product_id]
+        if available >= needed:
+            continue
+        shortages.append({
+            'cart_item': item.pk,
+            'product': item.product_id,
+            'variant': item.variant_id,
+            'requested': item.quantity,
+            'available': available,
+        })
+    return shortages
+
+
+def place_order(user, email, shipping_address):
+    """
+    Create an Order from ``user``'s cart, reserve stock and clear the cart.
+    Raises EmptyCart or InsufficientStock; nothing is written in either case.
+    """
+    try:
+        with transaction.atomic():
+            # Locking the cart rows makes a concurrent second checkout of the same
+            # cart wait, then find it empty, instead of ordering it twice.
+            items = list(
+                CartItem.objects.filter(user=user)
+                .select_related('product', 'variant')
+                .select_for_update(of=('self',))
+                .order_by('pk')
+            )
+            if not items:
+                raise EmptyCart('Cart is empty')
+
+            variant_qty = defaultdict(int)
+            product_qty = defaultdict(int)
+            for item in items:
+                if item.variant_id is not None:
+                    variant_qty[item.variant_id] += item.quantity
+                    product_qty[item.product_id] += 0  # Still locked and touched, for its ETag
+                else:
+                    product_qty[item.product_id] += item.quantity
+
+            if not (_reserve(ProductVariant.objects.all(), 'stock', variant_qty)
+                    and _reserve(Product.objects.all(), 'inventory', product_qty,
+                                 extra_updates={'updated_at': Now()})):  # Moves product ETags
+                raise _ReservationFailed
+
+            total_amount = Decimal('0')
+            order_items = []
+            for item in items:
+                unit_price = item.product.price
+                if item.product.discount_price is not None:
+                    unit_price = item.product.discount_price
+                total_amount += unit_price * item.quantity
+                order_items.append(OrderItem(
+                    product=item.product,
+                    variant=item.variant,
+                    quantity=item.quantity,
+                    price=unit_price,
+                    # Snapshot, so order reads never join back to today's catalog
+                    product_title=item.product.title,
+                    product_image=item.product.image_url,
+                    size=item.variant.size if item.variant else None,
+                    color=item.variant.color if item.variant else None,
+                ))
+
+            order = Order.objects.create(
+                user=user,
+                email=email,
+                shipping_address=shipping_address,
+                total_amount=total_amount,
+                status='pending',
+            )
+            for order_item in order_items:
+                order_item.order = order
+            OrderItem.objects.bulk_create(order_items)
+
+            CartItem.objects.filter(pk__in=[item.pk for item in items]).delete()
+
+            # Side effects run in `manage.py run_jobs`, not on the request; queued in
+            # this transaction so they exist exactly when the order does.
+            enqueue_many([
+                ('send_order_confirmation', {'order_id': order.pk}),
+                ('sync_stock', {'order_id': order.pk}),
+                ('update_sales_rollups', {'order_ids': [order.pk]}),
+            ])
+    except _ReservationFailed:
+        # Rolled back; report against the committed stock levels
+        raise InsufficientStock(_shortages(items, variant_qty, product_qty))
+    return order
@@ -0,0 +1,17 @@
+from django.conf import settings
+from django.core.checks import Tags, Warning, register
+
+
+@register(Tags.caches, deploy=True)
+def check_response_cache_shared(app_configs, **kwargs):
+    """The catalog version only invalidates the processes that share the response cache backend."""
+    backend = getattr(settings, 'RESPONSE_CACHE', {}).get('BACKEND', 'api.cache.LocMemLRUBackend')
+    if backend != 'api.cache.LocMemLRUBackend':
+        return []
+    return [Warning(
+        'The catalog response cache is per process (api.cache.LocMemLRUBackend).',
+        hint='Catalog writes in one worker do not invalidate the others, which serve stale responses and '
+             'facets until RESPONSE_CACHE TIMEOUT. Set REDIS_URL (or a shared RESPONSE_CACHE backend) when '
+             'running more than one worker process.',
+        id='api.W001',
+    )]
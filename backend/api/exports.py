@@ -0,0 +1,124 @@
+"""
+Streaming exports of orders and the catalog as CSV or NDJSON.
+
+Each export is a single ordered JOIN (order + lines, product + variants) read
+with ``.iterator(chunk_size=...)`` - a server-side cursor on PostgreSQL - and
+written out chunk by chunk, so memory stays flat however many rows there are.
+CSV has one row per order line / variant with the parent columns repeated;
+NDJSON has one object per order / product with its lines / variants nested,
+grouped from the same ordered stream.
+
+The same generators back the staff endpoints (StreamingHttpResponse) and
+``manage.py export_data`` (a file or stdout).
+"""
+
+import csv
+from datetime import datetime
+from itertools import groupby
+
+from django.core.serializers.json import DjangoJSONEncoder
+
+from .models import Order, Product
+
+DEFAULT_CHUNK_SIZE = 2000
+FORMATS = {'csv': 'text/csv', 'ndjson': 'application/x-ndjson'}
+
+ORDER_FIELDS = ['order_id', 'created_at', 'updated_at', 'status', 'email', 'user_id', 'total_amount']
+ORDER_LINE_FIELDS = ['product_id', 'variant_id', 'product_title', 'size', 'color', 'quantity', 'price']
+
+PRODUCT_FIELDS = ['id', 'slug', 'title', 'category_id', 'category', 'price', 'discount_price', 'inventory',
+                  'is_active', 'is_featured', 'created_at', 'updated_at']
+VARIANT_FIELDS = ['variant_id', 'size', 'color', 'stock']
+
+
+def export_orders(start=None, end=None, statuses=None):
+    """Order rows joined to their lines (LEFT JOIN, so orders without lines still appear)."""
+    orders = Order.objects.all()
+    if start:
+        orders = orders.filter(created_at__date__gte=start)
+    if end:
+        orders = orders.filter(created_at__date__lte=end)
+    if statuses:
+        orders = orders.filter(status__in=statuses)
+    columns = ORDER_FIELDS + [f'items__{name}' for name in ORDER_LINE_FIELDS]
+    return orders.order_by('pk', 'items__id').values_list('pk', *columns), ORDER_FIELDS, ORDER_LINE_FIELDS, 'items'
+
+
+def export_products(start=None, end=None, statuses=None):
+    """Product rows joined to their variants; ``statuses`` is a subset of ['active', 'inactive']."""
+    products = Product.objects.all()
+    if start:
+        products = products.filter(updated_at__date__gte=start)
+    if end:
+        products = products.filter(updated_at__date__lte=end)
+    if statuses and set(statuses) != {'active', 'inactive'}:
+        products = products.filter(is_active='active' in statuses)
+    columns = [name if name != 'category' else 'category__name' for name in PRODUCT_FIELDS]
+    columns += ['variants__id'] + [f'variants__{name}' for name in VARIANT_FIELDS[1:]]
+    return products.order_by('pk', 'variants__id').values_list('pk', *columns), PRODUCT_FIELDS, VARIANT_FIELDS, 'variants'
+
+
+EXPORTS = {
+    'orders': (export_orders, [choice for choice, _ in Order.STATUS_CHOICES]),
+    'products': (export_products, ['active', 'inactive']),
+}
+
+
+class _Echo:
+    """File-like object whose write() returns the line, for csv.writer in a generator."""
+
+    def write(self, value):
+        return value
+
+
+class _ExportJSONEncoder(DjangoJSONEncoder):
+    """DjangoJSONEncoder, but datetimes keep their microseconds, as in the CSV."""
+
+    def default(self, o):
+        if isinstance(o, datetime):
+            return o.isoformat()
+        return super().default(o)
+
+
+def _csv_value(value):
+    if value is None:
+        return ''
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+def _csv(rows, parent_fields, child_fields):
+    writer = csv.writer(_Echo())
+    yield writer.writerow(parent_fields + child_fields)
+    for _, *values in rows:
+        yield writer.writerow([_csv_value(value) for value in values])
+
+
+def _ndjson(rows, parent_fields, child_fields, children):
+    encoder = _ExportJSONEncoder(separators=(',', ':'))
+    split = len(parent_fields)
+    for _, group in groupby(rows, key=lambda row: row[0]):
+        lines = [row[1:] for row in group]
+        record = dict(zip(parent_fields, lines[0][:split]))
+        record[children] = [dict(zip(child_fields, line[split:])) for line in lines if line[split] is not None]
+        yield encoder.encode(record) + '\n'
+
+
+def stream_export(dataset, fmt, chunk_size=DEFAULT_CHUNK_SIZE, **filters):
+    """Yield the export as text chunks of roughly ``chunk_size`` rows each."""
+    queryset, parent_fields, child_fields, children = EXPORTS[dataset][0](**filters)
+    rows = queryset.iterator(chunk_size=chunk_size)
+    if fmt == 'csv':
+        pieces = _csv(rows, parent_fields, child_fields)
+    else:
+        pieces = _ndjson(rows, parent_fields, child_fields, children)
+
+    buffer = []
+    for piece in pieces:
+        buffer.append(piece)
+        if len(buffer) >= chunk_size:
+            yield ''.join(buffer)
+            buffer = []
+    if buffer:
+        yield ''.join(buffer)
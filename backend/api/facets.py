@@ -0,0 +1,103 @@
+"""
+Facet counts for the product FilterSidebar.
+
+All facets are computed in one SQL statement: a UNION ALL of small GROUP BY
+queries over the filtered product set (and its variants for size/color), so
+the database does the counting and only a few dozen rows come back.
+"""
+
+from django.db.models import Case, CharField, Count, Exists, OuterRef, Value, When
+from django.db.models.functions import Cast
+
+from .models import ProductVariant
+
+# (label, lower bound inclusive, upper bound exclusive); None means open-ended.
+# Buckets are contiguous, so only the upper bounds are used when grouping.
+PRICE_BUCKETS = [
+    ('0-25', 0, 25),
+    ('25-50', 25, 50),
+    ('50-100', 50, 100),
+    ('100-200', 100, 200),
+    ('200+', 200, None),
+]
+
+FACETS = ('category', 'sustainability', 'price', 'size', 'color')
+
+
+def price_bucket_expression(field='effective_price'):
+    whens = []
+    for label, low, high in PRICE_BUCKETS:
+        if high is None:
+            continue
+        whens.append(When(**{f'{field}__lt': high}, then=Value(label)))
+    return Case(*whens, default=Value(PRICE_BUCKETS[-1][0]), output_field=CharField())
+
+
+def _grouped(queryset, facet, key, count):
+    return (
+        queryset.order_by()
+        .annotate(facet=Value(facet, output_field=CharField()), key=Cast(key, CharField()))
+        .values('facet', 'key')
+        .annotate(count=count)
+        .values_list('facet', 'key', 'count')
+    )
+
+
+def compute_facets(products):
+    """Return facet counts for the products in ``products`` (any filtered queryset)."""
+    products = products.order_by()
+    product_ids = products.values('pk')
+    variants = ProductVariant.objects.filter(product__in=product_ids)
+
+    parts = [
+        _grouped(products, 'total', Value(''), Count('pk')),
+        _grouped(products, 'category', 'category__slug', Count('pk')),
+        _grouped(products, 'sustainability', 'sustainability_rating', Count('pk')),
+        _grouped(products, 'price', price_bucket_expression(), Count('pk')),
+        _grouped(variants, 'size', 'size', Count('product', distinct=True)),
+        _grouped(variants, 'color', 'color', Count('product', distinct=True)),
+    ]
+    rows = parts[0].union(*parts[1:], all=True)
+
+    result = {'total': 0, **{facet: {} for facet in FACETS}}
+    for facet, key, count in rows:
+        if facet == 'total':
+            result['total'] = count
+        else:
+            result[facet][key] = count
+
+    bucket_bounds = {label: (low, high) for label, low, high in PRICE_BUCKETS}
+    return {
+        'total': result['total'],
+        'category': _as_list(result['category']),
+        'sustainability': sorted(
+            ({'value': int(key), 'count': count} for key, count in result['sustainability'].items()),
+            key=lambda item: -item['value'],
+        ),
+        'price': [
+            {'value': label, 'min': bucket_bounds[label][0], 'max': bucket_bounds[label][1],
+             'count': result['price'].get(label, 0)}
+            for label, _, _ in PRICE_BUCKETS
+        ],
+        'size': _as_list(result['size'], order=[code for code, _ in ProductVariant.SIZE_CHOICES]),
+        'color': _as_list(result['color']),
+    }
+
+
+def _as_list(counts, order=None):
+    if order is not None:
+        rank = {value: position for position, value in enumerate(order)}
+        keys = sorted(counts, key=lambda value: rank.get(value, len(rank)))
+    else:
+        keys = sorted(counts, key=lambda value: (-counts[value], value))
+    return [{'value': key, 'count': counts[key]} for key in keys]
+
+
+def variant_filter(size=None, color=None):
+    """``Exists`` filter for products having a variant in ``size``/``color`` (no row fan-out)."""
+    variants = ProductVariant.objects.filter(product=OuterRef('pk'))
+    if size:
+        variants = variants.filter(size=size)
+    if color:
+        variants = variants.filter(color__iexact=color)
+    return Exists(variants)
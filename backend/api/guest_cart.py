@@ -0,0 +1,265 @@
+"""
+Key-value storage for anonymous (guest) carts.
+
+A guest cart is one compact hash per ``session_id`` - ``"<product>-<variant or 0>"``
+-> quantity - with a sliding TTL refreshed on every write, so abandoned carts
+simply expire instead of piling up in the CartItem table. Authenticated carts
+stay in the database.
+
+The backend comes from ``settings.GUEST_CART_STORE`` (same shape as
+RESPONSE_CACHE). ``BACKEND: None`` keeps guest carts in the database;
+RedisGuestCartBackend is meant for production and LocMemGuestCartBackend is a
+single-process stand-in for development and tests.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+from .cart import CartBatchError, apply_cart_operations, load_cart_catalog
+from .models import CartItem, Product, ProductVariant
+
+DEFAULT_TTL = 30 * 24 * 60 * 60
+
+
+class LocMemGuestCartBackend:
+    """In-process store holding at most ``max_carts`` carts (least recently used evicted first)."""
+
+    def __init__(self, ttl=DEFAULT_TTL, max_carts=10000):
+        self.ttl = ttl
+        self.max_carts = max_carts
+        self._carts = OrderedDict()  # session_id -> (expires_at, {field: quantity})
+        self._lock = threading.Lock()
+
+    def _live(self, session_id):
+        item = self._carts.get(session_id)
+        if item is None:
+            return None
+        if item[0] <= time.monotonic():
+            del self._carts[session_id]
+            return None
+        self._carts.move_to_end(session_id)
+        return item[1]
+
+    def _touch(self, session_id, lines):
+        if not lines:
+            self._carts.pop(session_id, None)
+            return
+        self._carts[session_id] = (time.monotonic() + self.ttl, lines)
+        self._carts.move_to_end(session_id)
+        while len(self._carts) > self.max_carts:
+            self._carts.popitem(last=False)
+
+    def get_all(self, session_id):
+        with self._lock:
+            return dict(self._live(session_id) or {})
+
+    def incr(self, session_id, field, amount):
+        with self._lock:
+            lines = self._live(session_id) or {}
+            lines[field] = lines.get(field, 0) + amount
+            self._touch(session_id, lines)
+            return lines[field]
+
+    def set_many(self, session_id, mapping):
+        """Set quantities; a quantity <= 0 removes the line."""
+        with self._lock:
+            lines = self._live(session_id) or {}
+            for field, quantity in mapping.items():
+                if quantity > 0:
+                    lines[field] = quantity
+                else:
+                    lines.pop(field, None)
+            self._touch(session_id, lines)
+
+    def delete(self, session_id):
+        with self._lock:
+            self._carts.pop(session_id, None)
+
+
+class RedisGuestCartBackend:
+    """One Redis hash per cart (HINCRBY/HSET/HDEL), expiring ``ttl`` seconds after the last write."""
+
+    def __init__(self, location, ttl=DEFAULT_TTL, key_prefix='guest-cart:'):
+        import redis  # Only needed when this backend is configured
+
+        self.ttl = ttl
+        self.key_prefix = key_prefix
+        self._client = redis.Redis.from_url(location)
+
+    def _key(self, session_id):
+        return f'{self.key_prefix}{session_id}'
+
+    def get_all(self, session_id):
+        return {field.decode(): int(quantity) for field, quantity in self._client.hgetall(self._key(session_id)).items()}
+
+    def incr(self, session_id, field, amount):
+        key = self._key(session_id)
+        pipe = self._client.pipeline()
+        pipe.hincrby(key, field, amount)
+        pipe.expire(key, self.ttl)
+        return pipe.execute()[0]
+
+    def set_many(self, session_id, mapping):
+        """Set quantities; a quantity <= 0 removes the line."""
+        key = self._key(session_id)
+        keep = {field: quantity for field, quantity in mapping.items() if quantity > 0}
+        drop = [field for field, quantity in mapping.items() if quantity <= 0]
+        pipe = self._client.pipeline()
+        if keep:
+            pipe.hset(key, mapping=keep)
+        if drop:
+            pipe.hdel(key, *drop)
+        pipe.expire(key, self.ttl)
+        pipe.execute()
+
+    def delete(self, session_id):
+        self._client.delete(self._key(session_id))
+
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def get_guest_cart_backend():
+    """The configured backend, or None when guest carts live in the database."""
+    global _backend
+    config = getattr(settings, 'GUEST_CART_STORE', {})
+    if not config.get('BACKEND'):
+        return None
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                backend_class = import_string(config['BACKEND'])
+                _backend = backend_class(ttl=config.get('TTL', DEFAULT_TTL), **config.get('OPTIONS', {}))
+    return _backend
+
+
+def reset_guest_cart_backend():
+    global _backend
+    with _backend_lock:
+        _backend = None
+
+
+def line_id(product_id, variant_id):
+    return f'{product_id}-{variant_id or 0}'
+
+
+def parse_line_id(value):
+    """``"12-3"`` -> (12, 3), ``"12-0"`` -> (12, None); None if malformed."""
+    try:
+        product_id, variant_id = (int(part) for part in str(value).split('-'))
+    except ValueError:
+        return None
+    return product_id, variant_id or None
+
+
+class GuestCart:
+    """
+    A guest cart in the key-value store. Lines are returned as unsaved CartItem
+    instances whose ``pk`` is the line id, so CartItem serializers can render them.
+    """
+
+    def __init__(self, session_id, backend):
+        self.session_id = session_id
+        self.backend = backend
+
+    def _build_lines(self, quantities):
+        keys = {parse_line_id(field): quantity for field, quantity in quantities.items()}
+        keys.pop(None, None)
+        product_ids = {product_id for product_id, _ in keys}
+        variant_ids = {variant_id for _, variant_id in keys if variant_id is not None}
+        products = Product.objects.filter(is_active=True).in_bulk(product_ids) if product_ids else {}
+        variants = ProductVariant.objects.in_bulk(variant_ids) if variant_ids else {}
+
+        lines = []
+        for (product_id, variant_id), quantity in sorted(keys.items(), key=lambda item: (item[0][0], item[0][1] or 0)):
+            product = products.get(product_id)
+            variant = variants.get(variant_id)
+            if product is None or (variant_id is not None and (variant is None or variant.product_id != product_id)):
+                continue  # Product deactivated/deleted since it was added
+            item = CartItem(session_id=self.session_id, product=product, variant=variant, quantity=quantity)
+            item.pk = line_id(product_id, variant_id)
+            lines.append(item)
+        return lines
+
+    def lines(self):
+        return self._build_lines(self.backend.get_all(self.session_id))
+
+    def get_line(self, pk):
+        key = parse_line_id(pk)
+        if key is None:
+            return None
+        quantity = self.backend.get_all(self.session_id).get(line_id(*key))
+        if quantity is None:
+            return None
+        lines = self._build_lines({line_id(*key): quantity})
+        return lines[0] if lines else None
+
+    def add(self, product, variant, quantity):
+        field = line_id(product.pk, variant.pk if variant else None)
+        item = CartItem(session_id=self.session_id, product=product, variant=variant,
+                        quantity=self.backend.incr(self.session_id, field, quantity))
+        item.pk = field
+        return item
+
+    def set_quantity(self, item, quantity):
+        self.backend.set_many(self.session_id, {item.pk: quantity})
+        item.quantity = quantity
+        return item
+
+    def remove(self, item):
+        self.backend.set_many(self.session_id, {item.pk: 0})
+
+    def clear(self):
+        self.backend.delete(self.session_id)
+
+    def apply_operations(self, operations):
+        """Same contract as api.cart.apply_cart_operations, against the hash."""
+        current = self.backend.get_all(self.session_id)
+        active_products, variant_products = load_cart_catalog(operations)
+        desired, errors = dict(current), {}
+        for index, op in enumerate(operations):
+            if op.get('id') is not None:
+                field = op['id'] if op['id'] in current else None
+                if field is None:
+                    errors[index] = 'Cart item not found.'
+                    continue
+            else:
+                product_id, variant_id = op.get('product'), op.get('variant')
+                if product_id not in active_products:
+                    errors[index] = 'Product not found.'
+                    continue
+                if variant_id is not None and variant_products.get(variant_id) != product_id:
+                    errors[index] = 'Variant not found for this product.'
+                    continue
+                field = line_id(product_id, variant_id)
+
+            if op['op'] == 'add':
+                desired[field] = desired.get(field, 0) + op['quantity']
+            elif op['op'] == 'set':
+                desired[field] = op['quantity']
+            else:  # remove
+                desired[field] = 0
+
+        if errors:
+            raise CartBatchError(errors)
+        changed = {field: quantity for field, quantity in desired.items() if current.get(field, 0) != quantity}
+        if changed:
+            self.backend.set_many(self.session_id, changed)
+        return self._build_lines({field: quantity for field, quantity in desired.items() if quantity > 0})
+
+    def merge_into(self, user):
+        """Add every guest line to ``user``'s database cart in one batch, then drop the guest cart."""
+        operations = [
+            {'op': 'add', 'product': item.product_id, 'variant': item.variant_id, 'quantity': item.quantity}
+            for item in self.lines()
+        ]
+        merged = apply_cart_operations(operations, user=user) if operations else None
+        self.clear()
+        if merged is None:
+            return CartItem.objects.filter(user=user).select_related('product', 'variant').order_by('pk')
+        return merged
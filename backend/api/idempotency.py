@@ -0,0 +1,124 @@
+"""
+``Idempotency-Key`` support for unsafe endpoints (checkout).
+
+The first request with a given key claims it by inserting an IdempotencyKey
+row (unique on user/scope/key) and stores its response when done. Retries
+within the TTL get that stored response replayed; a duplicate that arrives
+while the first is still running waits for it instead of executing again.
+A claim is a lease: if the request that holds it never finishes (worker
+killed or timed out), a retry takes the key over once the claim is older
+than IDEMPOTENCY_KEY_LEASE. Expired rows are removed by
+``manage.py purge_idempotency_keys``.
+"""
+
+import functools
+import hashlib
+import json
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.response import Response
+
+from .models import IdempotencyKey
+
+HEADER = 'Idempotency-Key'
+MAX_KEY_LENGTH = 255
+
+
+def _ttl():
+    return timedelta(seconds=getattr(settings, 'IDEMPOTENCY_KEY_TTL', 24 * 60 * 60))
+
+
+def _lease():
+    return timedelta(seconds=getattr(settings, 'IDEMPOTENCY_KEY_LEASE', 60))
+
+
+def _request_hash(request):
+    body = json.dumps(request.data, sort_keys=True, cls=DjangoJSONEncoder, default=str)
+    return hashlib.sha256(f'{request.method}:{request.path}:{body}'.encode()).hexdigest()
+
+
+def _replay(record):
+    response = Response(record.response_body, status=record.response_status)
+    response['Idempotent-Replayed'] = 'true'
+    return response
+
+
+def _claim(scope, key, user, request_hash):
+    """Insert the in-flight row, or take over an abandoned one; return it, or None if the key is taken."""
+    now = timezone.now()
+    try:
+        with transaction.atomic():
+            return IdempotencyKey.objects.create(
+                scope=scope, key=key, user=user, request_hash=request_hash,
+                claimed_at=now, expires_at=now + _ttl(),
+            )
+    except IntegrityError:
+        pass
+    # Conditional UPDATE, so only one of several concurrent retries wins the lease
+    lookup = {'scope': scope, 'key': key, 'user': user}
+    taken = IdempotencyKey.objects.filter(
+        **lookup, request_hash=request_hash, response_status__isnull=True, claimed_at__lt=now - _lease(),
+    ).update(claimed_at=now, expires_at=now + _ttl())
+    return IdempotencyKey.objects.filter(**lookup, claimed_at=now).first() if taken else None
+
+
+def idempotent(scope, wait_timeout=10.0, poll_interval=0.1):
+    """Decorator for DRF function views honouring the Idempotency-Key header."""
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(request, *args, **kwargs):
+            key = request.headers.get(HEADER)
+            if not key:
+                return view(request, *args, **kwargs)
+            if len(key) > MAX_KEY_LENGTH:
+                return Response({'error': f'{HEADER} must be at most {MAX_KEY_LENGTH} characters.'},
+                                status=status.HTTP_400_BAD_REQUEST)
+
+            user = request.user if request.user.is_authenticated else None
+            request_hash = _request_hash(request)
+            lookup = {'scope': scope, 'key': key, 'user': user}
+
+            deadline = time.monotonic() + wait_timeout
+            while True:
+                record = _claim(scope, key, user, request_hash)
+                if record is not None:
+                    break  # We own the key: execute below
+
+                existing = IdempotencyKey.objects.filter(**lookup).first()
+                if existing is None:
+                    continue  # Deleted (expired/failed) between our insert and read: claim again
+                if existing.expires_at <= timezone.now():
+                    existing.delete()
+                    continue
+                if existing.request_hash != request_hash:
+                    return Response({'error': f'{HEADER} was already used for a different request.'},
+                                    status=status.HTTP_422_UNPROCESSABLE_ENTITY)
+                if existing.response_status is not None:
+                    return _replay(existing)
+                if time.monotonic() >= deadline:
+                    return Response({'error': 'A request with this Idempotency-Key is still in progress.'},
+                                    status=status.HTTP_409_CONFLICT)
+                time.sleep(poll_interval)  # Duplicate of an in-flight request: wait for its result
+
+            # Writes are conditional on our claim: if the lease ran out and a retry took
+            # the key over, the row is the retry's now
+            ours = IdempotencyKey.objects.filter(pk=record.pk, claimed_at=record.claimed_at)
+            try:
+                response = view(request, *args, **kwargs)
+            except Exception:
+                ours.delete()  # Let a retry run the request again
+                raise
+            if response.status_code >= 500:
+                ours.delete()
+                return response
+
+            ours.update(response_status=response.status_code, response_body=response.data)
+            return response
+        return wrapper
+    return decorator
@@ -0,0 +1,352 @@
+"""
+Bulk loader for catalog/sample data files (``manage.py load_sample_data``).
+
+The file is a JSON object of arrays (``categories``, ``users``, ``products``
+with nested ``variants``, ``cartItems``). It is never loaded whole:
+``iter_json_section`` streams one array's elements with an incremental
+decoder, and each section is read in dependency order (categories before the
+products that reference them, and so on), whatever order the file lists them.
+
+Rows are written ``batch_size`` at a time with
+``bulk_create(update_conflicts=True)`` - an upsert on the row's id (username
+for users) - inside one transaction, so a failed load leaves the database as
+it was. References are checked against in-memory id maps and one query per
+batch instead of a lookup per row. Bulk writes skip model signals, so the
+search vectors are refreshed per batch and the catalog cache version is
+bumped once at the end.
+"""
+
+import json
+import re
+import time
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.color import no_style
+from django.db import connection, transaction
+from django.utils.text import slugify
+
+from . import search
+from .cache import bump_catalog_version
+from .models import CartItem, Category, Product, ProductVariant
+
+User = get_user_model()
+
+DEFAULT_BATCH_SIZE = 1000
+READ_SIZE = 1 << 16
+VARIANT_SIZES = {size for size, _ in ProductVariant.SIZE_CHOICES}
+
+_WHITESPACE = re.compile(r'\s*')
+
+
+class _JSONReader:
+    """Incremental tokenizer over a text file: whitespace, punctuation and whole JSON values."""
+
+    def __init__(self, file):
+        self.file = file
+        self.buffer = ''
+        self.pos = 0
+        self.eof = False
+        self.decoder = json.JSONDecoder(parse_float=Decimal)  # Exact prices
+
+    def _fill(self):
+        data = self.file.read(READ_SIZE)
+        if not data:
+            self.eof = True
+            return
+        self.buffer = self.buffer[self.pos:] + data
+        self.pos = 0
+
+    def peek(self):
+        while True:
+            self.pos = _WHITESPACE.match(self.buffer, self.pos).end()
+            if self.pos < len(self.buffer) or self.eof:
+                return self.buffer[self.pos:self.pos + 1]
+            self._fill()
+
+    def expect(self, char):
+        if self.peek() != char:
+            raise ValueError(f'Expected {char!r} in JSON, found {self.peek()!r}')
+        self.pos += 1
+
+    def value(self):
+        self.peek()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buffer, self.pos)
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise
+            else:
+                # A value ending exactly at the buffer end (e.g. a number) may continue in the next read
+                if end < len(self.buffer) or self.eof:
+                    self.pos = end
+                    return value
+            self._fill()
+
+
+def iter_json_section(file, section):
+    """Yield the elements of the top-level ``section`` array of the JSON object in ``file``."""
+    reader = _JSONReader(file)
+    if reader.peek() != '{':
+        raise ValueError('Expected the file to hold a JSON object of arrays, not a list or scalar')
+    reader.expect('{')
+    while reader.peek() != '}':
+        key = reader.value()
+        reader.expect(':')
+        if reader.peek() == '[':
+            reader.expect('[')
+            while reader.peek() != ']':
+                item = reader.value()  # Elements of other sections are decoded and dropped
+                if key == section:
+                    yield item
+                if reader.peek() == ',':
+                    reader.expect(',')
+            reader.expect(']')
+        else:
+            reader.value()
+        if reader.peek() == ',':
+            reader.expect(',')
+    reader.expect('}')
+
+
+def batches(items, size):
+    """Group an iterable into lists of ``size`` (the last may be shorter)."""
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+class SampleDataImporter:
+    """
+    Loads one file. ``log(message)`` receives progress lines and ``warn(message)``
+    skipped rows; ``run()`` returns {section: (loaded, skipped)}, with the
+    nested variants reported as their own ``variants`` entry.
+    """
+
+    SECTIONS = ['categories', 'users', 'products', 'cartItems']
+
+    def __init__(self, path, batch_size=DEFAULT_BATCH_SIZE, log=None, warn=None):
+        self.path = path
+        self.batch_size = batch_size
+        self.log = log or (lambda message: None)
+        self.warn = warn or (lambda message: None)
+        self.category_ids = set()  # Filled from the database once categories are loaded
+        self.user_ids = {}  # id in the file -> database id
+        self.variant_counts = [0, 0]  # Loaded, skipped (nested in products)
+
+    def clear(self):
+        CartItem.objects.all().delete()
+        ProductVariant.objects.all().delete()
+        Product.objects.all().delete()
+        Category.objects.all().delete()
+        User.objects.filter(is_superuser=False, is_staff=False).delete()  # Keep admin/staff users
+
+    def run(self, clear=False):
+        """Load every section in one transaction (after ``clear()`` when asked)."""
+        loaders = {
+            'categories': self.load_categories,
+            'users': self.load_users,
+            'products': self.load_products,
+            'cartItems': self.load_cart_items,
+        }
+        counts = {}
+        with transaction.atomic():
+            if clear:
+                self.clear()
+            for section in self.SECTIONS:
+                if section == 'products':
+                    self.category_ids = set(Category.objects.values_list('pk', flat=True))
+                counts[section] = self._load_section(section, loaders[section])
+                if section == 'products':
+                    counts['variants'] = tuple(self.variant_counts)
+            self._reset_sequences()
+        # Signals were bypassed: drop every cached catalog response and the in-process search index
+        bump_catalog_version()
+        search.reset_fallback_index()
+        return counts
+
+    def _load_section(self, section, loader):
+        loaded = skipped = 0
+        start = time.perf_counter()
+        with open(self.path, encoding='utf-8') as file:
+            for batch in batches(self._objects(iter_json_section(file, section), section), self.batch_size):
+                batch_loaded, batch_skipped = loader(batch)
+                loaded += batch_loaded
+                skipped += batch_skipped
+                elapsed = time.perf_counter() - start
+                self.log(f'  {section}: {loaded} loaded, {skipped} skipped ({loaded / max(elapsed, 1e-6):.0f} rows/s)')
+        return loaded, skipped
+
+    def _objects(self, items, section):
+        for item in items:
+            if isinstance(item, dict):
+                yield item
+            else:
+                self.warn(f'  Skipped {section} entry {item!r}: not a JSON object')
+
+    def _skip(self, section, data, reason):
+        self.warn(f'  Skipped {section} {data.get("id", "N/A")}: {reason}')
+
+    def _reset_sequences(self):
+        # Rows were inserted with explicit ids; move the sequences past them (PostgreSQL)
+        statements = connection.ops.sequence_reset_sql(no_style(), [Category, User, Product, ProductVariant, CartItem])
+        if statements:
+            with connection.cursor() as cursor:
+                for sql in statements:
+                    cursor.execute(sql)
+
+    def load_categories(self, batch):
+        rows = []
+        for data in batch:
+            if not data.get('name'):
+                self._skip('category', data, 'no name')
+                continue
+            rows.append(Category(
+                id=data.get('id'), name=data['name'],
+                slug=data.get('slug') or slugify(data['name']),
+                description=data.get('description', ''),
+            ))
+        Category.objects.bulk_create(rows, update_conflicts=True, unique_fields=['id'],
+                                     update_fields=['name', 'slug', 'description', 'updated_at'])
+        return len(rows), len(batch) - len(rows)
+
+    def load_users(self, batch):
+        valid = []
+        for data in batch:
+            if data.get('username'):
+                valid.append(data)
+            else:
+                self._skip('user', data, 'no username')
+        usernames = [data['username'] for data in valid]
+        existing = set(User.objects.filter(username__in=usernames).values_list('username', flat=True))
+
+        fields = ['email', 'first_name', 'last_name', 'is_staff', 'is_superuser']
+        with_password, keep_password = [], []
+        for data in valid:
+            user = User(
+                username=data['username'],
+                email=data.get('email', ''),
+                first_name=data.get('firstName', ''),
+                last_name=data.get('lastName', ''),
+                is_staff=data.get('isAdmin', False),  # isAdmin -> staff; only 'admin' becomes superuser
+                is_superuser=data['username'] == 'admin' and data.get('isAdmin', False),
+            )
+            if data['username'] not in existing or 'password' in data:
+                user.password = make_password(data.get('password', 'defaultpassword'))  # CHANGE defaultpassword
+                with_password.append(user)
+            else:
+                keep_password.append(user)
+        for users, update_fields in ((with_password, fields + ['password']), (keep_password, fields)):
+            User.objects.bulk_create(users, update_conflicts=True, unique_fields=['username'],
+                                     update_fields=update_fields)
+
+        file_ids = {data['username']: data.get('id') for data in valid}
+        for username, pk in User.objects.filter(username__in=usernames).values_list('username', 'pk'):
+            if file_ids[username] is not None:
+                self.user_ids[file_ids[username]] = pk
+        return len(valid), len(batch) - len(valid)
+
+    def load_products(self, batch):
+        products, variants_by_slug = [], {}
+        for data in batch:
+            if not data.get('title') or data.get('price') is None:
+                self._skip('product', data, 'no title or price')
+                continue
+            if data.get('category') not in self.category_ids:
+                self._skip('product', data, f'category {data.get("category")} not found')
+                continue
+            product = Product(
+                id=data.get('id'),
+                title=data['title'],
+                slug=data.get('slug') or slugify(data['title']),
+                category_id=data['category'],
+                description=data.get('description', ''),
+                price=data['price'],
+                discount_price=data.get('discount_price'),
+                inventory=data.get('inventory', 0),
+                image_url=data.get('image_url', ''),
+                is_featured=data.get('is_featured', False),
+                is_active=data.get('is_active', True),
+                materials=data.get('materials', ''),
+                sustainability_rating=data.get('sustainability_rating', 0),
+            )
+            products.append(product)
+            variants_by_slug[product.slug] = data.get('variants', [])
+
+        Product.objects.bulk_create(products, update_conflicts=True, unique_fields=['id'], update_fields=[
+            'title', 'slug', 'category', 'description', 'price', 'discount_price', 'inventory', 'image_url',
+            'is_featured', 'is_active', 'materials', 'sustainability_rating', 'updated_at',
+        ])
+        product_ids = dict(Product.objects.filter(slug__in=variants_by_slug).values_list('slug', 'pk'))
+
+        variants = []
+        for slug, variant_rows in variants_by_slug.items():
+            for data in variant_rows:
+                reason = self._invalid_variant(data)
+                if reason:
+                    self.variant_counts[1] += 1
+                    self.warn(f'  Skipped variant {data!r} of {slug}: {reason}')
+                    continue
+                variants.append(ProductVariant(
+                    id=data.get('id'), product_id=product_ids[slug], size=data['size'], color=data['color'],
+                    stock=data.get('stock', 0), image_url=data.get('image_url'),
+                ))
+        ProductVariant.objects.bulk_create(variants, update_conflicts=True, unique_fields=['id'],
+                                           update_fields=['product', 'size', 'color', 'stock', 'image_url'])
+        self.variant_counts[0] += len(variants)
+
+        search.update_search_vectors(Product.objects.filter(pk__in=product_ids.values()))
+        return len(products), len(batch) - len(products)
+
+    @staticmethod
+    def _invalid_variant(data):
+        # One bad row must not fail the batch's bulk insert (and with it the whole load)
+        if not isinstance(data, dict) or not data.get('size') or not data.get('color'):
+            return 'no size or color'
+        if data['size'] not in VARIANT_SIZES:
+            return f'size {data["size"]!r} is not one of {", ".join(sorted(VARIANT_SIZES))}'
+        if len(str(data['color'])) > ProductVariant._meta.get_field('color').max_length:
+            return 'color is too long'
+        if len(data.get('image_url') or '') > ProductVariant._meta.get_field('image_url').max_length:
+            return 'image_url is too long'
+        stock = data.get('stock', 0)
+        if not isinstance(stock, int) or isinstance(stock, bool) or stock < 0:
+            return f'bad stock {stock!r}'
+        return None
+
+    def load_cart_items(self, batch):
+        product_ids = set(Product.objects.filter(
+            pk__in={data.get('product') for data in batch}).values_list('pk', flat=True))
+        variant_ids = set(ProductVariant.objects.filter(
+            pk__in={data.get('variant') for data in batch if data.get('variant') is not None}
+        ).values_list('pk', flat=True))
+
+        rows = []
+        for data in batch:
+            if data.get('product') not in product_ids:
+                self._skip('cart item', data, f'product {data.get("product")} not found')
+                continue
+            user_id = None
+            if data.get('user_id') is not None:
+                user_id = self.user_ids.get(data['user_id'])
+                if user_id is None:
+                    self.warn(f'  User {data["user_id"]} not found for cart item {data.get("id", "N/A")}; '
+                              'keeping it as a guest cart item')
+            rows.append(CartItem(
+                id=data.get('id'),
+                user_id=user_id,
+                session_id=data.get('session_id') if user_id is None else None,
+                product_id=data['product'],
+                variant_id=data.get('variant') if data.get('variant') in variant_ids else None,
+                quantity=data.get('quantity', 1),
+            ))
+        CartItem.objects.bulk_create(rows, update_conflicts=True, unique_fields=['id'],
+                                     update_fields=['user', 'session_id', 'product', 'variant', 'quantity'])
+        return len(rows), len(batch) - len(rows)
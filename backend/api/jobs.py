@@ -0,0 +1,132 @@
+"""
+Database-backed job queue.
+
+Jobs are Job rows, so enqueueing inside a transaction (e.g. checkout) commits
+or rolls back together with the data it refers to. ``manage.py run_jobs``
+claims ready jobs - ``SELECT ... FOR UPDATE SKIP LOCKED`` on PostgreSQL, so
+workers never block on or double-claim each other's rows; a conditional
+``UPDATE ... WHERE status = 'queued'`` per row elsewhere (SQLite serializes
+writers anyway) - runs the registered task and records the outcome. Failures
+are retried with exponential backoff up to ``max_attempts``; jobs left
+``running`` by a dead worker are requeued after VISIBILITY_TIMEOUT.
+
+Tasks are plain functions taking the payload dict::
+
+    @task('send_order_confirmation')
+    def send_order_confirmation(payload): ...
+
+    enqueue('send_order_confirmation', {'order_id': order.pk})
+"""
+
+import random
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import Job
+
+DEFAULTS = {
+    'MAX_ATTEMPTS': 5,
+    'BACKOFF_BASE': 10,          # Seconds before the first retry; doubles per attempt
+    'BACKOFF_MAX': 60 * 60,
+    'VISIBILITY_TIMEOUT': 10 * 60,  # A running job older than this is assumed orphaned
+}
+
+_tasks = {}
+
+
+def queue_setting(name):
+    return getattr(settings, 'JOB_QUEUE', {}).get(name, DEFAULTS[name])
+
+
+def task(name):
+    """Register a function as the handler for jobs called ``name``."""
+    def decorator(func):
+        _tasks[name] = func
+        return func
+    return decorator
+
+
+def get_task(name):
+    from . import tasks  # noqa: F401  (registers the built-in tasks)
+    return _tasks.get(name)
+
+
+def enqueue(name, payload=None, queue='default', delay=0, max_attempts=None):
+    return enqueue_many([(name, payload)], queue=queue, delay=delay, max_attempts=max_attempts)[0]
+
+
+def enqueue_many(jobs, queue='default', delay=0, max_attempts=None):
+    """Insert several ``(name, payload)`` jobs with one statement."""
+    run_at = timezone.now() + timedelta(seconds=delay)
+    return Job.objects.bulk_create([
+        Job(queue=queue, name=name, payload=payload or {}, run_at=run_at,
+            max_attempts=max_attempts or queue_setting('MAX_ATTEMPTS'))
+        for name, payload in jobs
+    ])
+
+
+def _ready(queues):
+    jobs = Job.objects.filter(status='queued', run_at__lte=timezone.now())
+    if queues:
+        jobs = jobs.filter(queue__in=queues)
+    return jobs.order_by('run_at', 'id')
+
+
+def claim_jobs(worker_id, limit, queues=None):
+    """Mark up to ``limit`` ready jobs as running for ``worker_id`` and return them."""
+    now = timezone.now()
+    claim = {'status': 'running', 'locked_at': now, 'locked_by': worker_id, 'attempts': F('attempts') + 1}
+
+    if connection.features.has_select_for_update_skip_locked:
+        with transaction.atomic():
+            ids = list(_ready(queues).select_for_update(skip_locked=True).values_list('pk', flat=True)[:limit])
+            if ids:
+                Job.objects.filter(pk__in=ids).update(**claim)
+    else:
+        ids = []
+        for pk in _ready(queues).values_list('pk', flat=True)[:limit]:
+            if Job.objects.filter(pk=pk, status='queued').update(**claim):  # Lost races update 0 rows
+                ids.append(pk)
+    return list(Job.objects.filter(pk__in=ids).order_by('run_at', 'id'))
+
+
+def requeue_orphaned(timeout=None):
+    """Put jobs running longer than the visibility timeout (worker crashed or was killed) back in the queue."""
+    cutoff = timezone.now() - timedelta(seconds=timeout or queue_setting('VISIBILITY_TIMEOUT'))
+    return Job.objects.filter(status='running', locked_at__lt=cutoff).update(
+        status='queued', locked_at=None, locked_by='', run_at=timezone.now(),
+    )
+
+
+def backoff_delay(attempts):
+    delay = min(queue_setting('BACKOFF_BASE') * 2 ** max(attempts - 1, 0), queue_setting('BACKOFF_MAX'))
+    return delay * random.uniform(0.8, 1.2)  # Jitter so retries of a burst spread out
+
+
+def run_job(job):
+    """Run one claimed job and record the result. Returns the new status."""
+    handler = get_task(job.name)
+    try:
+        if handler is None:
+            raise LookupError(f'No task registered as {job.name!r}')
+        handler(job.payload)
+    except Exception:
+        error = traceback.format_exc()
+        if job.attempts < job.max_attempts:
+            status, updates = 'queued', {
+                'run_at': timezone.now() + timedelta(seconds=backoff_delay(job.attempts)),
+                'locked_at': None, 'locked_by': '',
+            }
+        else:
+            status, updates = 'failed', {'finished_at': timezone.now()}
+        # Guarded by locked_by so a job requeued (and re-claimed) meanwhile isn't clobbered
+        Job.objects.filter(pk=job.pk, locked_by=job.locked_by).update(status=status, last_error=error, **updates)
+        return status
+
+    Job.objects.filter(pk=job.pk, locked_by=job.locked_by).update(status='done', finished_at=timezone.now())
+    return 'done'
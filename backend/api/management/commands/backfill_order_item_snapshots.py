@@ -0,0 +1,45 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Max, Min, OuterRef, Subquery
+
+from api.models import OrderItem, Product, ProductVariant
+
+
+class Command(BaseCommand):
+    help = ('Fills the title/image/size/color snapshot columns of order items created before checkout '
+            'wrote them, one set-based UPDATE per primary-key range')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=5000, help='Primary-key range covered by each UPDATE')
+        parser.add_argument('--sleep', type=float, default=0.0, help='Seconds to pause between batches')
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size must be at least 1')
+
+        pending = OrderItem.objects.filter(product_title='')
+        bounds = pending.aggregate(low=Min('pk'), high=Max('pk'))
+        if bounds['low'] is None:
+            self.stdout.write(self.style.SUCCESS('All order items already have snapshots'))
+            return
+
+        product = Product.objects.filter(pk=OuterRef('product_id'))
+        variant = ProductVariant.objects.filter(pk=OuterRef('variant_id'))
+        snapshot = {
+            'product_title': Subquery(product.values('title')[:1]),
+            'product_image': Subquery(product.values('image_url')[:1]),
+            'size': Subquery(variant.values('size')[:1]),  # NULL for items without a variant
+            'color': Subquery(variant.values('color')[:1]),
+        }
+
+        updated = 0
+        for start in range(bounds['low'], bounds['high'] + 1, options['batch_size']):
+            count = pending.filter(pk__gte=start, pk__lt=start + options['batch_size']).update(**snapshot)
+            updated += count
+            if count:
+                self.stdout.write(f'ids {start}-{start + options["batch_size"] - 1}: {count} items ({updated} total)')
+            if options['sleep']:
+                time.sleep(options['sleep'])
+
+        self.stdout.write(self.style.SUCCESS(f'Backfilled {updated} order item snapshots'))
@@ -0,0 +1,272 @@
+import json
+import os
+import platform
+import statistics
+import time
+from datetime import timedelta
+
+import django
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import Count
+from django.test.utils import CaptureQueriesContext
+from django.urls import URLPattern, URLResolver, resolve
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from api import urls as api_urls
+from api.models import Category, Order, Product, ProductVariant
+from api.synthetic import SYNTH_PASSWORD, SYNTH_PREFIX
+
+BASELINE_PATH = os.path.join(settings.BASE_DIR, 'benchmarks', 'api_baseline.json')
+BENCH_SESSION = 'bench-api-session'
+BENCH_STAFF = 'bench-api-staff'
+TRANSACTION_CONTROL = ('SAVEPOINT', 'RELEASE SAVEPOINT', 'ROLLBACK TO SAVEPOINT')
+
+
+def percentile(sorted_values, fraction):
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * fraction))]
+
+
+def route_names(patterns):
+    names = set()
+    for pattern in patterns:
+        if isinstance(pattern, URLResolver):
+            names |= route_names(pattern.url_patterns)
+        elif isinstance(pattern, URLPattern) and pattern.name:
+            names.add(pattern.name)
+    return names
+
+
+class Command(BaseCommand):
+    help = ('Drives every route in api/urls.py through the test client against the synthetic dataset and reports '
+            'latency percentiles, SQL queries and response sizes, optionally against a saved baseline')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeat', type=int, default=30, help='Timed requests per scenario')
+        parser.add_argument('--warmup', type=int, default=3, help='Untimed requests per scenario first')
+        parser.add_argument('--only', action='append', help='Run scenarios whose label contains this (repeatable)')
+        parser.add_argument('--baseline', default=BASELINE_PATH, help='Baseline JSON to compare against')
+        parser.add_argument('--save-baseline', nargs='?', const=BASELINE_PATH, help='Write the results as the baseline')
+        parser.add_argument('--tolerance', type=float, default=0.25, help='Allowed p95 latency growth (0.25 = +25%%)')
+        parser.add_argument('--fail-on-regression', action='store_true', help='Exit non-zero on any regression')
+
+    def handle(self, *args, **options):
+        if options['repeat'] < 1 or options['warmup'] < 0:
+            raise CommandError('--repeat must be at least 1 and --warmup at least 0')
+        if not Category.objects.filter(slug__startswith=SYNTH_PREFIX).exists():
+            raise CommandError('No synthetic data; run `manage.py generate_synthetic_data` first.')
+
+        self.client = APIClient(SERVER_NAME='localhost')
+        results = {}
+        # Fixtures and every request run in one transaction that is rolled back at the
+        # end; writing scenarios also roll back each request, so every run starts equal.
+        with transaction.atomic():
+            fixtures = self.setup_fixtures()
+            scenarios = self.scenarios(fixtures)
+            covered = {resolve(path).url_name for _, _, path, *_ in scenarios}
+            if options['only']:
+                scenarios = [s for s in scenarios if any(term in s[0] for term in options['only'])]
+            for scenario in scenarios:
+                results[scenario[0]] = self.measure(scenario, options['warmup'], options['repeat'])
+                self.report(scenario[0], results[scenario[0]])
+            self.client.delete(f'/api/cart/clear/?session_id={BENCH_SESSION}')  # Key-value guest carts
+            transaction.set_rollback(True)
+
+        missing = sorted(route_names(api_urls.urlpatterns) - covered)
+        if missing:
+            self.stdout.write(self.style.WARNING(f'Routes without a scenario: {", ".join(missing)}'))
+
+        meta = {
+            'database': connection.vendor,
+            'products': Product.objects.filter(slug__startswith=SYNTH_PREFIX).count(),
+            'orders': Order.objects.filter(user__username__startswith=SYNTH_PREFIX).count(),
+            'repeat': options['repeat'],
+            'python': platform.python_version(),
+            'django': django.get_version(),
+        }
+        regressions = self.compare(results, meta, options) if os.path.exists(options['baseline']) else []
+        if options['save_baseline']:
+            os.makedirs(os.path.dirname(os.path.abspath(options['save_baseline'])), exist_ok=True)
+            with open(options['save_baseline'], 'w') as f:
+                json.dump({'meta': meta, 'scenarios': results}, f, indent=2, sort_keys=True)
+                f.write('\n')
+            self.stdout.write(self.style.SUCCESS(f'Baseline written to {options["save_baseline"]}'))
+        if regressions and options['fail_on_regression']:
+            raise CommandError(f'{len(regressions)} regression(s): {", ".join(regressions)}')
+
+    def setup_fixtures(self):
+        # The synthetic user with the most orders, so order history pages are full
+        user_id = (Order.objects.filter(user__username__startswith=SYNTH_PREFIX).values('user')
+                   .annotate(n=Count('id')).order_by('-n', 'user').values_list('user', flat=True).first())
+        if user_id is None:
+            raise CommandError('Synthetic data has no orders; regenerate it with --orders > 0.')
+        user = Order.objects.filter(user_id=user_id).select_related('user').first().user
+        staff = type(user).objects.create_user(BENCH_STAFF, f'{BENCH_STAFF}@example.com', SYNTH_PASSWORD, is_staff=True)
+
+        variants = list(ProductVariant.objects.filter(
+            product__slug__startswith=SYNTH_PREFIX, product__is_active=True, stock__gte=10,
+        ).select_related('product').order_by('pk')[:4])
+        if len(variants) < 4:
+            raise CommandError('Synthetic data has too few in-stock variants; regenerate it with more products.')
+
+        fixtures = {
+            'user': user, 'staff': staff,
+            'user_auth': self.login(user.username), 'staff_auth': self.login(BENCH_STAFF),
+            'variants': variants,
+            'category': variants[0].product.category.slug,
+            'product': variants[0].product.slug,
+            'order': Order.objects.filter(user=user).order_by('-created_at', '-id').first(),
+            'pending': list(Order.objects.filter(user__username__startswith=SYNTH_PREFIX, status='pending')
+                            .order_by('pk').values_list('pk', flat=True)[:100]),
+        }
+        # Carts are seeded through the API so they land wherever guest carts are stored
+        operations = [{'op': 'set', 'product': v.product_id, 'variant': v.pk, 'quantity': 1} for v in variants[:3]]
+        for auth, body in ((None, {'session_id': BENCH_SESSION}), (fixtures['user_auth'], {})):
+            response = self.client.post('/api/cart/batch/', {**body, 'operations': operations}, format='json',
+                                        **self.headers(auth))
+            if response.status_code != 200:
+                raise CommandError(f'Seeding the bench carts failed: {response.status_code} {response.content[:200]!r}')
+        fixtures['line'] = response.json()[0]['id']
+        return fixtures
+
+    def login(self, username):
+        response = self.client.post('/api/auth/login/', {'username': username, 'password': SYNTH_PASSWORD}, format='json')
+        if response.status_code != 200:
+            raise CommandError(f'Could not log in as {username}: {response.status_code}')
+        return f'Bearer {response.json()["token"]}'
+
+    @staticmethod
+    def headers(auth):
+        return {'HTTP_AUTHORIZATION': auth} if auth else {}
+
+    def scenarios(self, fx):
+        """(label, method, path, data, auth, writes) for every route in api/urls.py."""
+        variant = fx['variants'][3]
+        order = fx['order']
+        since = (timezone.localdate() - timedelta(days=7)).isoformat()
+        user, staff = fx['user_auth'], fx['staff_auth']
+        guest = {'session_id': BENCH_SESSION}
+        return [
+            ('api root', 'get', '/api/', None, None, False),
+            ('categories', 'get', '/api/categories/', None, None, False),
+            ('category detail', 'get', f'/api/categories/{fx["category"]}/', None, None, False),
+            ('products', 'get', '/api/products/', None, None, False),
+            ('products filtered', 'get', '/api/products/',
+             {'category': fx['category'], 'min_price': '20', 'max_price': '80', 'sort': 'price_asc'}, None, False),
+            ('products search', 'get', '/api/products/', {'search': 'organic cotton'}, None, False),
+            ('product facets', 'get', '/api/products/facets/', {'category': fx['category']}, None, False),
+            ('product detail', 'get', f'/api/products/{fx["product"]}/', None, None, False),
+            ('guest cart', 'get', '/api/cart/', guest, None, False),
+            ('guest cart summary', 'get', '/api/cart/summary/', guest, None, False),
+            ('user cart', 'get', '/api/cart/', {'summary': 'true'}, user, False),
+            ('cart add', 'post', '/api/cart/', {'product': variant.product_id, 'variant': variant.pk, 'quantity': 1},
+             user, True),
+            ('cart update line', 'patch', f'/api/cart/{fx["line"]}/', {'quantity': 2}, user, True),
+            ('cart batch', 'post', '/api/cart/batch/', {'operations': [
+                {'op': 'add', 'product': v.product_id, 'variant': v.pk, 'quantity': 1} for v in fx['variants']
+            ]}, user, True),
+            ('cart clear', 'delete', '/api/cart/clear/', None, user, True),
+            ('cart merge', 'post', '/api/cart/merge/', guest, user, True),
+            ('cart merge (legacy url)', 'post', '/api/merge-cart/', guest, None, True),
+            ('checkout', 'post', '/api/checkout/', {'shipping_address': '1 Bench Street'}, user, True),
+            ('orders', 'get', '/api/orders/', None, user, False),
+            ('orders summary', 'get', '/api/orders/', {'view': 'summary'}, user, False),
+            ('order detail', 'get', f'/api/orders/{order.pk}/', None, user, False),
+            ('order tracking', 'get', '/api/orders/track/', {'order_id': str(order.order_id), 'email': order.email},
+             None, False),
+            ('bulk status', 'post', '/api/orders/bulk-status/', {'orders': fx['pending'] or [order.pk],
+                                                                 'status': 'processing'}, staff, True),
+            ('login', 'post', '/api/auth/login/', {'username': fx['user'].username, 'password': SYNTH_PASSWORD},
+             None, False),
+            ('register', 'post', '/api/auth/register/',
+             {'username': 'bench-api-new', 'email': 'bench-api-new@example.com', 'password': SYNTH_PASSWORD}, None, True),
+            ('current user', 'get', '/api/auth/user/', None, user, False),
+            ('cache stats', 'get', '/api/cache/stats/', None, staff, False),
+            ('sales analytics', 'get', '/api/analytics/sales/', None, staff, False),
+            ('orders export', 'get', '/api/exports/orders.csv', {'start': since}, staff, False),
+            ('products export', 'get', '/api/exports/products.ndjson', {'status': 'active'}, staff, False),
+        ]
+
+    def request(self, method, path, data, auth):
+        kwargs = self.headers(auth)
+        if method == 'get':
+            response = self.client.get(path, data, **kwargs)
+        else:
+            response = getattr(self.client, method)(path, data, format='json', **kwargs)
+        # Streaming exports do their work while being consumed
+        body = b''.join(response.streaming_content) if response.streaming else response.content
+        return response.status_code, len(body)
+
+    def measure(self, scenario, warmup, repeat):
+        label, method, path, data, auth, writes = scenario
+        timings, query_counts = [], []
+        status_code = size = None
+        for i in range(warmup + repeat):
+            with CaptureQueriesContext(connection) as queries:
+                start = time.perf_counter()
+                if writes:
+                    with transaction.atomic():
+                        status_code, size = self.request(method, path, data, auth)
+                        transaction.set_rollback(True)
+                else:
+                    status_code, size = self.request(method, path, data, auth)
+                elapsed = (time.perf_counter() - start) * 1000
+            if i >= warmup:
+                timings.append(elapsed)
+                query_counts.append(sum(not q['sql'].startswith(TRANSACTION_CONTROL) for q in queries.captured_queries))
+
+        timings.sort()
+        return {
+            'status': status_code,
+            'p50_ms': round(statistics.median(timings), 3),
+            'p95_ms': round(percentile(timings, 0.95), 3),
+            'p99_ms': round(percentile(timings, 0.99), 3),
+            'queries': int(statistics.median(query_counts)),
+            'bytes': size,
+        }
+
+    def report(self, label, result):
+        style = self.style.SUCCESS if 200 <= result['status'] < 300 else self.style.ERROR
+        self.stdout.write(style(
+            f'{label:<26} {result["status"]}   p50 {result["p50_ms"]:8.2f} ms   p95 {result["p95_ms"]:8.2f} ms   '
+            f'p99 {result["p99_ms"]:8.2f} ms   {result["queries"]:3d} queries   {result["bytes"]:9d} bytes'
+        ))
+
+    def compare(self, results, meta, options):
+        with open(options['baseline']) as f:
+            baseline = json.load(f)
+        if baseline.get('meta', {}).get('database') != meta['database'] or \
+                baseline.get('meta', {}).get('products') != meta['products']:
+            self.stdout.write(self.style.WARNING(
+                f'Baseline was recorded on {baseline.get("meta", {}).get("database")} with '
+                f'{baseline.get("meta", {}).get("products")} products; latency deltas are indicative only'
+            ))
+
+        self.stdout.write(f'\nAgainst {options["baseline"]}:')
+        regressions = []
+        for label, result in results.items():
+            before = baseline.get('scenarios', {}).get(label)
+            if before is None:
+                self.stdout.write(f'{label:<26} new scenario')
+                continue
+            problems = []
+            if result['status'] != before['status']:
+                problems.append(f'status {before["status"]} -> {result["status"]}')
+            if result['queries'] > before['queries']:
+                problems.append(f'queries {before["queries"]} -> {result["queries"]}')
+            # Ignore sub-millisecond noise on very fast routes
+            if result['p95_ms'] > before['p95_ms'] * (1 + options['tolerance']) and \
+                    result['p95_ms'] - before['p95_ms'] > 1:
+                problems.append(f'p95 {before["p95_ms"]:.2f} -> {result["p95_ms"]:.2f} ms')
+            if result['bytes'] > before['bytes'] * 1.1 + 100:
+                problems.append(f'size {before["bytes"]} -> {result["bytes"]} bytes')
+
+            change = (result['p95_ms'] - before['p95_ms']) / before['p95_ms'] * 100 if before['p95_ms'] else 0
+            if problems:
+                regressions.append(label)
+                self.stdout.write(self.style.ERROR(f'{label:<26} REGRESSION: {"; ".join(problems)}'))
+            else:
+                self.stdout.write(f'{label:<26} ok   p95 {change:+6.1f}%   queries {before["queries"]} -> {result["queries"]}')
+        return regressions
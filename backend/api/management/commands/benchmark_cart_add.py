@@ -0,0 +1,64 @@
+import random
+import statistics
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import F
+from django.test.utils import CaptureQueriesContext
+
+from api.cart import upsert_cart_item
+from api.models import CartItem, ProductVariant
+
+BENCH_SESSION = 'bench-cart-add'
+
+
+def legacy_add(product, variant, quantity, session_id):
+    # The previous CartItemViewSet.perform_create path, kept for comparison
+    cart_item, created = CartItem.objects.get_or_create(
+        session_id=session_id, product=product, variant=variant, defaults={'quantity': quantity}
+    )
+    if not created:
+        cart_item.quantity = F('quantity') + quantity
+        cart_item.save()
+        cart_item.refresh_from_db()
+    return cart_item
+
+
+class Command(BaseCommand):
+    help = 'Compares round trips and latency of the legacy get_or_create cart add with the single-statement upsert'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--adds', type=int, default=500, help='Cart adds per strategy')
+        parser.add_argument('--lines', type=int, default=10, help='Distinct variants to add (so most adds hit existing lines)')
+        parser.add_argument('--seed', type=int, default=3)
+
+    def handle(self, *args, **options):
+        variants = list(ProductVariant.objects.select_related('product')[:options['lines']])
+        if not variants:
+            raise CommandError('No product variants found; load some data first (e.g. load_sample_data).')
+
+        for label, add in (('legacy get_or_create', legacy_add), ('upsert', self.upsert_add)):
+            rng = random.Random(options['seed'])
+            session_id = f'{BENCH_SESSION}-{label.split()[0]}'
+            CartItem.objects.filter(session_id=session_id).delete()
+
+            timings = []
+            with CaptureQueriesContext(connection) as queries:
+                for _ in range(options['adds']):
+                    variant = rng.choice(variants)
+                    start = time.perf_counter()
+                    add(variant.product, variant, rng.randint(1, 3), session_id)
+                    timings.append((time.perf_counter() - start) * 1000)
+
+            timings.sort()
+            p95 = timings[min(len(timings) - 1, int(len(timings) * 0.95))]
+            self.stdout.write(self.style.SUCCESS(
+                f'{label:<22} {len(queries) / options["adds"]:5.2f} queries/add   '
+                f'median {statistics.median(timings):6.3f} ms   p95 {p95:6.3f} ms'
+            ))
+            CartItem.objects.filter(session_id=session_id).delete()
+
+    @staticmethod
+    def upsert_add(product, variant, quantity, session_id):
+        return upsert_cart_item(product, variant, quantity, session_id=session_id)
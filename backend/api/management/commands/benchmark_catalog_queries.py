@@ -0,0 +1,150 @@
+import random
+import statistics
+import time
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from api.cache import bump_catalog_version
+from api.models import Category, Product
+from api.views import ProductViewSet
+
+BENCH_PREFIX = 'bench-'
+
+# Label -> query params, mirroring the filter combinations ProductViewSet.get_queryset supports
+SCENARIOS = [
+    ('newest', {}),
+    ('category', {'category': f'{BENCH_PREFIX}cat-1'}),
+    ('featured', {'featured': 'true'}),
+    ('price range', {'min_price': '20', 'max_price': '40'}),
+    ('sustainability', {'sustainability': '4'}),
+    ('category + price', {'category': f'{BENCH_PREFIX}cat-2', 'min_price': '10', 'max_price': '80'}),
+    ('sort by title', {'sort': 'title'}),
+    ('sort by sustainability', {'sort': 'sustainability'}),
+    ('sort by price', {'sort': 'price_asc'}),
+    ('price range by price', {'min_price': '20', 'max_price': '40', 'sort': 'price_asc'}),
+    ('cursor page 2', {'paginate': 'cursor', '_second_page': '1'}),
+]
+
+FULL_SCAN_MARKERS = {
+    'postgresql': ['Seq Scan on api_product'],
+    'sqlite': ['SCAN api_product'],
+}
+
+
+class Command(BaseCommand):
+    help = 'Seeds a synthetic catalog and reports EXPLAIN plans and timings for the product list filters'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--products', type=int, default=50000, help='Synthetic products to seed')
+        parser.add_argument('--categories', type=int, default=20, help='Synthetic categories to seed')
+        parser.add_argument('--repeat', type=int, default=20, help='Timed runs per scenario')
+        parser.add_argument('--page-size', type=int, default=12)
+        parser.add_argument('--seed', type=int, default=42, help='Random seed for the synthetic catalog')
+        parser.add_argument('--skip-seed', action='store_true', help='Reuse previously seeded bench rows')
+        parser.add_argument('--cleanup', action='store_true', help='Delete the bench rows afterwards')
+        parser.add_argument('--no-explain', action='store_true', help='Only print timings')
+        parser.add_argument('--fail-on-seq-scan', action='store_true',
+                            help='Exit non-zero if any scenario plan scans the whole product table')
+
+    def handle(self, *args, **options):
+        if not options['skip_seed']:
+            self.seed(options['products'], options['categories'], options['seed'])
+
+        full_scans = []
+        for label, params in SCENARIOS:
+            queryset = self.build_queryset(params, options['page_size'])
+            timings = []
+            for _ in range(options['repeat']):
+                start = time.perf_counter()
+                list(queryset.all())
+                timings.append((time.perf_counter() - start) * 1000)
+
+            timings.sort()
+            p95 = timings[min(len(timings) - 1, int(len(timings) * 0.95))]
+            self.stdout.write(self.style.SUCCESS(
+                f'{label:<24} median {statistics.median(timings):8.2f} ms   p95 {p95:8.2f} ms'
+            ))
+
+            plan = queryset.explain()
+            markers = FULL_SCAN_MARKERS.get(connection.vendor, [])
+            if any(marker in line and 'INDEX' not in line.upper() for line in plan.splitlines() for marker in markers):
+                full_scans.append(label)
+                self.stdout.write(self.style.WARNING('    full table scan in plan'))
+            if not options['no_explain']:
+                for line in plan.splitlines():
+                    self.stdout.write(f'    {line}')
+
+        if options['cleanup']:
+            self.cleanup()
+
+        if full_scans and options['fail_on_seq_scan']:
+            raise CommandError(f"Full table scans in: {', '.join(full_scans)}")
+
+    def build_queryset(self, params, page_size):
+        params = dict(params)
+        second_page = params.pop('_second_page', None)
+        view = ProductViewSet()
+        view.action = 'list'
+        view.kwargs = {}
+        view.format_kwarg = None
+        view.request = Request(APIRequestFactory().get('/api/products/', params))
+        queryset = view.get_queryset()
+
+        if second_page:
+            # Seek past the first page exactly as KeysetPagination would
+            paginator = view.pagination_class()
+            paginator.page_size = page_size
+            ordering = view.get_keyset_ordering()
+            first_page = list(queryset.order_by(*ordering)[:page_size])
+            if first_page:
+                position = [getattr(first_page[-1], key.lstrip('-')) for key in ordering]
+                queryset = queryset.filter(paginator.seek_filter(ordering, position))
+        return queryset[:page_size]
+
+    def seed(self, product_count, category_count, seed):
+        rng = random.Random(seed)
+        self.cleanup()
+        start = time.perf_counter()
+        with transaction.atomic():
+            categories = Category.objects.bulk_create([
+                Category(name=f'Bench Category {i}', slug=f'{BENCH_PREFIX}cat-{i}')
+                for i in range(1, category_count + 1)
+            ])
+            batch = []
+            for i in range(1, product_count + 1):
+                price = Decimal(rng.randint(500, 25000)) / 100
+                batch.append(Product(
+                    title=f'Bench Product {i}',
+                    slug=f'{BENCH_PREFIX}product-{i}',
+                    category=rng.choice(categories),
+                    description='Synthetic benchmark product. ' * 10,
+                    price=price,
+                    discount_price=(price * Decimal('0.8')).quantize(Decimal('0.01')) if rng.random() < 0.2 else None,
+                    inventory=rng.randint(0, 500),
+                    image_url='https://example.com/bench.jpg',
+                    is_featured=rng.random() < 0.05,
+                    is_active=rng.random() < 0.95,
+                    materials='Organic Cotton',
+                    sustainability_rating=rng.randint(0, 5),
+                ))
+                if len(batch) >= 5000:
+                    Product.objects.bulk_create(batch)
+                    batch = []
+            if batch:
+                Product.objects.bulk_create(batch)
+
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE api_product' if connection.vendor == 'postgresql' else 'ANALYZE')
+        bump_catalog_version()  # bulk_create skips signals
+        self.stdout.write(self.style.SUCCESS(
+            f'Seeded {product_count} products in {category_count} categories '
+            f'in {time.perf_counter() - start:.1f}s'
+        ))
+
+    def cleanup(self):
+        Product.objects.filter(slug__startswith=BENCH_PREFIX).delete()
+        Category.objects.filter(slug__startswith=BENCH_PREFIX).delete()
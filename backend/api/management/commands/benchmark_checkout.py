@@ -0,0 +1,165 @@
+import random
+import threading
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import OperationalError, connection, transaction
+from django.db.models import Sum
+
+from api.checkout import EmptyCart, InsufficientStock, place_order
+from api.models import CartItem, Category, Job, Order, OrderItem, Product, ProductVariant
+
+User = get_user_model()
+
+BENCH_PREFIX = 'bench-checkout-'
+
+
+class Command(BaseCommand):
+    help = 'Multi-threaded checkout stress test: verifies no oversell and reports orders/second'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=8)
+        parser.add_argument('--orders-per-thread', type=int, default=50)
+        parser.add_argument('--products', type=int, default=3)
+        parser.add_argument('--variants-per-product', type=int, default=4)
+        parser.add_argument('--stock', type=int, default=40, help='Initial stock per variant (keep it scarce)')
+        parser.add_argument('--max-lines', type=int, default=3, help='Max cart lines per order')
+        parser.add_argument('--max-quantity', type=int, default=3, help='Max quantity per cart line')
+        parser.add_argument('--retries', type=int, default=20, help='Retries on lock errors (SQLite)')
+        parser.add_argument('--seed', type=int, default=7)
+        parser.add_argument('--keep', action='store_true', help='Keep the bench rows afterwards')
+
+    def handle(self, *args, **options):
+        self.cleanup()
+        users, variants = self.setup(options)
+        initial_variant_stock = {v.pk: v.stock for v in variants}
+        initial_inventory = dict(
+            Product.objects.filter(slug__startswith=BENCH_PREFIX).values_list('pk', 'inventory')
+        )
+
+        stats = {'orders': 0, 'shortages': 0, 'retries': 0, 'errors': 0}
+        stats_lock = threading.Lock()
+        barrier = threading.Barrier(len(users))
+
+        def worker(index, user):
+            rng = random.Random(options['seed'] + index)
+            local = {'orders': 0, 'shortages': 0, 'retries': 0, 'errors': 0}
+            try:
+                barrier.wait()
+                for _ in range(options['orders_per_thread']):
+                    lines = rng.sample(variants, min(len(variants), rng.randint(1, options['max_lines'])))
+                    self.with_retries(local, options['retries'], lambda: self.fill_cart(user, lines, rng, options))
+                    try:
+                        self.with_retries(local, options['retries'],
+                                          lambda: place_order(user, user.email, 'Bench Street 1'))
+                        local['orders'] += 1
+                    except InsufficientStock:
+                        local['shortages'] += 1
+                    except EmptyCart:
+                        local['errors'] += 1
+            except Exception as e:  # Report, don't hang the other threads
+                local['errors'] += 1
+                self.stderr.write(f'worker {index}: {e!r}')
+            finally:
+                connection.close()
+                with stats_lock:
+                    for key, value in local.items():
+                        stats[key] += value
+
+        threads = [threading.Thread(target=worker, args=(i, user)) for i, user in enumerate(users)]
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - start
+
+        oversold = self.verify(initial_variant_stock, initial_inventory)
+        attempts = stats['orders'] + stats['shortages']
+        self.stdout.write(f"threads          {len(users)}")
+        self.stdout.write(f"checkouts        {attempts} ({stats['orders']} placed, {stats['shortages']} rejected for stock)")
+        self.stdout.write(f"lock retries     {stats['retries']}")
+        self.stdout.write(f"errors           {stats['errors']}")
+        self.stdout.write(f"elapsed          {elapsed:.2f}s")
+        self.stdout.write(f"orders/second    {stats['orders'] / elapsed:.1f}")
+        self.stdout.write(f"checkouts/second {attempts / elapsed:.1f}")
+
+        if not options['keep']:
+            self.cleanup()
+
+        if oversold:
+            raise CommandError(f'Oversold or inconsistent stock: {oversold}')
+        self.stdout.write(self.style.SUCCESS('No oversell: stock + units sold == initial stock for every row'))
+
+    @staticmethod
+    def with_retries(stats, retries, func):
+        for attempt in range(retries + 1):
+            try:
+                return func()
+            except OperationalError:  # e.g. SQLite "database is locked"
+                if attempt == retries:
+                    raise
+                stats['retries'] += 1
+                time.sleep(0.005 * (2 ** min(attempt, 6)))
+
+    @staticmethod
+    def fill_cart(user, lines, rng, options):
+        with transaction.atomic():
+            CartItem.objects.filter(user=user).delete()
+            CartItem.objects.bulk_create([
+                CartItem(user=user, product_id=variant.product_id, variant=variant,
+                         quantity=rng.randint(1, options['max_quantity']))
+                for variant in lines
+            ])
+
+    def setup(self, options):
+        category = Category.objects.create(name='Bench Checkout', slug=f'{BENCH_PREFIX}category')
+        sizes = [code for code, _ in ProductVariant.SIZE_CHOICES]
+        variants = []
+        for p in range(options['products']):
+            product = Product.objects.create(
+                title=f'Bench Checkout Product {p}',
+                slug=f'{BENCH_PREFIX}product-{p}',
+                category=category,
+                description='Checkout stress test product',
+                price='25.00',
+                inventory=options['stock'] * options['variants_per_product'],
+                image_url='https://example.com/bench.jpg',
+            )
+            variants += ProductVariant.objects.bulk_create([
+                ProductVariant(product=product, size=sizes[v % len(sizes)], color=f'Color {v}', stock=options['stock'])
+                for v in range(options['variants_per_product'])
+            ])
+        users = [
+            User.objects.create_user(username=f'{BENCH_PREFIX}user-{i}', email=f'bench{i}@example.com', password=None)
+            for i in range(options['threads'])
+        ]
+        return users, variants
+
+    def verify(self, initial_variant_stock, initial_inventory):
+        problems = []
+        sold_by_variant = dict(
+            OrderItem.objects.filter(variant_id__in=initial_variant_stock)
+            .values('variant_id').annotate(units=Sum('quantity')).values_list('variant_id', 'units')
+        )
+        for pk, stock in ProductVariant.objects.filter(pk__in=initial_variant_stock).values_list('pk', 'stock'):
+            if stock + sold_by_variant.get(pk, 0) != initial_variant_stock[pk]:
+                problems.append(f'variant {pk}: {stock} left + {sold_by_variant.get(pk, 0)} sold != {initial_variant_stock[pk]}')
+        sold_by_product = dict(
+            OrderItem.objects.filter(product_id__in=initial_inventory, variant__isnull=True)  # Variant lines use variant stock
+            .values('product_id').annotate(units=Sum('quantity')).values_list('product_id', 'units')
+        )
+        for pk, inventory in Product.objects.filter(pk__in=initial_inventory).values_list('pk', 'inventory'):
+            if inventory + sold_by_product.get(pk, 0) != initial_inventory[pk]:
+                problems.append(f'product {pk}: {inventory} left + {sold_by_product.get(pk, 0)} sold != {initial_inventory[pk]}')
+        return problems
+
+    def cleanup(self):
+        bench_orders = list(Order.objects.filter(user__username__startswith=BENCH_PREFIX).values_list('pk', flat=True))
+        Job.objects.filter(status='queued', payload__order_id__in=bench_orders).delete()  # Enqueued by checkout
+        Order.objects.filter(pk__in=bench_orders).delete()
+        CartItem.objects.filter(user__username__startswith=BENCH_PREFIX).delete()
+        Product.objects.filter(slug__startswith=BENCH_PREFIX).delete()
+        Category.objects.filter(slug__startswith=BENCH_PREFIX).delete()
+        User.objects.filter(username__startswith=BENCH_PREFIX).delete()
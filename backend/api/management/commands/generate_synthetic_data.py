@@ -0,0 +1,45 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api.synthetic import (
+    DEFAULT_COUNTS, SYNTH_PASSWORD, SYNTH_PREFIX, clear_synthetic_data, generate_synthetic_data, synthetic_data_exists,
+)
+
+
+class Command(BaseCommand):
+    help = ('Generates a deterministic synthetic dataset (categories, products, variants, users, carts, orders) '
+            'with bulk inserts, for load tests and benchmark_api')
+
+    def add_arguments(self, parser):
+        for name, default in DEFAULT_COUNTS.items():
+            parser.add_argument(f'--{name.replace("_", "-")}', type=int, default=default)
+        parser.add_argument('--days', type=int, default=90, help='Spread order dates over this many past days')
+        parser.add_argument('--seed', type=int, default=1, help='Same seed + counts = same dataset')
+        parser.add_argument('--batch-size', type=int, default=2000, help='Rows per bulk INSERT')
+        parser.add_argument('--clear', action='store_true', help='Delete previously generated synthetic rows first')
+        parser.add_argument('--clear-only', action='store_true', help='Delete synthetic rows and exit')
+
+    def handle(self, *args, **options):
+        if any(options[name] < 0 for name in DEFAULT_COUNTS) or options['batch_size'] < 1 or options['days'] < 1:
+            raise CommandError('Counts must be >= 0, --batch-size and --days >= 1')
+
+        if options['clear'] or options['clear_only']:
+            start = time.perf_counter()
+            clear_synthetic_data()
+            self.stdout.write(f'Removed synthetic data in {time.perf_counter() - start:.1f}s')
+            if options['clear_only']:
+                return
+        elif synthetic_data_exists():
+            raise CommandError(f'Synthetic data ({SYNTH_PREFIX}*) already exists; pass --clear to regenerate it')
+
+        start = time.perf_counter()
+        written = generate_synthetic_data(
+            counts={name: options[name] for name in DEFAULT_COUNTS},
+            seed=options['seed'], days=options['days'], batch_size=options['batch_size'], log=self.stdout.write,
+        )
+        total = sum(written.values())
+        self.stdout.write(self.style.SUCCESS(
+            f'Generated {total} rows in {time.perf_counter() - start:.1f}s (seed {options["seed"]}); '
+            f'users log in as {SYNTH_PREFIX}user-N / {SYNTH_PASSWORD}'
+        ))
@@ -0,0 +1,61 @@
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Exists, Max, Min, OuterRef
+from django.utils import timezone
+
+from api.models import CartItem
+
+
+class Command(BaseCommand):
+    help = ('Deletes guest carts (session_id rows) with no activity for --days, walking primary-key '
+            'ranges in small batches so it can run alongside live traffic')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=float, default=30, help='Age of the newest line before a guest cart is abandoned')
+        parser.add_argument('--batch-size', type=int, default=1000, help='Primary-key range covered by each DELETE')
+        parser.add_argument('--sleep', type=float, default=0.0, help='Seconds to pause between batches')
+        parser.add_argument('--max-batches', type=int, default=None, help='Stop after this many batches')
+        parser.add_argument('--start-id', type=int, default=None, help='Resume from this primary key')
+        parser.add_argument('--dry-run', action='store_true', help='Count what would be deleted without deleting')
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size must be at least 1')
+        cutoff = timezone.now() - timedelta(days=options['days'])
+
+        guest_lines = CartItem.objects.filter(user__isnull=True, session_id__isnull=False)
+        # A cart is abandoned only if none of its lines is recent, so active carts are never split
+        recent_activity = CartItem.objects.filter(
+            user__isnull=True, session_id=OuterRef('session_id'), created_at__gte=cutoff,
+        )
+        abandoned = guest_lines.filter(created_at__lt=cutoff).exclude(Exists(recent_activity))
+
+        bounds = guest_lines.aggregate(low=Min('pk'), high=Max('pk'))
+        if bounds['low'] is None:
+            self.stdout.write(self.style.SUCCESS('No guest carts'))
+            return
+
+        deleted = batches = 0
+        start = max(bounds['low'], options['start_id'] or 0)
+        while start <= bounds['high']:
+            end = start + options['batch_size']
+            # Each batch is its own short statement/transaction on a bounded pk range
+            batch = abandoned.filter(pk__gte=start, pk__lt=end)
+            count = batch.count() if options['dry_run'] else batch.delete()[0]
+            deleted += count
+            batches += 1
+            if count:
+                self.stdout.write(f'ids {start}-{end - 1}: {count} lines ({deleted} total)')
+            start = end
+            if options['max_batches'] and batches >= options['max_batches']:
+                self.stdout.write(self.style.WARNING(f'Stopped after {batches} batches; resume with --start-id {start}'))
+                break
+            if options['sleep']:
+                time.sleep(options['sleep'])
+
+        verb = 'Would delete' if options['dry_run'] else 'Deleted'
+        self.stdout.write(self.style.SUCCESS(
+            f'{verb} {deleted} abandoned guest cart lines older than {options["days"]:g} days in {batches} batches'
+        ))
@@ -0,0 +1,27 @@
+import time
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api.analytics import rebuild_rollups
+
+
+class Command(BaseCommand):
+    help = 'Recomputes the daily sales rollups from orders (all history, or from --since) for backfills and repairs'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--since', help='First day to rebuild (YYYY-MM-DD); default: everything')
+
+    def handle(self, *args, **options):
+        since = None
+        if options['since']:
+            try:
+                since = date.fromisoformat(options['since'])
+            except ValueError:
+                raise CommandError('--since must be a date like 2025-01-31')
+
+        start = time.perf_counter()
+        rows = rebuild_rollups(since)
+        self.stdout.write(self.style.SUCCESS(
+            f'Rebuilt {rows} rollup rows{f" since {since}" if since else ""} in {time.perf_counter() - start:.2f}s'
+        ))
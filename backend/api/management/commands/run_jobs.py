@@ -0,0 +1,95 @@
+import multiprocessing
+import os
+import signal
+import socket
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections, connections
+
+from api.jobs import claim_jobs, requeue_orphaned, run_job
+
+
+class Command(BaseCommand):
+    help = 'Processes background jobs (order emails, stock sync, ...) with a pool of worker threads/processes'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=4, help='Jobs run concurrently per process')
+        parser.add_argument('--processes', type=int, default=1, help='Worker processes (forked)')
+        parser.add_argument('--queue', action='append', dest='queues', help='Only these queues (repeatable)')
+        parser.add_argument('--poll-interval', type=float, default=1.0, help='Seconds to wait when the queue is empty')
+        parser.add_argument('--once', action='store_true', help='Exit once no job is ready (cron / tests)')
+
+    def handle(self, *args, **options):
+        if options['threads'] < 1 or options['processes'] < 1:
+            raise CommandError('--threads and --processes must be at least 1')
+
+        self.stopping = threading.Event()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            signal.signal(sig, lambda *_: self.stopping.set())  # Finish running jobs, then exit
+
+        if options['processes'] == 1:
+            self.work(options)
+            return
+
+        connections.close_all()  # Children must not share the parent's DB sockets
+        children = [multiprocessing.Process(target=self.work, args=(options,), daemon=False)
+                    for _ in range(options['processes'])]
+        for child in children:
+            child.start()
+        try:
+            for child in children:
+                child.join()
+        except KeyboardInterrupt:
+            for child in children:
+                child.terminate()
+
+    def work(self, options):
+        worker_id = f'{socket.gethostname()}:{os.getpid()}'
+        counts = {'done': 0, 'queued': 0, 'failed': 0}
+        self.stdout.write(f'{worker_id}: {options["threads"]} threads, queues {options["queues"] or "all"}')
+
+        def execute(job):
+            close_old_connections()
+            try:
+                return run_job(job)
+            finally:
+                close_old_connections()
+
+        running = {}  # future -> job
+
+        def collect(futures):
+            for future in futures:
+                job = running.pop(future)
+                try:
+                    status = future.result()
+                except Exception as e:  # Couldn't even record the outcome; requeued once orphaned
+                    self.stderr.write(f'{worker_id}: {job}: {e!r}')
+                    status = 'failed'
+                counts[status] += 1
+                if status != 'done':
+                    self.stderr.write(f'{worker_id}: {job.name} #{job.pk} attempt {job.attempts} failed'
+                                      f'{", retry scheduled" if status == "queued" else ""}')
+
+        with ThreadPoolExecutor(max_workers=options['threads']) as pool:
+            while not self.stopping.is_set():
+                requeue_orphaned()
+                free = options['threads'] - len(running)
+                for job in claim_jobs(worker_id, free, options['queues']) if free else []:
+                    running[pool.submit(execute, job)] = job
+
+                if not running:
+                    if options['once']:
+                        break
+                    self.stopping.wait(options['poll_interval'])
+                    continue
+
+                finished, _ = wait(running, timeout=options['poll_interval'], return_when='FIRST_COMPLETED')
+                collect(finished)
+
+            collect(wait(running).done)
+        connections.close_all()
+        self.stdout.write(self.style.SUCCESS(
+            f"{worker_id}: {counts['done']} done, {counts['queued']} retried, {counts['failed']} failed"
+        ))
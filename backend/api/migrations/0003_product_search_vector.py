@@ -0,0 +1,44 @@
+# Generated by Django 5.2 on 2026-10-18 09:00
+
+import django.contrib.postgres.search
+from django.db import migrations
+
+
+def create_search_index(apps, schema_editor):
+    # GIN indexes and tsvector expressions only exist on PostgreSQL; other
+    # backends use the in-process fallback in api.search.
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    from django.contrib.postgres.search import SearchVector
+
+    Product = apps.get_model('api', 'Product')
+    Product.objects.update(
+        search_vector=SearchVector('title', weight='A', config='english')
+        + SearchVector('materials', weight='B', config='english')
+        + SearchVector('description', weight='C', config='english')
+    )
+    schema_editor.execute(
+        'CREATE INDEX IF NOT EXISTS api_product_search_gin ON api_product USING gin (search_vector)'
+    )
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('DROP INDEX IF EXISTS api_product_search_gin')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0002_alter_cartitem_options'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,54 @@
+# Generated by Django 5.2 on 2026-10-18 05:42
+
+import django.db.models.functions.comparison
+from django.conf import settings
+from django.db import migrations, models
+
+
+def merge_duplicate_cart_lines(apps, schema_editor):
+    # The old unique_together never fired for NULL user/session/variant columns, so
+    # duplicates may exist; fold them into the oldest row before adding the constraints.
+    CartItem = apps.get_model('api', 'CartItem')
+    keep = {}
+    merged = {}
+    duplicates = []
+    rows = CartItem.objects.order_by('pk').values_list('pk', 'user_id', 'session_id', 'product_id', 'variant_id', 'quantity')
+    for pk, user_id, session_id, product_id, variant_id, quantity in rows.iterator():
+        if user_id is not None:
+            line = ('user', user_id, product_id, variant_id)
+        elif session_id is not None:
+            line = ('session', session_id, product_id, variant_id)
+        else:
+            continue
+        if line in keep:
+            merged[keep[line]] = merged.get(keep[line], 0) + quantity
+            duplicates.append(pk)
+        else:
+            keep[line] = pk
+    for pk, extra in merged.items():
+        CartItem.objects.filter(pk=pk).update(quantity=models.F('quantity') + extra)
+    CartItem.objects.filter(pk__in=duplicates).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0006_idempotencykey'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_duplicate_cart_lines, migrations.RunPython.noop),
+        migrations.AlterUniqueTogether(
+            name='cartitem',
+            unique_together=set(),
+        ),
+        migrations.AddConstraint(
+            model_name='cartitem',
+            constraint=models.UniqueConstraint(models.F('user'), models.F('product'), django.db.models.functions.comparison.Coalesce('variant', 0), condition=models.Q(('user__isnull', False)), name='uniq_user_cart_line'),
+        ),
+        migrations.AddConstraint(
+            model_name='cartitem',
+            constraint=models.UniqueConstraint(models.F('session_id'), models.F('product'), django.db.models.functions.comparison.Coalesce('variant', 0), condition=models.Q(('session_id__isnull', False), ('user__isnull', True)), name='uniq_session_cart_line'),
+        ),
+    ]
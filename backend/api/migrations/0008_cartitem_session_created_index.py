@@ -0,0 +1,19 @@
+# Generated by Django 5.2 on 2026-10-18 05:49
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0007_cartitem_upsert_constraints'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='cartitem',
+            index=models.Index(condition=models.Q(('session_id__isnull', False)), fields=['session_id', 'created_at'], name='cart_session_created_idx'),
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.2 on 2026-10-18 05:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0012_orderstatusevent'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='order',
+            name='rollup_status',
+            field=models.CharField(blank=True, default='', editable=False, max_length=10),
+        ),
+        migrations.CreateModel(
+            name='DailySalesRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('dimension', models.CharField(choices=[('total', 'Total'), ('product', 'Product'), ('category', 'Category')], max_length=10)),
+                ('key', models.PositiveIntegerField(default=0)),
+                ('day', models.DateField()),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('processing', 'Processing'), ('shipped', 'Shipped'), ('delivered', 'Delivered'), ('cancelled', 'Cancelled')], max_length=10)),
+                ('orders', models.IntegerField(default=0)),
+                ('units', models.IntegerField(default=0)),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('dimension', 'day', 'status', 'key'), name='uniq_sales_rollup')],
+            },
+        ),
+    ]
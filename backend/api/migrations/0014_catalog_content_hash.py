@@ -0,0 +1,23 @@
+# Generated by Django 5.2 on 2026-10-18 06:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0013_sales_rollups'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='content_hash',
+            field=models.CharField(blank=True, default='', editable=False, max_length=32),
+        ),
+        migrations.AddField(
+            model_name='productvariant',
+            name='content_hash',
+            field=models.CharField(blank=True, default='', editable=False, max_length=32),
+        ),
+    ]
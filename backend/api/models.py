@@ -1,6 +1,10 @@
 from django.db import models
 from django.contrib.auth.models import User
+from django.core.serializers.json import DjangoJSONEncoder
+from django.contrib.postgres.search import SearchVectorField
+from django.db.models.functions import Coalesce
 from django.utils.text import slugify
+from django.utils import timezone
 import uuid
 
 
@@ -49,9 +53,41 @@ class Product(models.Model):
         (4, 'Sustainable'),
         (5, 'Highly Sustainable'),
     ])
+
+    # Price actually charged (discount when set). Stored generated column so it is
+    # always in sync, even for bulk writes, and indexable for price filters/sorts.
+    # Like any generated column it is only current after a refresh_from_db().
+    effective_price = models.GeneratedField(
+        expression=Coalesce('discount_price', 'price'),
+        output_field=models.DecimalField(max_digits=10, decimal_places=2),
+        db_persist=True,
+    )
+
+    # Weighted title/materials/description tsvector, maintained by api.search (GIN indexed on PostgreSQL)
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    # Digest of the supplier feed row last applied by api.catalog_sync ('' = never synced)
+    content_hash = models.CharField(max_length=32, blank=True, default='', editable=False)
     
     class Meta:
         ordering = ['-created_at']
+        # Partial indexes on active products matching ProductViewSet.get_queryset:
+        # every list filters is_active=True and seeks/orders on (-created_at, id)
+        # (or the ?sort= key). Check plans with `manage.py benchmark_catalog_queries`.
+        indexes = [
+            models.Index(fields=['-created_at', 'id'], name='prod_active_newest_idx',
+                         condition=models.Q(is_active=True)),
+            models.Index(fields=['category', '-created_at', 'id'], name='prod_active_cat_newest_idx',
+                         condition=models.Q(is_active=True)),
+            models.Index(fields=['-created_at', 'id'], name='prod_featured_newest_idx',
+                         condition=models.Q(is_active=True, is_featured=True)),
+            models.Index(fields=['effective_price', 'id'], name='prod_active_eff_price_idx',
+                         condition=models.Q(is_active=True)),
+            models.Index(fields=['-sustainability_rating', '-created_at', 'id'], name='prod_active_rating_idx',
+                         condition=models.Q(is_active=True)),
+            models.Index(fields=['title', 'id'], name='prod_active_title_idx',
+                         condition=models.Q(is_active=True)),
+        ]
 
     def save(self, *args, **kwargs):
         if not self.slug:
@@ -77,6 +113,7 @@ class ProductVariant(models.Model):
     color = models.CharField(max_length=50)
     stock = models.PositiveIntegerField(default=0)
     image_url = models.CharField(max_length=500, blank=True, null=True)
+    content_hash = models.CharField(max_length=32, blank=True, default='', editable=False)  # See Product.content_hash
     
     class Meta:
         unique_together = ('product', 'size', 'color')
@@ -100,11 +137,17 @@ class Order(models.Model):
     shipping_address = models.TextField()
     total_amount = models.DecimalField(max_digits=10, decimal_places=2)
     status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending')
+    # Status this order is currently counted under in DailySalesRollup ('' = not yet)
+    rollup_status = models.CharField(max_length=10, blank=True, default='', editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # Account order history: WHERE user_id = ? ORDER BY created_at DESC, id (keyset pages)
+            models.Index(fields=['user', '-created_at', 'id'], name='order_user_history_idx'),
+        ]
 
     def __str__(self):
         return f"Order {self.order_id}"
@@ -116,15 +159,69 @@ class OrderItem(models.Model):
     variant = models.ForeignKey(ProductVariant, on_delete=models.CASCADE, null=True, blank=True)
     quantity = models.PositiveIntegerField(default=1)
     price = models.DecimalField(max_digits=10, decimal_places=2)
+    # Snapshot of what was bought, written at checkout (older rows: manage.py
+    # backfill_order_item_snapshots) so order reads need no product/variant joins
+    product_title = models.CharField(max_length=200, blank=True, default='')
+    product_image = models.CharField(max_length=500, blank=True, null=True)
+    size = models.CharField(max_length=3, blank=True, null=True)
+    color = models.CharField(max_length=50, blank=True, null=True)
     
     def __str__(self):
-        return f"{self.quantity} x {self.product.title}"
+        return f"{self.quantity} x {self.product_title}"
     
     @property
     def total_price(self):
         return self.price * self.quantity
 
 
+class OrderStatusEvent(models.Model):
+    """Append-only history of Order.status changes (written by api.orders.transition_orders)."""
+    order = models.ForeignKey(Order, related_name='status_events', on_delete=models.CASCADE)
+    from_status = models.CharField(max_length=10, choices=Order.STATUS_CHOICES)
+    to_status = models.CharField(max_length=10, choices=Order.STATUS_CHOICES)
+    changed_by = models.ForeignKey(User, on_delete=models.SET_NULL, related_name='+', null=True, blank=True)
+    note = models.CharField(max_length=255, blank=True, default='')
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['order', 'created_at'], name='order_event_history_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.order_id}: {self.from_status} -> {self.to_status}"
+
+
+class DailySalesRollup(models.Model):
+    """
+    Sales per day and order status - overall, per product and per category -
+    maintained incrementally by api.analytics so reports never scan orders.
+    ``orders`` counts distinct orders (containing the product/category).
+    """
+    DIMENSION_CHOICES = [
+        ('total', 'Total'),
+        ('product', 'Product'),
+        ('category', 'Category'),
+    ]
+
+    dimension = models.CharField(max_length=10, choices=DIMENSION_CHOICES)
+    key = models.PositiveIntegerField(default=0) # Product/category id; 0 for totals
+    day = models.DateField()
+    status = models.CharField(max_length=10, choices=Order.STATUS_CHOICES)
+    orders = models.IntegerField(default=0)
+    units = models.IntegerField(default=0)
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    class Meta:
+        constraints = [
+            # Also the index for report queries: WHERE dimension = ? AND day BETWEEN ...
+            models.UniqueConstraint(fields=['dimension', 'day', 'status', 'key'], name='uniq_sales_rollup'),
+        ]
+
+    def __str__(self):
+        return f"{self.day} {self.status} {self.dimension}:{self.key}"
+
+
 class CartItem(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='cart_items', null=True, blank=True)
     session_id = models.CharField(max_length=255, null=True, blank=True)
@@ -134,8 +231,28 @@ class CartItem(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     
     class Meta:
-        unique_together = ('user', 'session_id', 'product', 'variant')
         ordering = ['created_at']
+        # One row per (owner, product, variant). Partial + COALESCE so rows with a NULL
+        # variant or NULL owner column still conflict; these are the ON CONFLICT
+        # targets used by api.cart.upsert_cart_item.
+        constraints = [
+            models.UniqueConstraint(
+                'user', 'product', Coalesce('variant', 0),
+                name='uniq_user_cart_line', condition=models.Q(user__isnull=False),
+            ),
+            models.UniqueConstraint(
+                'session_id', 'product', Coalesce('variant', 0),
+                name='uniq_session_cart_line', condition=models.Q(user__isnull=True, session_id__isnull=False),
+            ),
+        ]
+        indexes = [
+            # Guest cart lookups by session_id alone (list/clear) and the last-activity
+            # check of purge_abandoned_carts; user carts have no session_id.
+            models.Index(
+                fields=['session_id', 'created_at'], name='cart_session_created_idx',
+                condition=models.Q(session_id__isnull=False),
+            ),
+        ]
         
     def __str__(self):
         return f"{self.quantity} x {self.product.title}"
@@ -143,3 +260,59 @@ class CartItem(models.Model):
     @property
     def total_price(self):
         return self.product.price * self.quantity
+
+
+class IdempotencyKey(models.Model):
+    """Stored outcome of a request sent with an ``Idempotency-Key`` header (see api.idempotency)."""
+    scope = models.CharField(max_length=50)
+    key = models.CharField(max_length=255)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='+', null=True, blank=True)
+    request_hash = models.CharField(max_length=64)
+    response_status = models.PositiveSmallIntegerField(null=True, blank=True) # NULL while in flight
+    response_body = models.JSONField(null=True, blank=True, encoder=DjangoJSONEncoder)
+    created_at = models.DateTimeField(auto_now_add=True)
+    claimed_at = models.DateTimeField(default=timezone.now) # Start of the current lease (api.idempotency)
+    expires_at = models.DateTimeField(db_index=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'scope', 'key'], name='uniq_idempotency_key'),
+        ]
+
+    def __str__(self):
+        return f"{self.scope}:{self.key}"
+
+
+class Job(models.Model):
+    """A unit of deferred work for ``manage.py run_jobs`` (see api.jobs)."""
+    STATUS_CHOICES = [
+        ('queued', 'Queued'),
+        ('running', 'Running'),
+        ('done', 'Done'),
+        ('failed', 'Failed'),
+    ]
+
+    queue = models.CharField(max_length=50, default='default')
+    name = models.CharField(max_length=100) # Registered task name
+    payload = models.JSONField(default=dict, blank=True, encoder=DjangoJSONEncoder)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='queued')
+    attempts = models.PositiveSmallIntegerField(default=0)
+    max_attempts = models.PositiveSmallIntegerField(default=5)
+    run_at = models.DateTimeField() # Not before; pushed back on retry
+    locked_at = models.DateTimeField(null=True, blank=True)
+    locked_by = models.CharField(max_length=100, blank=True, default='')
+    last_error = models.TextField(blank=True, default='')
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            # Claim query: WHERE status = 'queued' AND queue = ? AND run_at <= now ORDER BY run_at, id
+            models.Index(fields=['queue', 'run_at', 'id'], name='job_ready_idx',
+                         condition=models.Q(status='queued')),
+            # Requeueing jobs whose worker died
+            models.Index(fields=['locked_at'], name='job_running_idx', condition=models.Q(status='running')),
+        ]
+
+    def __str__(self):
+        return f"{self.name} #{self.pk} ({self.status})"
@@ -0,0 +1,62 @@
+"""
+Order status transitions.
+
+``transition_orders`` moves any number of orders to a new status with one
+conditional UPDATE and records one OrderStatusEvent per changed order with a
+single bulk INSERT, in one transaction that also queues the sales rollup
+update. Orders whose current status cannot move to the target (see
+ORDER_TRANSITIONS) are left alone and reported.
+"""
+
+from django.db import transaction
+from django.utils import timezone
+
+from .jobs import enqueue_many
+from .models import Order, OrderStatusEvent
+
+# target status -> statuses it may be reached from
+ORDER_TRANSITIONS = {
+    'pending': set(),
+    'processing': {'pending'},
+    'shipped': {'processing'},
+    'delivered': {'shipped'},
+    'cancelled': {'pending', 'processing'},
+}
+
+
+def transition_orders(order_ids, to_status, changed_by=None, note=''):
+    """
+    Move ``order_ids`` to ``to_status``. Returns ``{'updated': [ids],
+    'skipped': {id: current status}, 'missing': [ids]}``.
+    """
+    if to_status not in ORDER_TRANSITIONS:
+        raise ValueError(f'Unknown order status {to_status!r}')
+    allowed_from = ORDER_TRANSITIONS[to_status]
+    order_ids = set(order_ids)
+
+    with transaction.atomic():
+        # Lock in pk order so overlapping bulk transitions can't deadlock; the
+        # statuses read here are the from_status of the events.
+        current = dict(
+            Order.objects.filter(pk__in=order_ids).select_for_update().order_by('pk').values_list('pk', 'status')
+        )
+        eligible = sorted(pk for pk, status in current.items() if status in allowed_from)
+        if eligible:
+            # .update() skips auto_now, so updated_at (ETags, history) is set explicitly
+            Order.objects.filter(pk__in=eligible, status__in=allowed_from).update(
+                status=to_status, updated_at=timezone.now(),
+            )
+            OrderStatusEvent.objects.bulk_create([
+                OrderStatusEvent(order_id=pk, from_status=current[pk], to_status=to_status,
+                                 changed_by=changed_by, note=note)
+                for pk in eligible
+            ], batch_size=1000)
+            # Sales rollups move these orders to the new status in the background
+            enqueue_many([('update_sales_rollups', {'order_ids': eligible[i:i + 1000]})
+                          for i in range(0, len(eligible), 1000)])
+
+    return {
+        'updated': eligible,
+        'skipped': {pk: status for pk, status in current.items() if status not in allowed_from},
+        'missing': sorted(order_ids - current.keys()),
+    }
@@ -0,0 +1,163 @@
+import base64
+import datetime
+import decimal
+import json
+import uuid
+
+from django.core.exceptions import FieldDoesNotExist, ValidationError as DjangoValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """
+    Cursor pagination over a compound ordering, e.g. ``('-created_at', 'id')``.
+
+    Unlike DRF's CursorPagination (single ordering field plus an OFFSET for
+    ties) the cursor stores the full sort key of the boundary row, and pages
+    are fetched with a range predicate the database can answer with an index
+    seek, so page N costs the same as page 1.
+
+    The view supplies the ordering through ``get_keyset_ordering()``; the last
+    key must be unique (normally ``id``).
+    """
+
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+    page_size = api_settings.PAGE_SIZE or 12
+    max_page_size = 100
+    default_ordering = ('-created_at', 'id')
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        self.ordering = tuple(getattr(view, 'get_keyset_ordering', lambda: self.default_ordering)())
+        self.model = queryset.model
+
+        position, reverse = self.decode_cursor(request)
+        ordering = self._reversed(self.ordering) if reverse else self.ordering
+
+        queryset = queryset.order_by(*ordering)
+        if position is not None:
+            queryset = queryset.filter(self.seek_filter(ordering, position))
+
+        rows = list(queryset[:self.page_size + 1])
+        has_more = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+        if reverse:
+            rows.reverse()
+
+        if reverse:
+            self.has_next, self.has_previous = position is not None, has_more
+        else:
+            self.has_next, self.has_previous = has_more, position is not None
+        self.first_position = self.get_position(rows[0]) if rows else position
+        self.last_position = self.get_position(rows[-1]) if rows else position
+        return rows
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return max(1, min(size, self.max_page_size))
+
+    # Cursor encoding -------------------------------------------------------
+
+    def get_next_link(self):
+        if not self.has_next or self.last_position is None:
+            return None
+        return self._link(self.last_position, reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous or self.first_position is None:
+            return None
+        return self._link(self.first_position, reverse=True)
+
+    def _link(self, position, reverse):
+        payload = {'p': position}
+        if reverse:
+            payload['r'] = 1
+        token = base64.urlsafe_b64encode(json.dumps(payload, default=self._encode_value).encode()).decode()
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, token)
+
+    @staticmethod
+    def _encode_value(value):
+        # Full-precision ISO timestamps: DjangoJSONEncoder truncates to milliseconds,
+        # which would break equality on the boundary row.
+        if isinstance(value, (datetime.datetime, datetime.date)):
+            return value.isoformat()
+        if isinstance(value, (decimal.Decimal, uuid.UUID)):
+            return str(value)
+        raise TypeError(f'Cannot encode {type(value).__name__} in a cursor')
+
+    def decode_cursor(self, request):
+        token = request.query_params.get(self.cursor_query_param)
+        if not token:
+            return None, False
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(token.encode()).decode())
+            raw = payload['p']
+            if len(raw) != len(self.ordering):
+                raise ValueError
+            position = [self._to_python(key, value) for key, value in zip(self.ordering, raw)]
+        except (TypeError, ValueError, KeyError, DjangoValidationError):
+            raise NotFound('Invalid cursor')
+        return position, bool(payload.get('r'))
+
+    def _to_python(self, key, value):
+        try:
+            field = self.model._meta.get_field(key.lstrip('-'))
+        except FieldDoesNotExist:
+            return value  # annotation (e.g. search rank), JSON type is already right
+        return field.to_python(value)
+
+    def get_position(self, row):
+        return [getattr(row, key.lstrip('-')) for key in self.ordering]
+
+    # Query building ----------------------------------------------------------
+
+    @staticmethod
+    def _reversed(ordering):
+        return tuple(key[1:] if key.startswith('-') else f'-{key}' for key in ordering)
+
+    @staticmethod
+    def seek_filter(ordering, position):
+        """
+        Rows strictly after ``position`` in ``ordering``:
+        ``k1 >= v1 AND (k1 > v1 OR (k1 = v1 AND k2 > v2) OR ...)`` with the
+        comparison flipped for descending keys. The leading non-strict bound is
+        redundant logically but lets the planner turn it into an index range.
+        """
+        fields = [(key.lstrip('-'), key.startswith('-')) for key in ordering]
+        seek = Q()
+        equal = Q()
+        for (name, descending), value in zip(fields, position):
+            seek |= equal & Q(**{f'{name}__{"lt" if descending else "gt"}': value})
+            equal &= Q(**{name: value})
+        first_name, first_desc = fields[0]
+        bound = Q(**{f'{first_name}__{"lte" if first_desc else "gte"}': position[0]})
+        return bound & seek
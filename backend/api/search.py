@@ -0,0 +1,199 @@
+"""
+Product full-text search.
+
+On PostgreSQL every product carries a weighted ``search_vector`` column
+(title > materials > description) backed by a GIN index, and queries are
+ranked with ``ts_rank``. Other databases (SQLite during local/test runs)
+fall back to an in-process inverted index that is built lazily and kept
+in sync by the Product save/delete signals.
+"""
+
+import re
+import threading
+from bisect import bisect_left
+from collections import defaultdict
+
+from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector
+from django.db import connection
+from django.db.models import Case, F, IntegerField, Value, When
+
+SEARCH_CONFIG = 'english'
+
+# Field -> (tsvector weight, fallback score weight). The fallback weights mirror
+# PostgreSQL's default ts_rank weights for A/B/C.
+SEARCH_FIELDS = {
+    'title': ('A', 1.0),
+    'materials': ('B', 0.4),
+    'description': ('C', 0.2),
+}
+
+TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def tokenize(text):
+    return TOKEN_RE.findall((text or '').lower())
+
+
+def uses_postgres_search():
+    return connection.vendor == 'postgresql'
+
+
+def product_search_vector():
+    vector = None
+    for field, (weight, _) in SEARCH_FIELDS.items():
+        part = SearchVector(field, weight=weight, config=SEARCH_CONFIG)
+        vector = part if vector is None else vector + part
+    return vector
+
+
+def build_search_query(term):
+    # Prefix-match every token so search-as-you-type ("cott") still finds "cotton".
+    tokens = tokenize(term)
+    if not tokens:
+        return None
+    raw = ' & '.join(f'{token}:*' for token in tokens)
+    return SearchQuery(raw, search_type='raw', config=SEARCH_CONFIG)
+
+
+class InvertedIndex:
+    """Minimal weighted inverted index used when PostgreSQL is not available."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._postings = defaultdict(dict)  # term -> {product_id: score}
+        self._doc_terms = {}                # product_id -> set(terms)
+        self._terms = []                    # sorted vocabulary for prefix lookups
+        self._terms_dirty = False
+
+    def _add(self, product_id, fields):
+        terms = set()
+        for field, (_, weight) in SEARCH_FIELDS.items():
+            for token in tokenize(fields.get(field)):
+                postings = self._postings[token]
+                postings[product_id] = postings.get(product_id, 0.0) + weight
+                terms.add(token)
+        self._doc_terms[product_id] = terms
+        self._terms_dirty = True
+
+    def _remove(self, product_id):
+        for token in self._doc_terms.pop(product_id, ()):
+            postings = self._postings.get(token)
+            if postings is None:
+                continue
+            postings.pop(product_id, None)
+            if not postings:
+                del self._postings[token]
+        self._terms_dirty = True
+
+    def add(self, product_id, fields):
+        with self._lock:
+            self._remove(product_id)
+            self._add(product_id, fields)
+
+    def remove(self, product_id):
+        with self._lock:
+            self._remove(product_id)
+
+    def _expand(self, prefix):
+        if self._terms_dirty:
+            self._terms = sorted(self._postings)
+            self._terms_dirty = False
+        start = bisect_left(self._terms, prefix)
+        for term in self._terms[start:]:
+            if not term.startswith(prefix):
+                break
+            yield term
+
+    def search(self, term):
+        """Return ``[(product_id, score), ...]`` best first; every token must match."""
+        tokens = tokenize(term)
+        if not tokens:
+            return []
+        with self._lock:
+            scores = None
+            for token in tokens:
+                matched = defaultdict(float)
+                for indexed in self._expand(token):
+                    for product_id, score in self._postings[indexed].items():
+                        matched[product_id] += score
+                if scores is None:
+                    scores = matched
+                else:
+                    scores = {pid: scores[pid] + s for pid, s in matched.items() if pid in scores}
+                if not scores:
+                    return []
+        return sorted(scores.items(), key=lambda item: (-item[1], -item[0]))
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_fallback_index():
+    global _index
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                from .models import Product
+                index = InvertedIndex()
+                rows = Product.objects.values('id', *SEARCH_FIELDS).iterator(chunk_size=2000)
+                for row in rows:
+                    index.add(row['id'], row)
+                _index = index
+    return _index
+
+
+def reset_fallback_index():
+    global _index
+    with _index_lock:
+        _index = None
+
+
+def update_search_vectors(queryset):
+    """Recompute stored vectors for ``queryset`` in a single UPDATE (PostgreSQL only)."""
+    if uses_postgres_search():
+        queryset.update(search_vector=product_search_vector())
+
+
+def index_product(product):
+    if uses_postgres_search():
+        update_search_vectors(type(product).objects.filter(pk=product.pk))
+    elif _index is not None:
+        _index.add(product.pk, {field: getattr(product, field) for field in SEARCH_FIELDS})
+
+
+def unindex_product(product_id):
+    if not uses_postgres_search() and _index is not None:
+        _index.remove(product_id)
+
+
+def rank_ordering():
+    """Ordering applied by ``search_products``; the trailing key is unique so it can drive keyset pagination."""
+    if uses_postgres_search():
+        return ('-search_rank', '-created_at', 'id')
+    return ('search_position', 'id')
+
+
+def search_products(queryset, term):
+    """Filter ``queryset`` to products matching ``term``, ordered by relevance."""
+    if uses_postgres_search():
+        query = build_search_query(term)
+        if query is None:
+            return queryset
+        return (
+            queryset.filter(search_vector=query)
+            .annotate(search_rank=SearchRank(F('search_vector'), query))
+            .order_by(*rank_ordering())
+        )
+
+    if not tokenize(term):
+        return queryset
+    ranked = get_fallback_index().search(term)
+    if not ranked:
+        return queryset.none()
+    ids = [product_id for product_id, _ in ranked]
+    ordering = Case(
+        *[When(pk=product_id, then=Value(position)) for position, product_id in enumerate(ids)],
+        output_field=IntegerField(),
+    )
+    return queryset.filter(pk__in=ids).annotate(search_position=ordering).order_by(*rank_ordering())
@@ -1,6 +1,8 @@
+from decimal import Decimal
+
 from rest_framework import serializers
 from django.contrib.auth.models import User
-from .models import Category, Product, ProductVariant, Order, OrderItem, CartItem
+from .models import Category, Product, ProductVariant, Order, OrderItem, OrderStatusEvent, CartItem
 
 # For generating tokens if needed directly in a serializer (though typically done in view)
 # from rest_framework_simplejwt.tokens import RefreshToken
@@ -20,7 +22,7 @@ class ProductVariantSerializer(serializers.ModelSerializer):
         fields = ['id', 'size', 'color', 'stock', 'image_url']
 
 
-class ProductSerializer(serializers.ModelSerializer): # For product lists
+class ProductSerializer(serializers.ModelSerializer): # Full product fields (lists use ProductCardSerializer)
     category_name = serializers.CharField(source='category.name', read_only=True)
     variants = ProductVariantSerializer(many=True, read_only=True) # Assuming variants are needed in list view
 
@@ -37,6 +39,60 @@ class ProductSerializer(serializers.ModelSerializer): # For product lists
         ]
 
 
+class ProductCardSerializer(ProductSerializer): # Compact default for product lists
+    """
+    Sparse-fieldset version of ProductSerializer for list actions.
+
+    By default only what a product card renders is returned. Clients can ask
+    for other fields with ``?fields=a,b,c`` and add nested variants with
+    ``?expand=variants``. ``model_columns()`` tells the view which columns and
+    relations to load so unrequested ones are never selected or prefetched.
+    """
+    default_fields = [
+        'id', 'title', 'slug', 'category', 'category_name', 'price', 'discount_price',
+        'image_url', 'is_featured', 'sustainability_rating',
+    ]
+    expandable_fields = ['variants']
+
+    # Serializer field -> Product columns it reads ('variants' is a prefetch, not a column)
+    field_columns = {
+        'category': ['category_id'],
+        'category_name': ['category__name'],
+        'variants': [],
+    }
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        request = self.context.get('request')
+        wanted = self.requested_fields(request.query_params if request else {})
+        for name in list(self.fields):
+            if name not in wanted:
+                self.fields.pop(name)
+
+    @classmethod
+    def requested_fields(cls, params):
+        available = set(cls.Meta.fields)
+        fields_param = params.get('fields')
+        if fields_param:
+            wanted = {name.strip() for name in fields_param.split(',')} & available
+        else:
+            wanted = set(cls.default_fields)
+        expand = params.get('expand')
+        if expand:
+            wanted |= {name.strip() for name in expand.split(',')} & set(cls.expandable_fields)
+        wanted.add('id')
+        return wanted
+
+    @classmethod
+    def model_columns(cls, params):
+        """Return ``(columns for .only(), needs category join, needs variants prefetch)``."""
+        wanted = cls.requested_fields(params)
+        columns = set()
+        for name in wanted:
+            columns.update(cls.field_columns.get(name, [name]))
+        return columns, 'category_name' in wanted, 'variants' in wanted
+
+
 class ProductDetailSerializer(serializers.ModelSerializer): # For single product detail
     category_name = serializers.CharField(source='category.name', read_only=True)
     variants = ProductVariantSerializer(many=True, read_only=True)
@@ -88,33 +144,63 @@ class CartItemSerializer(serializers.ModelSerializer):
         # For POST/PUT, client mainly sends 'product', 'variant', 'quantity'.
         # 'user' or 'session_id' are set in the view.
 
-    def get_unit_price(self, obj: CartItem) -> float:
-        if obj.product:
-            price_to_use = obj.product.price
-            if obj.product.discount_price is not None:
-                price_to_use = obj.product.discount_price
-            
-            # Future consideration: if variants have their own price adjustments
-            # if obj.variant and hasattr(obj.variant, 'additional_price') and obj.variant.additional_price:
-            #     price_to_use += obj.variant.additional_price
-            return float(price_to_use)
-        return 0.0
+    def get_unit_price(self, obj: CartItem) -> Decimal:
+        # List queries are annotated by api.cart.annotate_line_totals; effective_price
+        # is the database-computed discount_price-or-price either way.
+        unit_price = getattr(obj, 'line_unit_price', None)
+        return obj.product.effective_price if unit_price is None else unit_price
+
+    def get_total_price(self, obj: CartItem) -> Decimal:
+        total = getattr(obj, 'line_total', None)
+        return obj.product.effective_price * obj.quantity if total is None else total
+
+
+class CartSummarySerializer(serializers.Serializer): # From api.cart.cart_summary / summarize_lines
+    line_count = serializers.IntegerField()
+    item_count = serializers.IntegerField()
+    subtotal = serializers.DecimalField(max_digits=12, decimal_places=2)
+    original_subtotal = serializers.DecimalField(max_digits=12, decimal_places=2)
+    savings = serializers.DecimalField(max_digits=12, decimal_places=2)
+
+
+class GuestCartItemSerializer(CartItemSerializer): # Guest lines from api.guest_cart are keyed "<product>-<variant or 0>"
+    id = serializers.CharField(read_only=True)
 
-    def get_total_price(self, obj: CartItem) -> float:
-        unit_p = self.get_unit_price(obj)
-        return float(unit_p * obj.quantity)
+
+class CartOperationSerializer(serializers.Serializer): # One entry of POST /api/cart/batch/
+    OPS = ['add', 'set', 'remove']
+
+    op = serializers.ChoiceField(choices=OPS)
+    id = serializers.CharField(required=False)             # Cart item id (guest lines: "<product>-<variant>"), or...
+    product = serializers.IntegerField(required=False)     # ...product (+ optional variant)
+    variant = serializers.IntegerField(required=False, allow_null=True)
+    quantity = serializers.IntegerField(required=False, min_value=0)
+
+    def validate(self, attrs):
+        # Plain ids only: existence is checked for the whole batch in one query (api.cart)
+        if attrs.get('id') is None and attrs.get('product') is None:
+            raise serializers.ValidationError('Either id or product is required.')
+        if attrs['op'] in ('add', 'set') and attrs.get('quantity') is None:
+            raise serializers.ValidationError({'quantity': 'This field is required.'})
+        if attrs['op'] == 'add' and attrs['quantity'] < 1:
+            raise serializers.ValidationError({'quantity': 'Must be at least 1.'})
+        return attrs
+
+
+class CartBatchSerializer(serializers.Serializer):
+    MAX_OPERATIONS = 100
+
+    session_id = serializers.CharField(required=False, allow_blank=True)
+    operations = CartOperationSerializer(many=True, allow_empty=False, max_length=MAX_OPERATIONS)
 
 
 class OrderItemSerializer(serializers.ModelSerializer):
-    product_title = serializers.CharField(source='product.title', read_only=True)
-    product_image = serializers.CharField(source='product.image_url', read_only=True, allow_null=True)
-    size = serializers.CharField(source='variant.size', read_only=True, allow_null=True)
-    color = serializers.CharField(source='variant.color', read_only=True, allow_null=True)
-    
+    # product_title/product_image/size/color are the checkout-time snapshot columns
     class Meta:
         model = OrderItem
         fields = ['id', 'product', 'product_title', 'product_image',
                  'variant', 'size', 'color', 'quantity', 'price']
+        read_only_fields = fields
 
 
 class OrderSerializer(serializers.ModelSerializer):
@@ -135,6 +221,93 @@ class OrderSerializer(serializers.ModelSerializer):
         read_only_fields = ['order_id', 'user', 'total_amount', 'status', 'created_at', 'items'] # Default for create
 
 
+class OrderSummarySerializer(serializers.ModelSerializer): # Order history rows (GET /api/orders/?view=summary)
+    item_count = serializers.IntegerField(read_only=True)
+    line_count = serializers.IntegerField(read_only=True)
+    first_item_title = serializers.CharField(read_only=True, allow_null=True)
+    first_item_image = serializers.CharField(read_only=True, allow_null=True)
+
+    class Meta:
+        model = Order
+        fields = [
+            'id', 'order_id', 'status', 'total_amount', 'created_at',
+            'item_count', 'line_count', 'first_item_title', 'first_item_image',
+        ]
+        read_only_fields = fields
+
+
+class OrderStatusUpdateSerializer(serializers.Serializer): # POST /api/orders/bulk-status/ (staff)
+    orders = serializers.ListField(child=serializers.IntegerField(), allow_empty=False, max_length=10000)
+    status = serializers.ChoiceField(choices=Order.STATUS_CHOICES)
+    note = serializers.CharField(required=False, allow_blank=True, max_length=255, default='')
+
+
+class OrderStatusEventSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = OrderStatusEvent
+        fields = ['from_status', 'to_status', 'note', 'created_at']
+
+
+class SalesReportQuerySerializer(serializers.Serializer): # GET /api/analytics/sales/ params
+    start = serializers.DateField(required=False)
+    end = serializers.DateField(required=False)
+    status = serializers.CharField(required=False)  # Comma-separated order statuses
+    limit = serializers.IntegerField(required=False, min_value=1, max_value=100, default=10)
+
+    def validate_status(self, value):
+        statuses = [part.strip() for part in value.split(',') if part.strip()]
+        valid = {choice for choice, _ in Order.STATUS_CHOICES}
+        unknown = [part for part in statuses if part not in valid]
+        if unknown:
+            raise serializers.ValidationError(f"Unknown status: {', '.join(unknown)}")
+        return statuses
+
+    def validate(self, data):
+        if data.get('start') and data.get('end') and data['start'] > data['end']:
+            raise serializers.ValidationError('start must not be after end.')
+        return data
+
+
+class ExportQuerySerializer(serializers.Serializer): # GET /api/exports/<dataset>.<format> params
+    start = serializers.DateField(required=False)
+    end = serializers.DateField(required=False)
+    status = serializers.CharField(required=False)  # Comma-separated; valid values come from context['statuses']
+
+    def validate_status(self, value):
+        statuses = [part.strip() for part in value.split(',') if part.strip()]
+        unknown = [part for part in statuses if part not in self.context['statuses']]
+        if unknown:
+            raise serializers.ValidationError(f"Unknown status: {', '.join(unknown)}")
+        return statuses
+
+    def validate(self, data):
+        if data.get('start') and data.get('end') and data['start'] > data['end']:
+            raise serializers.ValidationError('start must not be after end.')
+        return data
+
+
+class SalesFiguresSerializer(serializers.Serializer):
+    orders = serializers.IntegerField()
+    units = serializers.IntegerField()
+    revenue = serializers.DecimalField(max_digits=14, decimal_places=2)
+
+
+class SalesDaySerializer(SalesFiguresSerializer):
+    day = serializers.DateField()
+
+
+class SalesRankSerializer(SalesFiguresSerializer):
+    id = serializers.IntegerField()
+    name = serializers.CharField(allow_null=True)
+
+
+class SalesReportSerializer(serializers.Serializer):
+    totals = SalesFiguresSerializer()
+    daily = SalesDaySerializer(many=True)
+    top_products = SalesRankSerializer(many=True)
+    top_categories = SalesRankSerializer(many=True)
+
+
 class UserSerializer(serializers.ModelSerializer): # For displaying user info (login, /auth/user)
     firstName = serializers.CharField(source='first_name', allow_blank=True, required=False)
     lastName = serializers.CharField(source='last_name', allow_blank=True, required=False)
@@ -0,0 +1,34 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from django.utils import timezone
+
+from . import search
+from .cache import bump_catalog_version
+from .models import Category, Product, ProductVariant
+
+
+@receiver(post_save, sender=Product)
+def product_saved(sender, instance, update_fields=None, **kwargs):
+    if update_fields is not None and not set(update_fields) & set(search.SEARCH_FIELDS):
+        return
+    search.index_product(instance)
+
+
+@receiver(post_delete, sender=Product)
+def product_deleted(sender, instance, **kwargs):
+    search.unindex_product(instance.pk)
+
+
+@receiver([post_save, post_delete], sender=Category)
+@receiver([post_save, post_delete], sender=Product)
+@receiver([post_save, post_delete], sender=ProductVariant)
+def catalog_changed(sender, **kwargs):
+    # Invalidates every catalog cache entry keyed on the version (facets, ...)
+    bump_catalog_version()
+
+
+@receiver([post_save, post_delete], sender=ProductVariant)
+def variant_changed(sender, instance, **kwargs):
+    # Variants are part of the product payload, so they move the product's
+    # Last-Modified/ETag too. update() skips Product signals and auto_now.
+    Product.objects.filter(pk=instance.product_id).update(updated_at=timezone.now())
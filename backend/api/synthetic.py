@@ -0,0 +1,188 @@
+"""
+Deterministic synthetic dataset for load tests and benchmarks
+(``manage.py generate_synthetic_data``, ``manage.py benchmark_api``).
+
+The same seed and counts always produce the same rows: every choice comes
+from one ``random.Random(seed)``, and order UUIDs are drawn from it too.
+Every row is written with batched ``bulk_create``. The rows are prefixed
+with SYNTH_PREFIX (slugs, usernames, session ids), so ``clear_synthetic_data``
+can remove them without touching real data.
+"""
+
+import random
+import time
+import uuid
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.db import connection, transaction
+from django.utils import timezone
+
+from . import search
+from .analytics import rebuild_rollups
+from .cache import bump_catalog_version
+from .models import CartItem, Category, Order, OrderItem, Product, ProductVariant
+
+User = get_user_model()
+
+SYNTH_PREFIX = 'synth-'
+SYNTH_PASSWORD = 'synthetic-password'
+
+ADJECTIVES = ['Organic', 'Recycled', 'Classic', 'Relaxed', 'Slim', 'Lightweight', 'Cozy', 'Everyday', 'Vintage', 'Eco']
+MATERIALS = ['Cotton', 'Hemp', 'Linen', 'Bamboo', 'Wool', 'Tencel', 'Denim', 'Cork', 'Silk', 'Polyester']
+KINDS = ['T-Shirt', 'Hoodie', 'Jeans', 'Dress', 'Jacket', 'Skirt', 'Sweater', 'Shorts', 'Tote Bag', 'Sneakers']
+COLORS = ['Black', 'White', 'Navy', 'Sage Green', 'Sand', 'Rust', 'Charcoal', 'Sky Blue']
+SIZES = [size for size, _ in ProductVariant.SIZE_CHOICES]
+ORDER_STATUSES = ['delivered', 'shipped', 'processing', 'pending', 'cancelled']
+ORDER_STATUS_WEIGHTS = [50, 15, 10, 15, 10]
+
+DEFAULT_COUNTS = {
+    'categories': 20,
+    'products': 10000,
+    'variants_per_product': 3,
+    'users': 1000,
+    'carts': 500,
+    'orders': 5000,
+}
+
+
+def synthetic_data_exists():
+    return Category.objects.filter(slug__startswith=SYNTH_PREFIX).exists()
+
+
+def clear_synthetic_data():
+    # Users first: their orders and cart lines go with them (CASCADE)
+    User.objects.filter(username__startswith=SYNTH_PREFIX).delete()
+    CartItem.objects.filter(session_id__startswith=SYNTH_PREFIX).delete()
+    Product.objects.filter(slug__startswith=SYNTH_PREFIX).delete()
+    Category.objects.filter(slug__startswith=SYNTH_PREFIX).delete()
+
+
+def _insert(model, rows, batch_size):
+    for start in range(0, len(rows), batch_size):
+        model.objects.bulk_create(rows[start:start + batch_size])
+    return rows
+
+
+def generate_synthetic_data(counts=None, seed=1, days=90, batch_size=2000, log=None):
+    """Insert the dataset in one transaction and return the number of rows per model."""
+    counts = {**DEFAULT_COUNTS, **(counts or {})}
+    log = log or (lambda message: None)
+    rng = random.Random(seed)
+    now = timezone.now()
+    written = {}
+
+    def phase(name, rows, started):
+        written[name] = len(rows)
+        elapsed = time.perf_counter() - started
+        log(f'  {name}: {len(rows)} rows in {elapsed:.2f}s ({len(rows) / max(elapsed, 1e-6):.0f} rows/s)')
+
+    with transaction.atomic():
+        started = time.perf_counter()
+        categories = _insert(Category, [
+            Category(name=f'Synthetic Category {i}', slug=f'{SYNTH_PREFIX}cat-{i}',
+                     description=f'Synthetic category {i}')
+            for i in range(1, counts['categories'] + 1)
+        ], batch_size)
+        phase('categories', categories, started)
+
+        started = time.perf_counter()
+        products = []
+        for i in range(1, counts['products'] + 1):
+            price = Decimal(rng.randint(500, 25000)) / 100
+            title = f'{rng.choice(ADJECTIVES)} {rng.choice(MATERIALS)} {rng.choice(KINDS)} {i}'
+            products.append(Product(
+                title=title,
+                slug=f'{SYNTH_PREFIX}product-{i}',
+                category=rng.choice(categories),
+                description=f'{title}. Made from responsibly sourced materials. ' * 3,
+                price=price,
+                discount_price=(price * Decimal('0.8')).quantize(Decimal('0.01')) if rng.random() < 0.2 else None,
+                inventory=rng.randint(0, 500),
+                image_url=f'https://example.com/synthetic/{i}.jpg',
+                is_featured=rng.random() < 0.05,
+                is_active=rng.random() < 0.95,
+                materials=rng.choice(MATERIALS),
+                sustainability_rating=rng.randint(0, 5),
+            ))
+        _insert(Product, products, batch_size)
+        phase('products', products, started)
+
+        started = time.perf_counter()
+        combos = [(size, color) for size in SIZES for color in COLORS]
+        variants = []
+        for product in products:
+            for size, color in rng.sample(combos, min(counts['variants_per_product'], len(combos))):
+                variants.append(ProductVariant(product=product, size=size, color=color, stock=rng.randint(0, 50)))
+        _insert(ProductVariant, variants, batch_size)
+        phase('variants', variants, started)
+
+        # What carts and orders pick from: (product, variant or None) of active products
+        lines = [(variant.product, variant) for variant in variants if variant.product.is_active]
+        lines += [(product, None) for product in products if product.is_active and not counts['variants_per_product']]
+
+        started = time.perf_counter()
+        password = make_password(SYNTH_PASSWORD, salt='synthetic')  # One hash for all; synthetic accounts only
+        users = _insert(User, [
+            User(username=f'{SYNTH_PREFIX}user-{i}', email=f'{SYNTH_PREFIX}user-{i}@example.com',
+                 first_name='Synthetic', last_name=f'User {i}', password=password)
+            for i in range(1, counts['users'] + 1)
+        ], batch_size)
+        phase('users', users, started)
+
+        started = time.perf_counter()
+        cart_items = []
+        for i in range(counts['carts'] if lines else 0):
+            # Even carts belong to users, odd ones to guest sessions
+            owner = {'user': users[i // 2 % len(users)]} if users and i % 2 == 0 else {'session_id': f'{SYNTH_PREFIX}session-{i}'}
+            for product, variant in rng.sample(lines, min(rng.randint(1, 4), len(lines))):
+                cart_items.append(CartItem(product=product, variant=variant, quantity=rng.randint(1, 3), **owner))
+        # A user can own several carts above; keep one line per (user, product, variant)
+        unique_items = list({(item.user_id, item.session_id, item.product_id, item.variant_id): item
+                             for item in cart_items}.values())
+        _insert(CartItem, unique_items, batch_size)
+        phase('cart items', unique_items, started)
+
+        started = time.perf_counter()
+        orders, order_lines, placed_at = [], [], []
+        for _ in range(counts['orders'] if users and lines else 0):
+            user = rng.choice(users)
+            picked = rng.sample(lines, min(rng.randint(1, 4), len(lines)))
+            quantities = [rng.randint(1, 3) for _ in picked]
+            prices = [product.discount_price or product.price for product, _ in picked]
+            created_at = now - timedelta(seconds=rng.randint(0, days * 24 * 60 * 60))
+            orders.append(Order(
+                order_id=uuid.UUID(int=rng.getrandbits(128), version=4),
+                user=user, email=user.email, shipping_address=f'{rng.randint(1, 999)} Synthetic Street',
+                total_amount=sum(price * quantity for price, quantity in zip(prices, quantities)),
+                status=rng.choices(ORDER_STATUSES, ORDER_STATUS_WEIGHTS)[0],
+            ))
+            order_lines.append(list(zip(picked, quantities, prices)))
+            placed_at.append(created_at)
+        _insert(Order, orders, batch_size)
+        # auto_now_add/auto_now stamp every row with the insert time; spread them over ``days``
+        for order, created_at in zip(orders, placed_at):
+            order.created_at = order.updated_at = created_at
+        Order.objects.bulk_update(orders, ['created_at', 'updated_at'], batch_size=batch_size)
+        items = [
+            OrderItem(order=order, product=product, variant=variant, quantity=quantity, price=price,
+                      product_title=product.title, product_image=product.image_url,
+                      size=variant.size if variant else None, color=variant.color if variant else None)
+            for order, picked in zip(orders, order_lines)
+            for (product, variant), quantity, price in picked
+        ]
+        _insert(OrderItem, items, batch_size)
+        phase('orders', orders, started)
+        written['order items'] = len(items)
+
+        # Bulk writes skip the signals: search vectors, rollups and planner statistics by hand
+        search.update_search_vectors(Product.objects.filter(slug__startswith=SYNTH_PREFIX))
+        rebuild_rollups()
+
+    with connection.cursor() as cursor:
+        cursor.execute('ANALYZE')
+    search.reset_fallback_index()
+    bump_catalog_version()
+    return written
@@ -0,0 +1,52 @@
+"""
+Post-checkout and analytics tasks run by ``manage.py run_jobs`` (see api.jobs).
+
+Checkout enqueues these in the order's own transaction, so they run exactly
+for committed orders; each must tolerate being retried.
+"""
+
+from django.conf import settings
+from django.core.mail import send_mail
+
+from .analytics import apply_order_rollups
+from .cache import bump_catalog_version
+from .jobs import task
+from .models import Order
+
+
+@task('send_order_confirmation')
+def send_order_confirmation(payload):
+    order = Order.objects.filter(pk=payload['order_id']).prefetch_related('items').first()
+    if order is None:
+        return  # Deleted before the worker got to it
+    lines = [
+        f"  {item.quantity} x {item.product_title}"
+        + (f" ({item.size}, {item.color})" if item.size else '')
+        + f" - {item.price * item.quantity}"
+        for item in order.items.all()
+    ]
+    send_mail(
+        subject=f'Your order {order.order_id}',
+        message='\n'.join([
+            'Thank you for your order!', '',
+            *lines, '',
+            f'Total: {order.total_amount}',
+            f'Shipping to: {order.shipping_address}',
+        ]),
+        from_email=settings.DEFAULT_FROM_EMAIL,
+        recipient_list=[order.email],
+    )
+
+
+@task('sync_stock')
+def sync_stock(payload):
+    # Checkout reserves stock with UPDATEs, which fire no model signals; moving the
+    # catalog version drops cached product responses (and their stock levels) in
+    # every worker sharing the cache.
+    bump_catalog_version()
+
+
+@task('update_sales_rollups')
+def update_sales_rollups(payload):
+    # Idempotent: only orders whose rollup_status differs from status are moved
+    apply_order_rollups(payload['order_ids'])
@@ -11,6 +11,12 @@ router.register(r'cart',       views.CartItemViewSet,   basename='cart')
 router.register(r'orders',     views.OrderViewSet,      basename='order')
 
 urlpatterns = [
+    # Cart merge (front end calls POST /api/cart/merge/); listed before the router,
+    # whose cart/<pk>/ route would otherwise swallow it
+    path('cart/merge/',    views.merge_carts,                   name='merge-cart'),
+    # Public order tracking by order_id + email (same reason: orders/<pk>/)
+    path('orders/track/',  views.track_order,                   name='track-order'),
+
     # Core resource routes (GET /api/categories/, /api/products/, /api/cart/, /api/orders/, etc.)
     path('', include(router.urls)),
 
@@ -19,11 +25,18 @@ urlpatterns = [
     path('auth/register/', views.UserRegistrationView.as_view(), name='register'),
     path('auth/user/',     views.UserDetailView.as_view(),       name='user-detail'),
 
-    # Cart merge (front end calls POST /api/cart/merge/)
-    path('cart/merge/',    views.merge_carts,                   name='merge-cart'),
     # Legacy alias (if anything still hits /api/merge-cart/)
     path('merge-cart/',    views.merge_carts,                   name='merge-cart-legacy'),
 
+    # Catalog response cache hit/miss counters (staff only)
+    path('cache/stats/',   views.cache_stats,                  name='cache-stats'),
+
+    # Sales analytics from the daily rollups (staff only)
+    path('analytics/sales/', views.sales_analytics,            name='sales-analytics'),
+
+    # Streaming CSV / NDJSON exports of orders and the catalog (staff only)
+    path('exports/<str:dataset>.<str:fmt>', views.export_data,  name='export-data'),
+
     # Checkout (optional: your front end’s createOrder → POST /api/orders/)
     path('checkout/',      views.create_order,                 name='checkout'),
 ]
@@ -1,53 +1,251 @@
+import hashlib
+import json
+import uuid
+from datetime import timedelta
+
 from rest_framework import viewsets, permissions, status, generics
 from rest_framework.decorators import api_view, permission_classes, action
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.renderers import JSONRenderer
 from rest_framework.response import Response
 # from rest_framework.views import APIView # Not explicitly used now, but good to have if needed
+from django.conf import settings
 from django.contrib.auth import authenticate
-from django.db.models import Q, Sum, F, DecimalField
+from django.db import IntegrityError
+from django.db.models import Q, Sum, F, DecimalField, Count, Max, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import http_date
 # from django.http import Http404 # Not explicitly used, DRF handles it well
 
 # For JWT token generation
 from rest_framework_simplejwt.tokens import RefreshToken
 
 from .models import Category, Product, ProductVariant, Order, OrderItem, CartItem
+from .analytics import sales_report
+from .cache import get_response_cache, params_signature
+from .cart import (
+    CartBatchError, annotate_line_totals, apply_cart_operations, cart_summary, merge_guest_cart, summarize_lines,
+    upsert_cart_item,
+)
+from .guest_cart import GuestCart, get_guest_cart_backend
+from .exports import EXPORTS, FORMATS, stream_export
+from .checkout import EmptyCart, InsufficientStock, place_order
+from .idempotency import idempotent
+from .facets import compute_facets, variant_filter
+from .orders import transition_orders
+from .pagination import KeysetPagination
+from .search import rank_ordering, search_products, tokenize
 from .serializers import (
-    CategorySerializer, ProductSerializer, ProductDetailSerializer,
-    OrderSerializer, CartItemSerializer, UserSerializer, UserCreateSerializer
+    CategorySerializer, ProductCardSerializer, ProductDetailSerializer,
+    OrderSerializer, CartItemSerializer, GuestCartItemSerializer, CartSummarySerializer, CartBatchSerializer, OrderSummarySerializer,
+    OrderStatusUpdateSerializer, OrderStatusEventSerializer, SalesReportQuerySerializer, SalesReportSerializer,
+    ExportQuerySerializer, UserSerializer, UserCreateSerializer
 )
 
 
-class CategoryViewSet(viewsets.ReadOnlyModelViewSet):
+class ConditionalGetMixin:
+    """
+    ETag / Last-Modified support for list and retrieve. Validators come from a
+    single aggregate (max of ``conditional_timestamp_fields`` plus row count)
+    over the same queryset the action would serialize, so a matching
+    If-None-Match / If-Modified-Since is answered with 304 before any
+    serializer (or cache) work. Lists only get the ETag: a row that is deleted
+    or filtered out does not move the max timestamp, only the count.
+
+    With ``conditional_lists_by_catalog_version`` (catalog views) the list ETag
+    is the catalog version plus the query params instead, so list requests,
+    cache hits included, never aggregate over the whole filtered catalog.
+    """
+    conditional_timestamp_fields = ('updated_at',)
+    conditional_cache_control = 'public, max-age=0, must-revalidate'
+    conditional_lists_by_catalog_version = False
+
+    def get_conditional_queryset(self):
+        queryset = self.filter_queryset(self.get_queryset())
+        if self.action == 'retrieve':
+            lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+            queryset = queryset.filter(**{self.lookup_field: self.kwargs[lookup_url_kwarg]})
+        return queryset
+
+    def get_conditional_validators(self):
+        if self.action == 'list' and self.conditional_lists_by_catalog_version:
+            raw = '{}:{}:{}:{}:{}'.format(
+                self.basename, self.action, get_response_cache().get_version(),
+                self.request.get_host(),  # Pagination links are absolute URLs
+                params_signature(self.request.query_params),
+            )
+            return 'W/"{}"'.format(hashlib.sha1(raw.encode()).hexdigest()), None
+
+        aggregates = {f'max_{i}': Max(field) for i, field in enumerate(self.conditional_timestamp_fields)}
+        values = self.get_conditional_queryset().order_by().aggregate(rows=Count('pk'), **aggregates)
+        if self.action == 'retrieve' and not values['rows']:
+            return None, None  # Let retrieve() raise the 404
+        stamps = [values[key] for key in aggregates]
+        last_modified = None
+        if self.action == 'retrieve':
+            last_modified = max((stamp for stamp in stamps if stamp is not None), default=None)
+        raw = '{}:{}:{}:{}:{}'.format(
+            self.basename, self.action, params_signature(self.request.query_params),
+            values['rows'], ','.join(stamp.isoformat() if stamp else '' for stamp in stamps),
+        )
+        etag = 'W/"{}"'.format(hashlib.sha1(raw.encode()).hexdigest())
+        return etag, last_modified
+
+    def conditional_response(self, request, compute):
+        etag, last_modified = self.get_conditional_validators()
+        self.conditional_etag = etag  # Lets the response cache key follow row changes too
+        last_modified_ts = int(last_modified.timestamp()) if last_modified else None
+        if etag is not None:
+            not_modified = get_conditional_response(request, etag=etag, last_modified=last_modified_ts)
+            if not_modified is not None:
+                response = Response(status=not_modified.status_code)
+                self._set_validators(response, etag, last_modified_ts)
+                return response
+
+        response = compute()
+        if etag is not None and response.status_code == status.HTTP_200_OK:
+            self._set_validators(response, etag, last_modified_ts)
+        return response
+
+    def _set_validators(self, response, etag, last_modified_ts):
+        response['ETag'] = etag
+        if last_modified_ts is not None:
+            response['Last-Modified'] = http_date(last_modified_ts)
+        response['Cache-Control'] = self.conditional_cache_control
+        patch_vary_headers(response, ['Authorization'])
+
+    def list(self, request, *args, **kwargs):
+        return self.conditional_response(request, lambda: super(ConditionalGetMixin, self).list(request, *args, **kwargs))
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.conditional_response(request, lambda: super(ConditionalGetMixin, self).retrieve(request, *args, **kwargs))
+
+
+class CachedResponseMixin:
+    """
+    Serve the list/retrieve actions named in ``cached_actions`` through the
+    versioned catalog response cache. Only for views whose output does not
+    depend on the requesting user.
+    """
+    cached_actions = ('list', 'retrieve')
+
+    def get_response_cache_key(self):
+        request = self.request
+        lookup = ','.join(f'{k}={v}' for k, v in sorted(self.kwargs.items()))
+        return 'resp:{}:{}:{}:{}:{}:{}:{}'.format(
+            get_response_cache().get_version(),
+            getattr(self, 'conditional_etag', None) or '',  # Set by ConditionalGetMixin
+            self.basename,
+            self.action,
+            lookup,
+            request.get_host(),  # Pagination links are absolute URLs
+            params_signature(request.query_params),
+        )
+
+    def cached_response(self, compute):
+        # compute() returns a Response; only its status and plain data are cached
+        def build():
+            response = compute()
+            return response.status_code, json.loads(JSONRenderer().render(response.data))
+
+        (status_code, data), hit = get_response_cache().get_or_compute(
+            self.get_response_cache_key(), build,
+            should_cache=lambda value: value[0] == status.HTTP_200_OK,
+        )
+        response = Response(data, status=status_code)
+        response['X-Cache'] = 'HIT' if hit else 'MISS'
+        return response
+
+    def list(self, request, *args, **kwargs):
+        if 'list' not in self.cached_actions:
+            return super().list(request, *args, **kwargs)
+        return self.cached_response(lambda: super(CachedResponseMixin, self).list(request, *args, **kwargs))
+
+    def retrieve(self, request, *args, **kwargs):
+        if 'retrieve' not in self.cached_actions:
+            return super().retrieve(request, *args, **kwargs)
+        return self.cached_response(lambda: super(CachedResponseMixin, self).retrieve(request, *args, **kwargs))
+
+
+class CategoryViewSet(ConditionalGetMixin, CachedResponseMixin, viewsets.ReadOnlyModelViewSet):
     queryset = Category.objects.all()
     serializer_class = CategorySerializer
     lookup_field = 'slug'
     pagination_class = None # Assuming no pagination for categories to match Node simplicity
+    conditional_lists_by_catalog_version = True
 
 
-class ProductViewSet(viewsets.ReadOnlyModelViewSet):
+class ProductViewSet(ConditionalGetMixin, CachedResponseMixin, viewsets.ReadOnlyModelViewSet):
     queryset = Product.objects.filter(is_active=True)
     lookup_field = 'slug'
-    pagination_class = None # UNCOMMENT if frontend expects flat list, not paginated response
+    # Product payloads embed the category name; variant writes touch Product.updated_at (see signals)
+    conditional_timestamp_fields = ('updated_at', 'category__updated_at')
+    conditional_lists_by_catalog_version = True # Catalog writes bump the version (signals, bulk paths)
+    pagination_class = KeysetPagination # Only used when cursor mode is on, see paginator below
+
+    # ?sort= keys -> keyset ordering; the last key must be unique so cursors are stable
+    SORT_ORDERINGS = {
+        'newest': ('-created_at', 'id'),
+        'oldest': ('created_at', 'id'),
+        'title': ('title', 'id'),
+        'price_asc': ('effective_price', 'id'),
+        'price_desc': ('-effective_price', '-id'), # Same direction on both keys: backward index scan
+        'sustainability': ('-sustainability_rating', '-created_at', 'id'),
+    }
+    DEFAULT_SORT = 'newest'
+
+    @property
+    def paginator(self):
+        # The current frontend expects a flat list, so cursor pagination is opt-in:
+        # ?paginate=cursor (or following a next/previous link carrying ?cursor=),
+        # or globally via settings.PRODUCT_CURSOR_PAGINATION.
+        if not hasattr(self, '_paginator'):
+            params = self.request.query_params
+            mode = params.get('paginate', '').lower()
+            if mode in ('cursor', 'true', '1'):
+                enabled = True
+            elif mode in ('false', '0', 'none'):
+                enabled = False
+            else:
+                enabled = 'cursor' in params or getattr(settings, 'PRODUCT_CURSOR_PAGINATION', False)
+            self._paginator = self.pagination_class() if enabled else None
+        return self._paginator
+
+    def get_keyset_ordering(self):
+        if tokenize(self.request.query_params.get('search')):
+            return rank_ordering()
+        sort = self.request.query_params.get('sort', self.DEFAULT_SORT)
+        return self.SORT_ORDERINGS.get(sort, self.SORT_ORDERINGS[self.DEFAULT_SORT])
 
     def get_serializer_class(self):
         if self.action == 'retrieve':
             return ProductDetailSerializer
-        return ProductSerializer # This now includes variants
+        return ProductCardSerializer # Compact card; ?fields= / ?expand=variants for more
+
+    def get_base_queryset(self):
+        queryset = Product.objects.filter(is_active=True)
+        if self.action != 'list':
+            return queryset.select_related('category').prefetch_related('variants')
+
+        # Load only the columns/relations the requested fieldset serializes, plus sort keys
+        columns, needs_category, needs_variants = ProductCardSerializer.model_columns(self.request.query_params)
+        columns.update(key.lstrip('-') for key in self.get_keyset_ordering() if not key.lstrip('-').startswith('search_'))
+        if needs_category:
+            queryset = queryset.select_related('category')
+        if needs_variants:
+            queryset = queryset.prefetch_related('variants')
+        return queryset.only(*columns)
     
     def get_queryset(self):
-        queryset = Product.objects.filter(is_active=True).prefetch_related('variants', 'category')
+        queryset = self.get_base_queryset()
         
         category_slug = self.request.query_params.get('category')
         if category_slug:
             queryset = queryset.filter(category__slug=category_slug)
         
-        search_term = self.request.query_params.get('search')
-        if search_term:
-            queryset = queryset.filter(
-                Q(title__icontains=search_term) | 
-                Q(description__icontains=search_term) |
-                Q(materials__icontains=search_term)
-            )
-        
         is_featured = self.request.query_params.get('featured')
         if is_featured and is_featured.lower() == 'true':
             queryset = queryset.filter(is_featured=True)
@@ -55,10 +253,11 @@ class ProductViewSet(viewsets.ReadOnlyModelViewSet):
         # Additional filters from your original view (optional, Node didn't have them)
         min_price = self.request.query_params.get('min_price')
         max_price = self.request.query_params.get('max_price')
+        # effective_price = discount_price if set, else price (what checkout charges); indexed
         if min_price:
-            queryset = queryset.filter(price__gte=min_price) # Or discount_price logic
+            queryset = queryset.filter(effective_price__gte=min_price)
         if max_price:
-            queryset = queryset.filter(price__lte=max_price) # Or discount_price logic
+            queryset = queryset.filter(effective_price__lte=max_price)
         
         sustainability = self.request.query_params.get('sustainability')
         if sustainability:
@@ -66,8 +265,37 @@ class ProductViewSet(viewsets.ReadOnlyModelViewSet):
                 queryset = queryset.filter(sustainability_rating__gte=int(sustainability))
             except ValueError:
                 pass # Ignore invalid sustainability param
+
+        size = self.request.query_params.get('size')
+        color = self.request.query_params.get('color')
+        if size or color:
+            queryset = queryset.filter(variant_filter(size=size, color=color))
+
+        # Ranked full-text search (GIN-indexed tsvector on PostgreSQL, inverted index otherwise).
+        # Applied last so relevance ordering wins over the default -created_at.
+        search_term = self.request.query_params.get('search')
+        if tokenize(search_term):
+            return search_products(queryset, search_term)
         
-        return queryset
+        return queryset.order_by(*self.get_keyset_ordering())
+
+    # Query params that change the filtered product set (and so the facet counts)
+    FILTER_PARAMS = ('category', 'search', 'featured', 'min_price', 'max_price', 'sustainability', 'size', 'color')
+
+    @action(detail=False, methods=['get'], url_path='facets')
+    def facets(self, request):
+        # GET /api/products/facets/?<same filters as the list> -> per-facet counts
+        response_cache = get_response_cache()
+        cache_key = 'facets:{}:{}'.format(
+            response_cache.get_version(), params_signature(request.query_params, self.FILTER_PARAMS)
+        )
+        data, hit = response_cache.get_or_compute(
+            cache_key, lambda: compute_facets(self.get_queryset()),
+            timeout=getattr(settings, 'FACET_CACHE_TIMEOUT', 600),
+        )
+        response = Response(data)
+        response['X-Cache'] = 'HIT' if hit else 'MISS'
+        return response
 
 
 class CartItemViewSet(viewsets.ModelViewSet):
@@ -77,15 +305,66 @@ class CartItemViewSet(viewsets.ModelViewSet):
                                 # but permission_classes=[AllowAny] overrides need for auth token
     pagination_class = None # Carts are usually not paginated
 
+    def get_guest_cart(self):
+        # Guest carts live in the key-value store when settings.GUEST_CART_STORE has a backend
+        if self.request.user.is_authenticated:
+            return None
+        backend = get_guest_cart_backend()
+        if backend is None:
+            return None
+        session_id = self.request.query_params.get('session_id')
+        if not session_id and isinstance(self.request.data, dict):
+            session_id = self.request.data.get('session_id')
+        return GuestCart(session_id, backend) if session_id else None
+
+    def get_serializer_class(self):
+        if self.get_guest_cart() is not None:
+            return GuestCartItemSerializer
+        return super().get_serializer_class()
+
+    def list(self, request, *args, **kwargs):
+        # GET /api/cart/?summary=true returns {items, summary} instead of the bare item list
+        include_summary = request.query_params.get('summary', '').lower() in ('1', 'true')
+        guest_cart = self.get_guest_cart()
+        if guest_cart is not None:
+            lines = guest_cart.lines()
+            items = GuestCartItemSerializer(lines, many=True).data
+            summary = summarize_lines(lines) if include_summary else None
+        else:
+            queryset = self.filter_queryset(self.get_queryset())
+            items = self.get_serializer(queryset, many=True).data
+            summary = cart_summary(queryset) if include_summary else None
+
+        if summary is None:
+            return Response(items)
+        return Response({'items': items, 'summary': CartSummarySerializer(summary).data})
+
+    # GET /api/cart/summary/ - totals only (one aggregate query), e.g. for the cart badge
+    @action(detail=False, methods=['get'], url_path='summary', permission_classes=[permissions.AllowAny])
+    def summary(self, request):
+        guest_cart = self.get_guest_cart()
+        if guest_cart is not None:
+            return Response(CartSummarySerializer(summarize_lines(guest_cart.lines())).data)
+        return Response(CartSummarySerializer(cart_summary(self.get_queryset())).data)
+
+    def get_object(self):
+        guest_cart = self.get_guest_cart()
+        if guest_cart is None:
+            return super().get_object()
+        item = guest_cart.get_line(self.kwargs[self.lookup_url_kwarg or self.lookup_field])
+        if item is None:
+            raise NotFound()
+        return item
+
     def get_queryset(self):
-        # For GET /api/cart/ (list action)
-        if self.action == 'list':
+        # For GET /api/cart/ (list action) and /api/cart/summary/; line totals come from SQL
+        if self.action in ('list', 'summary'):
             if self.request.user.is_authenticated:
-                return CartItem.objects.filter(user=self.request.user).select_related('product', 'variant')
+                return annotate_line_totals(CartItem.objects.filter(user=self.request.user).select_related('product', 'variant'))
             
             session_id = self.request.query_params.get('session_id')
             if session_id:
-                return CartItem.objects.filter(session_id=session_id).select_related('product', 'variant')
+                return annotate_line_totals(CartItem.objects.filter(session_id=session_id).select_related('product', 'variant'))
             return CartItem.objects.none() # No user, no session_id for list
         
         # For retrieve, update, destroy actions (e.g. /api/cart/{id}/)
@@ -101,42 +380,56 @@ class CartItemViewSet(viewsets.ModelViewSet):
         variant = serializer.validated_data.get('variant')
         quantity = serializer.validated_data.get('quantity')
 
+        guest_cart = self.get_guest_cart()
+        if guest_cart is not None:
+            serializer.instance = guest_cart.add(product, variant, quantity)
+            return
+
+        # One INSERT ... ON CONFLICT DO UPDATE ... RETURNING round trip adds to an
+        # existing line or creates it, for user and guest (session_id) carts alike.
         if self.request.user.is_authenticated:
-            cart_item, created = CartItem.objects.get_or_create(
-                user=self.request.user,
-                product=product,
-                variant=variant,
-                defaults={'quantity': quantity}
-            )
-            if not created:
-                cart_item.quantity = F('quantity') + quantity
-                cart_item.save()
-                cart_item.refresh_from_db() # Get updated quantity
-            serializer.instance = cart_item # So serializer can return the final state
+            serializer.instance = upsert_cart_item(product, variant, quantity, user=self.request.user)
         else:
             session_id = self.request.data.get('session_id') # Get session_id from POST body
             if not session_id:
-                # This should be handled by the serializer or view validation before perform_create
-                # but as a fallback:
-                # raise serializers.ValidationError({'session_id': 'This field is required for guest users.'})
-                # For now, relying on frontend to send it. If not, it will fail unique constraint or save with None.
-                # Better to validate upfront.
-                # For now, if it gets here without session_id from body, it might fail.
-                # The serializer could also have session_id as a write_only field.
-                 pass # Let it proceed; if session_id is None and unique_together expects it, it might error
-
-            cart_item, created = CartItem.objects.get_or_create(
-                session_id=session_id, # Make sure session_id is provided
-                product=product,
-                variant=variant,
-                defaults={'quantity': quantity}
-            )
-            if not created:
-                cart_item.quantity = F('quantity') + quantity
-                cart_item.save()
-                cart_item.refresh_from_db()
-            serializer.instance = cart_item
-            # serializer.save(session_id=session_id) # If session_id was part of serializer fields
+                raise ValidationError({'session_id': 'This field is required for guest users.'})
+            serializer.instance = upsert_cart_item(product, variant, quantity, session_id=session_id)
+
+    def perform_update(self, serializer):
+        guest_cart = self.get_guest_cart()
+        if guest_cart is None:
+            return super().perform_update(serializer)
+        # Only the quantity of a guest line can change; product/variant identify the line
+        quantity = serializer.validated_data.get('quantity', serializer.instance.quantity)
+        serializer.instance = guest_cart.set_quantity(serializer.instance, quantity)
+
+    def perform_destroy(self, instance):
+        guest_cart = self.get_guest_cart()
+        if guest_cart is None:
+            return super().perform_destroy(instance)
+        guest_cart.remove(instance)
+
+    # POST /api/cart/batch/ {session_id?, operations: [{op: add|set|remove, id | product [+ variant], quantity}]}
+    @action(detail=False, methods=['post'], url_path='batch', permission_classes=[permissions.AllowAny])
+    def batch(self, request):
+        serializer = CartBatchSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+
+        owner = {'user': request.user} if request.user.is_authenticated else {'session_id': data.get('session_id')}
+        if not request.user.is_authenticated and not owner['session_id']:
+            return Response({'error': 'session_id is required for guest users.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        guest_cart = self.get_guest_cart()
+        try:
+            if guest_cart is not None:
+                return Response(GuestCartItemSerializer(guest_cart.apply_operations(data['operations']), many=True).data)
+            cart_items = apply_cart_operations(data['operations'], **owner)
+        except CartBatchError as e:
+            return Response({'operations': e.errors}, status=status.HTTP_400_BAD_REQUEST)
+        except IntegrityError: # A concurrent add created one of our new lines; safe to retry
+            return Response({'error': 'Cart changed concurrently, please retry.'}, status=status.HTTP_409_CONFLICT)
+        return Response(CartItemSerializer(cart_items, many=True).data)
 
     # To handle DELETE /api/cart?session_id=... (clear cart for session)
     @action(detail=False, methods=['delete'], url_path='clear', permission_classes=[permissions.AllowAny])
@@ -145,6 +438,11 @@ class CartItemViewSet(viewsets.ModelViewSet):
             CartItem.objects.filter(user=request.user).delete()
             return Response({'message': 'User cart cleared'}, status=status.HTTP_204_NO_CONTENT)
         
+        guest_cart = self.get_guest_cart()
+        if guest_cart is not None:
+            guest_cart.clear()
+            return Response({'message': 'Guest cart cleared'}, status=status.HTTP_204_NO_CONTENT)
+
         session_id = request.query_params.get('session_id')
         if session_id:
             CartItem.objects.filter(session_id=session_id).delete()
@@ -154,21 +452,107 @@ class CartItemViewSet(viewsets.ModelViewSet):
                         status=status.HTTP_400_BAD_REQUEST)
 
 
-class OrderViewSet(viewsets.ModelViewSet): # Handles GET /api/orders/, GET /api/orders/{id}/
+class OrderViewSet(ConditionalGetMixin, viewsets.ModelViewSet): # Handles GET /api/orders/, GET /api/orders/{id}/
     serializer_class = OrderSerializer
     permission_classes = [permissions.IsAuthenticated]
+    conditional_cache_control = 'private, no-cache'
     # For POST /api/orders/, if you want to use this ViewSet, override create()
     # For now, assuming /api/checkout (create_order view) is used.
 
+    def is_summary_list(self):
+        # GET /api/orders/?view=summary: one row per order (counts + first-item thumbnail), keyset pages
+        return self.action == 'list' and self.request.query_params.get('view') == 'summary'
+
+    @property
+    def paginator(self):
+        if not hasattr(self, '_paginator'):
+            self._paginator = KeysetPagination() if self.is_summary_list() else super().paginator
+        return self._paginator
+
+    def get_keyset_ordering(self):
+        return ('-created_at', 'id')
+
+    def get_serializer_class(self):
+        if self.is_summary_list():
+            return OrderSummarySerializer
+        return super().get_serializer_class()
+
     def get_queryset(self):
-        return Order.objects.filter(user=self.request.user).prefetch_related('items', 'items__product', 'items__variant')
+        queryset = Order.objects.filter(user=self.request.user)
+        if not self.is_summary_list():
+            return queryset.prefetch_related('items') # Items carry their own product/variant snapshot
+
+        # Correlated subqueries over api_orderitem only: one query, no OrderItem objects or product joins
+        items = OrderItem.objects.filter(order=OuterRef('pk'))
+        first_item = items.order_by('pk')
+        totals = items.order_by().values('order')
+        return queryset.only('id', 'order_id', 'status', 'total_amount', 'created_at', 'updated_at').annotate(
+            item_count=Coalesce(Subquery(totals.annotate(n=Sum('quantity')).values('n')), 0),
+            line_count=Coalesce(Subquery(totals.annotate(n=Count('pk')).values('n')), 0),
+            first_item_title=Subquery(first_item.values('product_title')[:1]),
+            first_item_image=Subquery(first_item.values('product_image')[:1]),
+        )
     
+    # POST /api/orders/bulk-status/ {orders: [ids], status, note?} (staff): one set-based transition
+    @action(detail=False, methods=['post'], url_path='bulk-status', permission_classes=[permissions.IsAdminUser])
+    def bulk_status(self, request):
+        serializer = OrderStatusUpdateSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+        result = transition_orders(data['orders'], data['status'], changed_by=request.user, note=data['note'])
+        return Response({
+            'status': data['status'],
+            'updated': result['updated'],
+            'skipped': [{'id': pk, 'status': current} for pk, current in sorted(result['skipped'].items())],
+            'missing': result['missing'],
+        })
+
     # If create_order logic moves here:
     # def perform_create(self, serializer):
     #    # Complex logic from create_order view would go here
     #    # serializer.save(user=self.request.user, ...)
 
 
+@api_view(['GET'])
+@permission_classes([permissions.IsAdminUser])
+def cache_stats(request): # GET /api/cache/stats/ (staff only, per worker process)
+    response_cache = get_response_cache()
+    return Response({
+        'backend': type(response_cache.backend).__name__,
+        'catalog_version': response_cache.get_version(),
+        **response_cache.stats(),
+    })
+
+
+
+@api_view(['GET'])
+@permission_classes([permissions.IsAdminUser])
+def sales_analytics(request): # GET /api/analytics/sales/?start=&end=&status=&limit= (staff only)
+    params = SalesReportQuerySerializer(data=request.query_params)
+    params.is_valid(raise_exception=True)
+    end = params.validated_data.get('end') or timezone.localdate()
+    start = params.validated_data.get('start') or end - timedelta(days=29)
+
+    # Reads only the daily rollup rows, never the order tables
+    report = sales_report(start, end, params.validated_data.get('status'), params.validated_data['limit'])
+    return Response({'start': start, 'end': end, **SalesReportSerializer(report).data})
+
+
+@api_view(['GET'])
+@permission_classes([permissions.IsAdminUser])
+def export_data(request, dataset, fmt): # GET /api/exports/{orders,products}.{csv,ndjson}?start=&end=&status= (staff only)
+    if dataset not in EXPORTS or fmt not in FORMATS:
+        raise NotFound()
+    params = ExportQuerySerializer(data=request.query_params, context={'statuses': EXPORTS[dataset][1]})
+    params.is_valid(raise_exception=True)
+    filters = {'start': params.validated_data.get('start'), 'end': params.validated_data.get('end'),
+               'statuses': params.validated_data.get('status')}
+
+    # Rows are read with a server-side cursor and sent as they are produced
+    response = StreamingHttpResponse(stream_export(dataset, fmt, **filters), content_type=FORMATS[fmt])
+    response['Content-Disposition'] = f'attachment; filename="{dataset}-{timezone.localdate():%Y%m%d}.{fmt}"'
+    return response
+
 # Auth Views
 @api_view(['POST'])
 @permission_classes([permissions.AllowAny])
@@ -222,12 +606,9 @@ class UserDetailView(generics.RetrieveUpdateAPIView): # GET, PUT, PATCH /api/aut
 # Custom Order Creation and Cart Merge Views
 @api_view(['POST'])
 @permission_classes([permissions.IsAuthenticated]) # Only authenticated users can create orders
+@idempotent('checkout') # Retries with the same Idempotency-Key replay the first response
 def create_order(request): # Corresponds to /api/checkout/
     user = request.user
-    cart_items = CartItem.objects.filter(user=user).select_related('product', 'variant')
-    
-    if not cart_items.exists():
-        return Response({'error': 'Cart is empty'}, status=status.HTTP_400_BAD_REQUEST)
     
     # Extract required fields from request body for the order
     email = request.data.get('email', user.email) # Default to user's email
@@ -236,48 +617,44 @@ def create_order(request): # Corresponds to /api/checkout/
     if not shipping_address:
         return Response({'error': 'Shipping address is required.'}, status=status.HTTP_400_BAD_REQUEST)
 
-    # Calculate total amount
-    total_amount = 0
-    for item in cart_items:
-        price_to_use = item.product.price
-        if item.product.discount_price is not None:
-            price_to_use = item.product.discount_price
-        # Add variant price adjustments here if applicable
-        total_amount += price_to_use * item.quantity
-    
-    order_data = {
-        'user': user,
-        'email': email,
-        'shipping_address': shipping_address,
-        'total_amount': total_amount,
-        'status': 'pending' # Default status
-    }
-    order = Order.objects.create(**order_data)
-    
-    order_items_to_create = []
-    for cart_item in cart_items:
-        price_at_purchase = cart_item.product.price
-        if cart_item.product.discount_price is not None:
-            price_at_purchase = cart_item.product.discount_price
-        # Add variant price adjustments here if applicable
-
-        order_items_to_create.append(
-            OrderItem(
-                order=order,
-                product=cart_item.product,
-                variant=cart_item.variant,
-                quantity=cart_item.quantity,
-                price=price_at_purchase
-            )
-        )
-    OrderItem.objects.bulk_create(order_items_to_create)
-    
-    cart_items.delete() # Clear the user's cart
+    # Totals, stock reservation, order rows and cart clearing happen in one transaction
+    try:
+        order = place_order(user, email, shipping_address)
+    except EmptyCart:
+        return Response({'error': 'Cart is empty'}, status=status.HTTP_400_BAD_REQUEST)
+    except InsufficientStock as e:
+        return Response({'error': 'Insufficient stock', 'shortages': e.shortages},
+                        status=status.HTTP_409_CONFLICT)
     
     serializer = OrderSerializer(order) # Serialize the created order
     return Response(serializer.data, status=status.HTTP_201_CREATED)
 
 
+@api_view(['GET'])
+@permission_classes([permissions.AllowAny])
+def track_order(request): # GET /api/orders/track/?order_id=<uuid>&email=... (TrackOrderPage)
+    order_id = request.query_params.get('order_id', '').strip()
+    email = request.query_params.get('email', '').strip()
+    try:
+        order = Order.objects.only('id', 'order_id', 'status', 'created_at', 'updated_at').get(
+            order_id=uuid.UUID(order_id), email__iexact=email,
+        ) if email else None
+    except (ValueError, Order.DoesNotExist):
+        order = None
+    if order is None: # Same answer for a wrong id or a wrong email
+        return Response({'error': 'Order not found.'}, status=status.HTTP_404_NOT_FOUND)
+
+    # Newest first, served by the (order, created_at) index
+    events = order.status_events.order_by('-created_at', '-id')[:50]
+    return Response({
+        'order_id': order.order_id,
+        'status': order.status,
+        'created_at': order.created_at,
+        'updated_at': order.updated_at,
+        'events': OrderStatusEventSerializer(events, many=True).data,
+    })
+
+
 @api_view(['POST'])
 # @permission_classes([permissions.IsAuthenticated]) # Node version allowed this for anyone with a session_id
 @permission_classes([permissions.AllowAny]) # Let's make it AllowAny to match Node's implied behavior for POST
@@ -286,42 +663,20 @@ def merge_carts(request): # POST /api/cart/merge/
     if not session_id:
         return Response({'error': 'Session ID is required in the request body.'}, status=status.HTTP_400_BAD_REQUEST)
 
-    # Node.js behavior for /api/cart/merge was to RETRIEVE the guest cart.
-    # Let's replicate that for now. If a true merge is needed, the logic would be different.
-    
-    guest_cart_items = CartItem.objects.filter(session_id=session_id).select_related('product', 'variant')
-    if not guest_cart_items.exists():
-        return Response([], status=status.HTTP_200_OK) # Or 404 if preferred for empty/non-existent cart
-
-    serializer = CartItemSerializer(guest_cart_items, many=True)
+    guest_cart_backend = get_guest_cart_backend()
+    if guest_cart_backend is not None: # Guest cart lives in the key-value store
+        guest_cart = GuestCart(session_id, guest_cart_backend)
+        if not request.user.is_authenticated:
+            return Response(GuestCartItemSerializer(guest_cart.lines(), many=True).data, status=status.HTTP_200_OK)
+        return Response(CartItemSerializer(guest_cart.merge_into(request.user), many=True).data, status=status.HTTP_200_OK)
+
+    # Guests keep the Node.js behaviour: just RETRIEVE the guest cart
+    if not request.user.is_authenticated:
+        guest_cart_items = CartItem.objects.filter(session_id=session_id).select_related('product', 'variant')
+        serializer = CartItemSerializer(guest_cart_items, many=True)
+        return Response(serializer.data, status=status.HTTP_200_OK)
+
+    # Logged in: fold the guest cart into the user's cart (constant number of statements)
+    merged_user_cart = merge_guest_cart(request.user, session_id)
+    serializer = CartItemSerializer(merged_user_cart, many=True)
     return Response(serializer.data, status=status.HTTP_200_OK)
-
-    # --- IF YOU WANT A TRUE MERGE (when user logs in) ---
-    # This logic would typically be called by the frontend *after* successful login,
-    # passing the old guest session_id.
-    # if not request.user.is_authenticated:
-    #     return Response({'error': 'User must be authenticated for a true merge.'}, status=status.HTTP_401_UNAUTHORIZED)
-    
-    # guest_cart_items = CartItem.objects.filter(session_id=session_id)
-    # if not guest_cart_items.exists():
-    #     # Return current user's cart or empty if nothing to merge
-    #     user_cart = CartItem.objects.filter(user=request.user).select_related('product', 'variant')
-    #     serializer = CartItemSerializer(user_cart, many=True)
-    #     return Response(serializer.data, status=status.HTTP_200_OK)
-
-    # for guest_item in guest_cart_items:
-    #     user_item, created = CartItem.objects.get_or_create(
-    #         user=request.user,
-    #         product=guest_item.product,
-    #         variant=guest_item.variant,
-    #         defaults={'quantity': guest_item.quantity}
-    #     )
-    #     if not created: # Item already exists in user's cart, sum quantities
-    #         user_item.quantity = F('quantity') + guest_item.quantity
-    #         user_item.save()
-    
-    # guest_cart_items.delete() # Delete the guest cart items after merging
-    
-    # merged_user_cart = CartItem.objects.filter(user=request.user).select_related('product', 'variant')
-    # serializer = CartItemSerializer(merged_user_cart, many=True)
-    # return Response(serializer.data, status=status.HTTP_200_OK)
\ No newline at end of file
@@ -136,3 +136,66 @@ CORS_ALLOWED_ORIGINS = [
     "https://*.repl.co",
     "http://localhost:5173"
 ]
+
+# Product list pagination: False keeps /api/products/ a flat list (what the
+# current frontend expects); clients can still opt in with ?paginate=cursor.
+PRODUCT_CURSOR_PAGINATION = False
+
+# Catalog response cache (see api/cache.py). The default LRU is per process, so
+# a catalog write only invalidates the worker that made it; set REDIS_URL to
+# share entries and the catalog version whenever more than one worker runs
+# (`manage.py check --deploy` warns about the per-process default).
+REDIS_URL = os.getenv('REDIS_URL')
+
+RESPONSE_CACHE = {
+    'BACKEND': 'api.cache.LocMemLRUBackend',
+    'OPTIONS': {'max_entries': 2000},
+    'TIMEOUT': 300,
+}
+
+if REDIS_URL:
+    CACHES = {
+        'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+        'catalog': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+        },
+    }
+    RESPONSE_CACHE.update({
+        'BACKEND': 'api.cache.DjangoCacheBackend',
+        'OPTIONS': {'alias': 'catalog'},
+    })
+
+# Guest (anonymous) carts: one hash per session_id in a key-value store, expiring
+# TTL seconds after the last change. BACKEND None keeps them in the CartItem table;
+# api.guest_cart.LocMemGuestCartBackend is a single-process stand-in for development.
+GUEST_CART_STORE = {
+    'BACKEND': None,
+    'OPTIONS': {},
+    'TTL': 30 * 24 * 60 * 60,
+}
+
+if REDIS_URL:
+    GUEST_CART_STORE.update({
+        'BACKEND': 'api.guest_cart.RedisGuestCartBackend',
+        'OPTIONS': {'location': REDIS_URL},
+    })
+
+# Background jobs (api.jobs, processed by `manage.py run_jobs`)
+JOB_QUEUE = {
+    'MAX_ATTEMPTS': 5,
+    'BACKOFF_BASE': 10,             # seconds before the first retry, doubling per attempt
+    'BACKOFF_MAX': 60 * 60,
+    'VISIBILITY_TIMEOUT': 10 * 60,  # running jobs older than this are requeued
+}
+
+# Order confirmation emails (sent from the job worker)
+EMAIL_BACKEND = os.getenv('EMAIL_BACKEND', 'django.core.mail.backends.console.EmailBackend')
+DEFAULT_FROM_EMAIL = os.getenv('DEFAULT_FROM_EMAIL', 'orders@example.com')
+
+# How long a checkout Idempotency-Key is remembered (seconds); expired keys are
+# removed by `manage.py purge_idempotency_keys`.
+IDEMPOTENCY_KEY_TTL = 24 * 60 * 60
+# An in-flight claim older than this (the request died without answering) is
+# taken over by the next retry; keep it above the longest checkout request.
+IDEMPOTENCY_KEY_LEASE = 60
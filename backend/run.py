@@ -48,13 +48,22 @@ else:
     except FileNotFoundError:
         print("Error: manage.py not found for superuser check.")
 
-    print("Loading sample data from data.json via management command...")
+    # First start loads everything (users, cart items, ...); later starts only apply
+    # catalog rows of data.json whose content hash changed.
+    catalog_check = "import sys; from api.models import Product; sys.exit(0 if Product.objects.exists() else 1)"
+    has_catalog = subprocess.run([sys.executable, "manage.py", "shell", "-c", catalog_check], cwd=project_root).returncode == 0
+    if has_catalog:
+        print("Syncing catalog changes from data.json...")
+        command = [sys.executable, "manage.py", "sync_catalog", "data.json", "--quiet-skips"]
+    else:
+        print("Loading sample data from data.json via management command...")
+        command = [sys.executable, "manage.py", "load_sample_data"]
     try:
-        subprocess.run([sys.executable, "manage.py", "load_sample_data"], check=True, cwd=project_root)
+        subprocess.run(command, check=True, cwd=project_root)
     except subprocess.CalledProcessError as e:
         print(f"Error loading sample data: {e}")
     except FileNotFoundError:
-        print("Error: load_sample_data command assumes manage.py is runnable and the command exists.")
+        print("Error: the data loading command assumes manage.py is runnable and the command exists.")
 
     print("Starting server at http://0.0.0.0:8000")
     try:
@@ -4,6 +4,7 @@ import { PackageSearch, Search } from 'lucide-react';
 import { Input } from '@/components/ui/input'; // Assuming you have Shadcn Input
 import { Button } from '@/components/ui/button'; // Assuming you have Shadcn Button
 import { Link } from 'react-router-dom';
+import * as api from '../services/api';
 
 function TrackOrderPage() {
   const [orderId, setOrderId] = useState('');
@@ -12,33 +13,29 @@ function TrackOrderPage() {
   const [isLoading, setIsLoading] = useState(false);
   const [error, setError] = useState('');
 
-  const handleTrackOrder = (e) => {
+  const handleTrackOrder = async (e) => {
     e.preventDefault();
     setIsLoading(true);
     setError('');
     setTrackingInfo(null);
 
-    // Placeholder: In a real app, you'd make an API call here
-    // e.g., api.trackOrder(orderId, email)
-    console.log('Tracking order:', orderId, 'Email:', email);
-
-    setTimeout(() => {
-      if (orderId === '12345XYZ' && email.includes('@')) {
-        setTrackingInfo({
-          status: 'Shipped',
-          carrier: 'EcoCarrier Express',
-          trackingNumber: 'EC987654321US',
-          estimatedDelivery: 'May 15, 2025',
-          updates: [
-            { date: 'May 12, 2025', status: 'Package picked up by carrier.' },
-            { date: 'May 11, 2025', status: 'Order processed and ready for shipment.' },
-          ],
-        });
-      } else {
-        setError('Order not found or invalid details. Please check your order ID and email.');
-      }
+    try {
+      const { data } = await api.trackOrder(orderId.trim(), email.trim());
+      setTrackingInfo({
+        status: data.status.charAt(0).toUpperCase() + data.status.slice(1),
+        updates: [
+          ...data.events.map(event => ({
+            date: new Date(event.created_at).toLocaleDateString(),
+            status: `Order ${event.to_status}.${event.note ? ` ${event.note}` : ''}`,
+          })),
+          { date: new Date(data.created_at).toLocaleDateString(), status: 'Order placed.' },
+        ],
+      });
+    } catch (err) {
+      setError('Order not found or invalid details. Please check your order ID and email.');
+    } finally {
       setIsLoading(false);
-    }, 1500);
+    }
   };
 
   return (
@@ -96,9 +93,15 @@ function TrackOrderPage() {
           {trackingInfo && (
             <div className="border border-border rounded-lg p-6 space-y-4">
               <h3 className="text-xl font-semibold text-foreground">Order Status: <span className="text-primary">{trackingInfo.status}</span></h3>
-              <p className="text-sm text-muted-foreground"><strong>Carrier:</strong> {trackingInfo.carrier}</p>
-              <p className="text-sm text-muted-foreground"><strong>Tracking Number:</strong> {trackingInfo.trackingNumber}</p>
-              <p className="text-sm text-muted-foreground"><strong>Estimated Delivery:</strong> {trackingInfo.estimatedDelivery}</p>
+              {trackingInfo.carrier && (
+                <p className="text-sm text-muted-foreground"><strong>Carrier:</strong> {trackingInfo.carrier}</p>
+              )}
+              {trackingInfo.trackingNumber && (
+                <p className="text-sm text-muted-foreground"><strong>Tracking Number:</strong> {trackingInfo.trackingNumber}</p>
+              )}
+              {trackingInfo.estimatedDelivery && (
+                <p className="text-sm text-muted-foreground"><strong>Estimated Delivery:</strong> {trackingInfo.estimatedDelivery}</p>
+              )}
               <div className="mt-4">
                 <h4 className="text-md font-medium text-foreground mb-2">Recent Updates:</h4>
                 <ul className="space-y-2 text-xs text-muted-foreground">
@@ -40,10 +40,10 @@ export const addToCart       = (item, sessionId) => {
   const data = { ...item, session_id: sessionId }
   return api.post('/cart/', data) // Added slash
 }
-export const updateCartItem  = (itemId, quantity, sessionId) => // sessionId not used here by backend
-  api.put(`/cart/${itemId}/`, { quantity }) // Added slash
-export const removeFromCart  = (itemId, sessionId) => // sessionId not used here by backend
-  api.delete(`/cart/${itemId}/`) // Added slash
+export const updateCartItem  = (itemId, quantity, sessionId) => // sessionId locates guest carts kept in the key-value store
+  api.patch(`/cart/${itemId}/`, { quantity }, { params: sessionId ? { session_id: sessionId } : {} }) // Added slash
+export const removeFromCart  = (itemId, sessionId) =>
+  api.delete(`/cart/${itemId}/`, { params: sessionId ? { session_id: sessionId } : {} }) // Added slash
 
 // For CartItemViewSet's @action clear_cart, URL is typically /api/cart/clear/
 export const clearCart       = (sessionId) =>
@@ -55,6 +55,7 @@ export const mergeCart = (sessionId) =>
 // Orders
 export const getOrders    = ()      => api.get('/orders/') // Added slash
 export const getOrderById = (id)    => api.get(`/orders/${id}/`) // Added slash
+export const trackOrder   = (orderId, email) => api.get('/orders/track/', { params: { order_id: orderId, email } })
 
 // CHOOSE ONE FOR createOrder:
 // Option A: Point to Django's /checkout/ endpoint